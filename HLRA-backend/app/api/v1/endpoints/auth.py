@@ -1,157 +1,101 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import HTTPAuthorizationCredentials
 from datetime import datetime
 from app.services.auth_service import AuthService
 from app.models.user import UserCreate, UserLogin, UserUpdate, Token, UserResponse, RefreshTokenRequest
-from app.core.auth import get_current_active_user, security
+from app.core.auth import get_current_active_user, security, invalidate_cached_user_id, revoke_token
 from app.database.connection import get_database
 from app.models.user import UserInDB
+from app.core.config import settings
+from app.core.rate_limit import login_rate_limiter, register_rate_limiter, client_ip
+from app.core.responses import FastJSONResponse, model_response
+from app.utils.helpers import construct_from
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def register(
     user_create: UserCreate,
+    request: Request,
     db = Depends(get_database)
 ):
     """
     Register a new user
     """
-    import logging
-    import re
-    logger = logging.getLogger(__name__)
-    
+    register_rate_limiter.check(client_ip(request))
     auth_service = AuthService(db)
     
-    try:
-        # Validate password strength
-        if len(user_create.password) < 8:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Password must be at least 8 characters long for security."
-            )
-
-        # BCrypt has a 72-byte limit, check password length in bytes
-        if len(user_create.password.encode('utf-8')) > 72:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Password is too long. Please use a password with fewer characters."
-            )
-            
-        if not re.search(r'[A-Z]', user_create.password):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Password must contain at least one uppercase letter."
-            )
-            
-        if not re.search(r'[a-z]', user_create.password):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Password must contain at least one lowercase letter."
-            )
-            
-        if not re.search(r'\d', user_create.password):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Password must contain at least one number."
-            )
-        
-        # Check if user already exists
-        existing_user = await auth_service.get_user_by_email(user_create.email)
-        if existing_user:
-            logger.warning(f"Registration attempt with existing email: {user_create.email}")
-            raise HTTPException(
-                status_code=status.HTTP_409_CONFLICT,
-                detail="An account with this email address already exists. Please use a different email or try logging in."
-            )
-        
-        # Validate full name
-        if len(user_create.full_name.strip()) < 2:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Please provide your full name (at least 2 characters)."
-            )
-        
-        user = await auth_service.create_user(user_create)
-        logger.info(f"New user registered successfully: {user.email}")
-        
-        # Auto-create self profile for new user
-        try:
-            from app.services.family_profile_service import family_profile_service
-            from app.models.user import User
-            user_obj = User(**user.dict())
-            await family_profile_service.create_self_profile(user_obj)
-            logger.info(f"Self profile created for new user: {user.email}")
-        except Exception as profile_error:
-            logger.warning(f"Failed to create self profile for {user.email}: {profile_error}")
-            # Don't fail registration if profile creation fails
-        
-        return UserResponse(**user.dict())
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Unexpected error during registration for {user_create.email}: {str(e)}")
+    # Full name and password strength are enforced by UserCreate before we get here
+    # Insert directly; the unique email index reports existing accounts
+    user = await auth_service.create_user_if_new(user_create)
+    if user is None:
+        logger.warning("Registration attempt with existing email: %s", user_create.email)
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="An unexpected error occurred during registration. Please try again or contact support if the problem persists."
+            status_code=status.HTTP_409_CONFLICT,
+            detail="An account with this email address already exists. Please use a different email or try logging in."
         )
+    logger.info("New user registered successfully: %s", user.email)
+    
+    # Auto-create self profile for new user
+    try:
+        from app.services.family_profile_service import family_profile_service
+        from app.models.user import User
+        user_obj = User(**user.dict())
+        await family_profile_service.create_self_profile(user_obj)
+        logger.info("Self profile created for new user: %s", user.email)
+    except Exception as profile_error:
+        logger.warning("Failed to create self profile for %s: %s", user.email, profile_error)
+        # Don't fail registration if profile creation fails
+    
+    return construct_from(UserResponse, user)
 
 @router.post("/login", response_model=Token)
 async def login(
     user_login: UserLogin,
+    request: Request,
     db = Depends(get_database)
 ):
     """
     Login user and return access and refresh tokens
     """
-    import logging
-    logger = logging.getLogger(__name__)
-    
+    login_rate_limiter.check((client_ip(request), user_login.email.lower()))
     auth_service = AuthService(db)
     
-    try:
-        # Check if user exists
-        existing_user = await auth_service.get_user_by_email(user_login.email)
-        if not existing_user:
-            logger.warning(f"Login attempt for non-existent email: {user_login.email}")
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="No account found with this email address. Please check your email or register for a new account.",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-        
-        # Check if account is active
-        if not existing_user.is_active:
-            logger.warning(f"Login attempt for inactive account: {user_login.email}")
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Your account has been deactivated. Please contact support for assistance.",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-        
-        # Authenticate user
-        user = await auth_service.authenticate_user(user_login)
-        if not user:
-            logger.warning(f"Invalid password for email: {user_login.email}")
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Incorrect password. Please check your password and try again.",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-        
-        tokens = auth_service.create_tokens(user)
-        logger.info(f"Successful login for user: {user.email}")
-        return tokens
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Unexpected error during login for {user_login.email}: {str(e)}")
+    # Check if user exists
+    existing_user = await auth_service.get_user_by_email(user_login.email)
+    if not existing_user:
+        logger.warning("Login attempt for non-existent email: %s", user_login.email)
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="An unexpected error occurred during login. Please try again or contact support if the problem persists."
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="No account found with this email address. Please check your email or register for a new account.",
+            headers={"WWW-Authenticate": "Bearer"},
         )
+    
+    # Check if account is active
+    if not existing_user.is_active:
+        logger.warning("Login attempt for inactive account: %s", user_login.email)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Your account has been deactivated. Please contact support for assistance.",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    # Authenticate against the user we already loaded
+    user = await auth_service.verify_login(existing_user, user_login.password)
+    if not user:
+        logger.warning("Invalid password for email: %s", user_login.email)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect password. Please check your password and try again.",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    tokens = auth_service.create_tokens(user)
+    logger.info("Successful login for user: %s", user.email)
+    return tokens
 
 @router.post("/refresh", response_model=Token)
 async def refresh_token(
@@ -161,16 +105,13 @@ async def refresh_token(
     """
     Refresh access token using refresh token
     """
-    import logging
-    logger = logging.getLogger(__name__)
-    
     auth_service = AuthService(db)
     try:
         tokens = await auth_service.refresh_access_token(refresh_request.refresh_token)
         logger.info("Token refresh successful")
         return tokens
     except HTTPException as e:
-        logger.warning(f"Token refresh failed: {e.detail}")
+        logger.warning("Token refresh failed: %s", e.detail)
         # Return specific error for invalid refresh tokens to help frontend handle it
         if e.status_code == 401:
             raise HTTPException(
@@ -180,7 +121,7 @@ async def refresh_token(
             )
         raise e
     except Exception as e:
-        logger.error(f"Unexpected error during token refresh: {e}")
+        logger.error("Unexpected error during token refresh: %s", e)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token refresh failed. Please log in again.",
@@ -194,17 +135,19 @@ async def get_current_user_info(
     """
     Get current user information
     """
-    return UserResponse(**current_user.dict())
+    # Fetched on every page load; the user was validated when it was loaded
+    return model_response(construct_from(UserResponse, current_user))
 
 @router.post("/logout")
 async def logout(
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db = Depends(get_database)
 ):
     """
-    Logout user (client should remove tokens)
+    Logout user and revoke the access token (client should remove tokens)
     """
-    # In a production app, you might want to blacklist the token
-    # For now, we'll just return a success message
+    if credentials:
+        await revoke_token(credentials.credentials, db)
     return {"message": "Successfully logged out"}
 
 @router.get("/verify-token")
@@ -214,18 +157,18 @@ async def verify_token_endpoint(
     """
     Verify if the provided token is valid
     """
-    return {"valid": True, "user": UserResponse(**current_user.dict())}
+    return FastJSONResponse({"valid": True, "user": construct_from(UserResponse, current_user)})
 
-@router.get("/debug-auth")
+@router.get("/debug-auth", include_in_schema=False)
 async def debug_auth_endpoint(
     current_user: UserInDB = Depends(get_current_active_user)
 ):
     """
-    Simple debug endpoint to test authentication
+    Simple debug endpoint to test authentication (only available with DEBUG on)
     """
-    import logging
-    logger = logging.getLogger(__name__)
-    logger.info(f"🎯 Debug auth endpoint accessed by: {current_user.email}")
+    if not settings.debug:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    logger.info("🎯 Debug auth endpoint accessed by: %s", current_user.email)
     
     return {
         "message": "Authentication working correctly",
@@ -244,21 +187,15 @@ async def update_profile(
     Update current user's profile information
     """
     auth_service = AuthService(db)
-    try:
-        updated_user = await auth_service.update_user(current_user.id, user_update)
-        
-        if not updated_user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
-            
-        return UserResponse(**updated_user.dict())
-        
-    except HTTPException as e:
-        raise e
-    except Exception as e:
+    updated_user = await auth_service.update_user(current_user.id, user_update)
+    
+    if not updated_user:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e)
-        )
\ No newline at end of file
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+
+    # Cached copies of the user are stale now, on every device they're signed in on
+    invalidate_cached_user_id(current_user.id)
+        
+    return construct_from(UserResponse, updated_user)
\ No newline at end of file
@@ -3,18 +3,53 @@ AI Chat Endpoints
 Health-focused chatbot using Google Gemini AI
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
-from app.core.auth import get_current_user
-from app.models.user import UserInDB
+from app.core.auth import get_current_user, get_current_user_claims
+from app.core.config import settings
+from app.models.user import TokenClaims, UserInDB
 from app.services.ai_chat_service import ai_chat_service
+import json
 import logging
+import orjson
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Suggestions are the same for everyone, so clients may reuse them for an hour
+CHAT_SUGGESTIONS = [
+    "What do my recent lab results mean?",
+    "How has my cholesterol changed over time?",
+    "What is a normal range for blood sugar?",
+    "Should I be concerned about any of my results?",
+    "What lifestyle changes might help improve my health metrics?",
+    "Can you explain what HDL and LDL cholesterol are?",
+    "How do my results compare to normal ranges?",
+    "What health metrics should I track regularly?"
+]
+# Most conversations a single history request may return
+MAX_HISTORY_LIMIT = 200
+
+SUGGESTIONS_CACHE_CONTROL = "private, max-age=3600"
+# Static payload, encoded once instead of on every request
+_SUGGESTIONS_BODY = orjson.dumps({"suggestions": CHAT_SUGGESTIONS})
+HEALTH_CHECK_CACHE_CONTROL = "public, max-age=300"
+_HEALTH_OK_BODY = orjson.dumps({
+    "status": "healthy",
+    "service": "ai_chat",
+    "gemini_configured": True,
+    "message": "Chat service is ready"
+})
+_HEALTH_NO_KEY_BODY = orjson.dumps({
+    "status": "no_api_key",
+    "service": "ai_chat",
+    "gemini_configured": False,
+    "message": "Gemini API key not configured"
+})
+
 
 class ChatMessage(BaseModel):
     """Single chat message"""
@@ -88,14 +123,49 @@ async def ask_health_question(
         logger.error(f"Error in chat endpoint: {str(e)}", exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to process your question: {str(e)}"
+            detail="Failed to process your question"
         )
 
 
+@router.post("/ask/stream")
+async def ask_health_question_stream(
+    request: ChatRequest,
+    current_user: UserInDB = Depends(get_current_user)
+):
+    """
+    Ask a health-related question and stream the answer as server-sent events
+
+    Each event carries a {"token": ...} fragment of the answer as it is
+    generated; the stream ends with {"done": true}, or {"error": ...} if the
+    question could not be answered.
+    """
+    user_id = str(current_user.id)
+
+    async def event_stream():
+        try:
+            async for token in ai_chat_service.chat_stream(
+                user_id=user_id,
+                message=request.message,
+                conversation_history=request.conversation_history
+            ):
+                yield f"data: {json.dumps({'token': token})}\n\n"
+        except Exception as e:
+            logger.error(f"Error in chat stream: {str(e)}", exc_info=True)
+            yield f"data: {json.dumps({'error': 'Failed to process your question'})}\n\n"
+            return
+        yield 'data: {"done": true}\n\n'
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/history", response_model=ConversationHistoryResponse)
 async def get_chat_history(
-    limit: int = 50,
-    current_user: UserInDB = Depends(get_current_user)
+    limit: int = Query(50, ge=1, le=MAX_HISTORY_LIMIT),
+    current_user: TokenClaims = Depends(get_current_user_claims)
 ):
     """
     Retrieve conversation history with the AI assistant
@@ -110,8 +180,9 @@ async def get_chat_history(
             limit=limit
         )
 
-        return ConversationHistoryResponse(
-            messages=[ChatMessage(**msg) for msg in messages],
+        # Messages are built by the service with the right types already
+        return ConversationHistoryResponse.model_construct(
+            messages=[ChatMessage.model_construct(**msg) for msg in messages],
             total=len(messages)
         )
 
@@ -123,6 +194,26 @@ async def get_chat_history(
         )
 
 
+@router.get("/history/stream")
+async def stream_chat_history(
+    limit: int = Query(50, ge=1, le=MAX_HISTORY_LIMIT),
+    current_user: TokenClaims = Depends(get_current_user_claims)
+):
+    """
+    Stream conversation history as NDJSON, one message per line
+
+    Same messages as /history, without building the whole list in memory.
+    """
+    async def message_lines():
+        async for message in ai_chat_service.stream_conversation_history(
+            user_id=str(current_user.id),
+            limit=limit
+        ):
+            yield orjson.dumps(message) + b"\n"
+
+    return StreamingResponse(message_lines(), media_type="application/x-ndjson")
+
+
 @router.delete("/history")
 async def clear_chat_history(
     current_user: UserInDB = Depends(get_current_user)
@@ -160,25 +251,18 @@ async def clear_chat_history(
 
 @router.get("/suggestions")
 async def get_chat_suggestions(
-    current_user: UserInDB = Depends(get_current_user)
+    current_user: TokenClaims = Depends(get_current_user_claims)
 ):
     """
     Get suggested questions based on user's health data
 
     Returns a list of relevant questions the user might want to ask.
     """
-    return {
-        "suggestions": [
-            "What do my recent lab results mean?",
-            "How has my cholesterol changed over time?",
-            "What is a normal range for blood sugar?",
-            "Should I be concerned about any of my results?",
-            "What lifestyle changes might help improve my health metrics?",
-            "Can you explain what HDL and LDL cholesterol are?",
-            "How do my results compare to normal ranges?",
-            "What health metrics should I track regularly?"
-        ]
-    }
+    return Response(
+        content=_SUGGESTIONS_BODY,
+        media_type="application/json",
+        headers={"Cache-Control": SUGGESTIONS_CACHE_CONTROL}
+    )
 
 
 @router.get("/health-check")
@@ -186,20 +270,8 @@ async def chat_health_check():
     """
     Check if the chat service is operational
     """
-    try:
-        from app.core.config import settings
-
-        has_api_key = bool(settings.gemini_api_key)
-
-        return {
-            "status": "healthy" if has_api_key else "no_api_key",
-            "service": "ai_chat",
-            "gemini_configured": has_api_key,
-            "message": "Chat service is ready" if has_api_key else "Gemini API key not configured"
-        }
-    except Exception as e:
-        return {
-            "status": "error",
-            "service": "ai_chat",
-            "error": str(e)
-        }
+    return Response(
+        content=_HEALTH_OK_BODY if settings.gemini_api_key else _HEALTH_NO_KEY_BODY,
+        media_type="application/json",
+        headers={"Cache-Control": HEALTH_CHECK_CACHE_CONTROL}
+    )
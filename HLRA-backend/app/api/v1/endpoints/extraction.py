@@ -1,14 +1,29 @@
 # app/endpoints/extraction.py
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+from fastapi.security import HTTPAuthorizationCredentials
 from pydantic import BaseModel
+from typing import AsyncIterator, Optional
+import asyncio
+from app.core.auth import _authenticate, get_current_active_user
+from app.core.idempotency import IdempotencyRecord, idempotency
+from app.database.connection import get_database
 from app.models.file_models import FileProcessingStatus
+from app.models.health_data import FileStatus
+from app.models.user import UserInDB
 from app.services.data_service import data_service
+from app.services.progress_service import progress_service, build_processing_status, TERMINAL_STATUSES
+from app.api.v1.endpoints.upload import process_uploaded_file
 
 class ExtractRequest(BaseModel):
     fileId: str
 
 router = APIRouter()
 
+STREAM_KEEPALIVE_SECONDS = 15
+# Subprotocol that carries the access token on the progress WebSocket
+WS_AUTH_SUBPROTOCOL = "bearer"
+
 @router.get("/extraction/{file_id}", response_model=FileProcessingStatus)
 async def get_extraction_status(file_id: str):
     """Get extraction status for uploaded file"""
@@ -16,43 +31,147 @@ async def get_extraction_status(file_id: str):
     if not report:
         raise HTTPException(status_code=404, detail="Report not found")
     
-    # Calculate progress based on status
-    progress_map = {
-        "uploading": 20,
-        "processing": 60,
-        "completed": 100,
-        "failed": 0
-    }
-    
-    return FileProcessingStatus(
-        file_id=file_id,
-        status=report.processing_status.value,
-        progress=progress_map.get(report.processing_status.value, 0),
-        message=f"Status: {report.processing_status.value}",
-        parameters_found=len(report.parameters),
-        error=report.error_message
+    return build_processing_status(report)
+
+async def _progress_updates(file_id: str, user_id: str) -> Optional[AsyncIterator[FileProcessingStatus]]:
+    """Current status of a report, then each change until processing ends.
+
+    Returns None for unknown reports and for reports the user doesn't own.
+    Subscribes before reading the report so no transition slips in between.
+    """
+    queue = progress_service.subscribe(file_id)
+    report = await data_service.get_report(file_id)
+    if not report or report.user_id != user_id:
+        progress_service.unsubscribe(file_id, queue)
+        return None
+
+    async def updates():
+        try:
+            update = build_processing_status(report)
+            while True:
+                yield update
+                if update.status in TERMINAL_STATUSES:
+                    return
+                try:
+                    update = await asyncio.wait_for(queue.get(), timeout=STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    # Nothing published here (processing may run in another worker);
+                    # re-send the stored status, which also keeps the connection alive
+                    report_now = await data_service.get_report(file_id)
+                    if not report_now:
+                        return
+                    update = build_processing_status(report_now)
+        finally:
+            progress_service.unsubscribe(file_id, queue)
+
+    return updates()
+
+@router.get("/extraction/{file_id}/stream")
+async def stream_extraction_status(
+    file_id: str,
+    current_user: UserInDB = Depends(get_current_active_user)
+):
+    """Stream extraction progress as server-sent events until processing ends"""
+    updates = await _progress_updates(file_id, current_user.id)
+    if updates is None:
+        raise HTTPException(status_code=404, detail="Report not found")
+
+    async def event_stream():
+        try:
+            async for update in updates:
+                yield f"data: {update.model_dump_json()}\n\n"
+        finally:
+            await updates.aclose()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
+@router.websocket("/extraction/{file_id}/ws")
+async def extraction_status_websocket(
+    websocket: WebSocket,
+    file_id: str,
+    db = Depends(get_database)
+):
+    """
+    Push extraction progress over a WebSocket until processing ends
+
+    Browsers can't set an Authorization header on a WebSocket, so the access
+    token is offered as a subprotocol, `new WebSocket(url, ["bearer", token])`,
+    and checked before accepting. Unlike a query parameter it stays out of
+    access logs and browser history.
+    """
+    protocols = [p.strip() for p in websocket.headers.get("sec-websocket-protocol", "").split(",")]
+    token = protocols[1] if len(protocols) == 2 and protocols[0] == WS_AUTH_SUBPROTOCOL else None
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token) if token else None
+    try:
+        current_user = await _authenticate(credentials, db)
+    except HTTPException:
+        current_user = None
+    if current_user is None or not current_user.is_active:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Could not validate credentials")
+        return
+
+    updates = await _progress_updates(file_id, current_user.id)
+    if updates is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Report not found")
+        return
+
+    # Echo the subprotocol, otherwise browsers drop the connection
+    await websocket.accept(subprotocol=WS_AUTH_SUBPROTOCOL)
+    try:
+        async for update in updates:
+            await websocket.send_text(update.model_dump_json())
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await updates.aclose()
+
 @router.post("/")
-async def extract_data(extract_request: ExtractRequest):
+async def extract_data(
+    extract_request: ExtractRequest,
+    background_tasks: BackgroundTasks,
+    current_user: UserInDB = Depends(get_current_active_user),
+    idempotency_record: Optional[IdempotencyRecord] = Depends(idempotency)
+):
     """Extract data from uploaded file - this triggers the extraction process"""
-    try:
-        report = await data_service.get_report(extract_request.fileId)
-        if not report:
-            raise HTTPException(status_code=404, detail="Report not found")
-        
-        # Return current status and trigger processing if needed
-        return {
+    report = await data_service.get_report(extract_request.fileId)
+    # Other users' reports are reported missing rather than revealed
+    if not report or report.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Report not found")
+    
+    # Reports that never started or failed are (re)processed in the background,
+    # same as a fresh upload; the request itself returns immediately. The claim
+    # is atomic, so retried or concurrent requests schedule the work only once.
+    response = None
+    if report.processing_status in (FileStatus.UPLOADING, FileStatus.FAILED):
+        if await data_service.claim_report_for_processing(report.id):
+            background_tasks.add_task(process_uploaded_file, report.id)
+            response = {
+                "file_id": extract_request.fileId,
+                "status": FileStatus.PROCESSING.value,
+                "message": "Extraction process initiated",
+                "parameters_found": 0
+            }
+        else:
+            # Claimed by a concurrent request in the meantime
+            report = await data_service.get_report(extract_request.fileId) or report
+    
+    # Already processing or completed - just report the current status
+    if response is None:
+        response = {
             "file_id": extract_request.fileId,
             "status": report.processing_status.value,
-            "message": "Extraction process initiated",
+            "message": f"Extraction already {report.processing_status.value}",
             "parameters_found": len(report.parameters)
         }
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Extraction failed: {str(e)}")
+
+    if idempotency_record:
+        await idempotency_record.save(response)
+    return response
 
 @router.get("/extraction/{file_id}/raw")
 async def get_raw_text(file_id: str):
@@ -1,6 +1,6 @@
 # app/api/v1/endpoints/family_profiles.py
 from fastapi import APIRouter, HTTPException, Depends
-from typing import List
+from typing import Annotated, List, Optional
 from app.models.family_profile import (
     FamilyProfile,
     FamilyProfileCreate,
@@ -10,19 +10,40 @@ from app.models.family_profile import (
     ActiveProfileRequest,
     HealthInsightResponse
 )
-from app.models.user import User
+from app.models.user import TokenClaims, User
 from app.services.family_profile_service import family_profile_service
-from app.core.auth import get_current_user
+from app.core.auth import get_current_user, get_current_active_user, get_current_user_claims
+from app.core.idempotency import IdempotencyRecord, idempotency
+from app.core.responses import FastJSONResponse
+from app.utils.helpers import construct_from
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+async def get_owned_profile(
+    profile_id: str,
+    current_user: TokenClaims = Depends(get_current_user_claims)
+) -> FamilyProfile:
+    """
+    Dependency resolving a {profile_id} path parameter to one of the caller's profiles
+
+    Authenticates from the token claims, so the profile lookup is the only query.
+    """
+    profile = await family_profile_service.get_profile_by_id(profile_id, current_user.id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Family profile not found")
+    return profile
+
+OwnedProfile = Annotated[FamilyProfile, Depends(get_owned_profile)]
+
 @router.post("/family-profiles", response_model=FamilyProfileResponse)
 async def create_family_profile(
     profile_data: FamilyProfileCreate,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_active_user),
+    idempotency_record: Optional[IdempotencyRecord] = Depends(idempotency)
 ):
     """Create a new family profile"""
     try:
@@ -35,24 +56,29 @@ async def create_family_profile(
             profile_data=profile_data
         )
         
-        return FamilyProfileResponse(**profile.dict())
+        response = construct_from(FamilyProfileResponse, profile)
+        if idempotency_record:
+            await idempotency_record.save(response)
+        return response
         
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error creating family profile: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to create family profile: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to create family profile")
 
 @router.get("/family-profiles", response_model=FamilyProfileListResponse)
 async def get_family_profiles(current_user: User = Depends(get_current_user)):
     """Get all family profiles for the current user"""
     try:
-        profiles = await family_profile_service.get_profiles_by_user(current_user.id)
-        active_profile_id = await family_profile_service.get_active_profile_id(current_user.id)
+        profiles, active_profile_id = await asyncio.gather(
+            family_profile_service.get_profiles_by_user(current_user.id),
+            family_profile_service.get_active_profile_id(current_user.id)
+        )
         
-        profile_responses = [FamilyProfileResponse(**profile.dict()) for profile in profiles]
+        profile_responses = [construct_from(FamilyProfileResponse, profile) for profile in profiles]
         
-        return FamilyProfileListResponse(
+        return FamilyProfileListResponse.model_construct(
             profiles=profile_responses,
             total=len(profile_responses),
             active_profile_id=active_profile_id
@@ -63,24 +89,9 @@ async def get_family_profiles(current_user: User = Depends(get_current_user)):
         raise HTTPException(status_code=500, detail="Failed to fetch family profiles")
 
 @router.get("/family-profiles/{profile_id}", response_model=FamilyProfileResponse)
-async def get_family_profile(
-    profile_id: str,
-    current_user: User = Depends(get_current_user)
-):
+async def get_family_profile(profile: OwnedProfile):
     """Get a specific family profile"""
-    try:
-        profile = await family_profile_service.get_profile_by_id(profile_id, current_user.id)
-        
-        if not profile:
-            raise HTTPException(status_code=404, detail="Family profile not found")
-        
-        return FamilyProfileResponse(**profile.dict())
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error fetching family profile {profile_id}: {e}")
-        raise HTTPException(status_code=500, detail="Failed to fetch family profile")
+    return construct_from(FamilyProfileResponse, profile)
 
 @router.put("/family-profiles/{profile_id}", response_model=FamilyProfileResponse)
 async def update_family_profile(
@@ -99,7 +110,7 @@ async def update_family_profile(
         if not profile:
             raise HTTPException(status_code=404, detail="Family profile not found")
         
-        return FamilyProfileResponse(**profile.dict())
+        return construct_from(FamilyProfileResponse, profile)
         
     except HTTPException:
         raise
@@ -160,40 +171,31 @@ async def get_active_profile(current_user: User = Depends(get_current_user)):
         profile = await family_profile_service.get_active_profile(current_user.id)
         
         if not profile:
-            # Create a self profile if none exists
+            # Store the self profile first so the id handed out is the one kept,
+            # even when a concurrent request created it in the meantime
             profile = await family_profile_service.create_self_profile(current_user)
         
-        return FamilyProfileResponse(**profile.dict())
+        return construct_from(FamilyProfileResponse, profile)
         
     except Exception as e:
         logger.error(f"Error fetching active profile: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch active profile")
 
 @router.get("/family-profiles/{profile_id}/health-insights", response_model=HealthInsightResponse)
-async def get_health_insights(
-    profile_id: str,
-    current_user: User = Depends(get_current_user)
-):
+async def get_health_insights(profile: OwnedProfile):
     """Get health insights for a family profile"""
-    try:
-        insights = await family_profile_service.get_health_insights(profile_id, current_user.id)
-        
-        if not insights:
-            raise HTTPException(status_code=404, detail="Family profile not found")
-        
-        return insights
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error generating health insights for profile {profile_id}: {e}")
+    insights = family_profile_service.build_health_insights(profile)
+    
+    if not insights:
         raise HTTPException(status_code=500, detail="Failed to generate health insights")
+    
+    return insights
 
 @router.get("/family-profiles/{profile_id}/permissions/{permission}")
 async def check_profile_permission(
     profile_id: str,
     permission: str,
-    current_user: User = Depends(get_current_user)
+    current_user: TokenClaims = Depends(get_current_user_claims)
 ):
     """Check if a profile has a specific permission"""
     try:
@@ -220,18 +222,18 @@ async def initialize_self_profile(current_user: User = Depends(get_current_user)
         # Check if user already has a self profile
         existing_profile = await family_profile_service.get_self_profile(current_user.id)
         if existing_profile:
-            return {
+            return FastJSONResponse({
                 "message": "Self profile already exists",
-                "profile": FamilyProfileResponse(**existing_profile.dict())
-            }
+                "profile": construct_from(FamilyProfileResponse, existing_profile)
+            })
         
         # Create self profile
         profile = await family_profile_service.create_self_profile(current_user)
         
-        return {
+        return FastJSONResponse({
             "message": "Self profile created successfully",
-            "profile": FamilyProfileResponse(**profile.dict())
-        }
+            "profile": construct_from(FamilyProfileResponse, profile)
+        })
         
     except Exception as e:
         logger.error(f"Error initializing self profile for user {current_user.id}: {e}")
@@ -5,11 +5,14 @@ from app.models.notification import (
     NotificationResponse,
     NotificationListResponse,
     NotificationUpdate,
+    NotificationBulkReadRequest,
     NotificationCreate
 )
-from app.models.user import User
+from app.models.user import TokenClaims, User
 from app.services.notification_service import notification_service
-from app.core.auth import get_current_user
+from app.core.auth import get_current_user, get_current_active_user, get_current_user_claims
+from app.core.idempotency import IdempotencyRecord, idempotency
+from app.utils.helpers import construct_from
 import logging
 
 logger = logging.getLogger(__name__)
@@ -26,7 +29,8 @@ async def get_notifications(
 ):
     """Get notifications for the current user"""
     try:
-        notifications = await notification_service.get_user_notifications(
+        # Page, total, unread count and critical flag in one round-trip
+        notifications, total, unread_count, has_critical = await notification_service.get_notifications_bundle(
             user_id=current_user.id,
             profile_id=profile_id,
             unread_only=unread_only,
@@ -34,20 +38,11 @@ async def get_notifications(
             offset=offset
         )
         
-        # Get counts
-        unread_count = await notification_service.get_unread_count(
-            user_id=current_user.id,
-            profile_id=profile_id
-        )
-        
-        # Check for critical notifications
-        has_critical = any(notif.priority == "critical" for notif in notifications if not notif.is_read)
-        
-        notification_responses = [NotificationResponse(**notif.dict()) for notif in notifications]
+        notification_responses = [construct_from(NotificationResponse, notif) for notif in notifications]
         
-        return NotificationListResponse(
+        return NotificationListResponse.model_construct(
             notifications=notification_responses,
-            total=len(notification_responses),
+            total=total,
             unread_count=unread_count,
             has_critical=has_critical
         )
@@ -59,7 +54,7 @@ async def get_notifications(
 @router.get("/notifications/unread-count")
 async def get_unread_count(
     profile_id: Optional[str] = Query(None, description="Filter by profile ID"),
-    current_user: User = Depends(get_current_user)
+    current_user: TokenClaims = Depends(get_current_user_claims)
 ):
     """Get count of unread notifications"""
     try:
@@ -89,7 +84,7 @@ async def get_notification(
         if not notification:
             raise HTTPException(status_code=404, detail="Notification not found")
         
-        return NotificationResponse(**notification.dict())
+        return construct_from(NotificationResponse, notification)
         
     except HTTPException:
         raise
@@ -114,7 +109,7 @@ async def update_notification(
         if not notification:
             raise HTTPException(status_code=404, detail="Notification not found")
         
-        return NotificationResponse(**notification.dict())
+        return construct_from(NotificationResponse, notification)
         
     except HTTPException:
         raise
@@ -166,6 +161,27 @@ async def mark_all_notifications_as_read(
         logger.error(f"Error marking all notifications as read: {e}")
         raise HTTPException(status_code=500, detail="Failed to mark all notifications as read")
 
+@router.post("/notifications/read-bulk")
+async def mark_notifications_as_read(
+    request: NotificationBulkReadRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """Mark several notifications as read at once"""
+    try:
+        count = await notification_service.mark_many_as_read(
+            user_id=current_user.id,
+            notification_ids=request.ids
+        )
+        
+        return {
+            "message": f"Marked {count} notifications as read",
+            "marked_count": count
+        }
+        
+    except Exception as e:
+        logger.error(f"Error marking notifications as read: {e}")
+        raise HTTPException(status_code=500, detail="Failed to mark notifications as read")
+
 @router.delete("/notifications/{notification_id}")
 async def delete_notification(
     notification_id: str,
@@ -192,7 +208,8 @@ async def delete_notification(
 @router.post("/notifications", response_model=NotificationResponse)
 async def create_notification(
     notification_data: NotificationCreate,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_active_user),
+    idempotency_record: Optional[IdempotencyRecord] = Depends(idempotency)
 ):
     """Create a new notification (admin/system use)"""
     try:
@@ -201,7 +218,10 @@ async def create_notification(
         
         notification = await notification_service.create_notification(notification_data)
         
-        return NotificationResponse(**notification.dict())
+        response = construct_from(NotificationResponse, notification)
+        if idempotency_record:
+            await idempotency_record.save(response)
+        return response
         
     except Exception as e:
         logger.error(f"Error creating notification: {e}")
@@ -1,12 +1,12 @@
 # app/endpoints/reports.py
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
 from typing import List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 from app.models.health_data import LabReport, HealthParameter
 from app.models.user import User
 from app.services.data_service import data_service
 from app.services.family_profile_service import family_profile_service
-from app.core.auth import get_current_user
+from app.core.auth import get_current_active_user
 import logging
 logger = logging.getLogger(__name__)
 
@@ -15,97 +15,92 @@ class StarRequest(BaseModel):
 
 router = APIRouter()
 
+# The service already returns validated models, so the list routes dump them
+# straight to JSON instead of having FastAPI validate them again
+_report_list_adapter = TypeAdapter(List[LabReport])
+
+def _report_list_response(reports: List[LabReport], headers: Optional[dict] = None) -> Response:
+    """Serialize a list of reports to a JSON response in one pass"""
+    return Response(
+        content=_report_list_adapter.dump_json(reports),
+        media_type="application/json",
+        headers=headers
+    )
+
+async def get_report_profile_id(
+    profile_id: Optional[str] = Query(None, description="Filter by profile ID"),
+    current_user: User = Depends(get_current_active_user)
+) -> Optional[str]:
+    """
+    Dependency resolving which profile's reports to list
+
+    An explicit profile_id must belong to the user; otherwise the active profile
+    is used (served from the profile service's cache), creating one if needed.
+    """
+    if profile_id:
+        if not await family_profile_service.owns_profile(profile_id, current_user.id):
+            raise HTTPException(status_code=403, detail="Access denied to this profile")
+        return profile_id
+
+    active_profile = await family_profile_service.get_active_profile(current_user.id)
+    if not active_profile:
+        # Auto-create self profile if none exists
+        try:
+            active_profile = await family_profile_service.create_self_profile(current_user)
+            logger.info("Auto-created self profile for user %s during report fetch", current_user.id)
+        except Exception as e:
+            logger.warning("Failed to auto-create self profile during report fetch: %s", e)
+
+    return active_profile.id if active_profile else None
+
 @router.get("/reports", response_model=List[LabReport])
 async def get_all_reports(
-    profile_id: Optional[str] = Query(None, description="Filter by profile ID"),
-    current_user: User = Depends(get_current_user)
+    profile_id: Optional[str] = Depends(get_report_profile_id),
+    limit: Optional[int] = Query(None, ge=1, le=200, description="Maximum number of reports to return; all of them when omitted"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    current_user: User = Depends(get_current_active_user)
 ):
-    """Get all reports for the current user, optionally filtered by profile"""
+    """Get the current user's reports newest first, optionally filtered by profile
+
+    Pagination is opt-in: with a limit, the cursor for the next page (when more
+    reports exist) is returned in the X-Next-Cursor header.
+    """
     try:
-        # If no profile_id specified, use active profile - create one if needed
-        if not profile_id:
-            active_profile = await family_profile_service.get_active_profile(current_user.id)
-            if not active_profile:
-                # Auto-create self profile if none exists
-                try:
-                    active_profile = await family_profile_service.create_self_profile(current_user)
-                    logger.info(f"Auto-created self profile for user {current_user.id} during report fetch")
-                except Exception as e:
-                    logger.warning(f"Failed to auto-create self profile during report fetch: {e}")
-            
-            if active_profile:
-                profile_id = active_profile.id
-        
-        # Verify user has access to this profile
-        if profile_id:
-            profile = await family_profile_service.get_profile_by_id(profile_id, current_user.id)
-            if not profile:
-                raise HTTPException(status_code=403, detail="Access denied to this profile")
-        
-        reports = await data_service.get_reports_by_user_and_profile(
-            user_id=current_user.id, 
-            profile_id=profile_id
+        reports, next_cursor = await data_service.get_reports_page(
+            user_id=current_user.id,
+            profile_id=profile_id,
+            limit=limit,
+            cursor=cursor
         )
-
-        # Ensure we always return an array
-        if reports is None:
-            return []
-
-        # Convert to list if it's not already
-        if not isinstance(reports, list):
-            return []
-
-        return reports
-
-    except HTTPException:
-        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        logger.error(f"Error fetching reports: {e}")
+        logger.error("Error fetching reports: %s", e)
         return []  # Return empty array on error
 
-@router.get("/reports/starred")
+    return _report_list_response(reports, {"X-Next-Cursor": next_cursor} if next_cursor else None)
+
+@router.get("/reports/starred", response_model=List[LabReport])
 async def get_starred_reports(
-    profile_id: Optional[str] = Query(None, description="Filter by profile ID"),
-    current_user: User = Depends(get_current_user)
+    profile_id: Optional[str] = Depends(get_report_profile_id),
+    current_user: User = Depends(get_current_active_user)
 ):
     """Get starred reports for the current user, optionally filtered by profile"""
     try:
-        # If no profile_id specified, use active profile - create one if needed
-        if not profile_id:
-            active_profile = await family_profile_service.get_active_profile(current_user.id)
-            if not active_profile:
-                # Auto-create self profile if none exists
-                try:
-                    active_profile = await family_profile_service.create_self_profile(current_user)
-                    logger.info(f"Auto-created self profile for user {current_user.id} during report fetch")
-                except Exception as e:
-                    logger.warning(f"Failed to auto-create self profile during report fetch: {e}")
-            
-            if active_profile:
-                profile_id = active_profile.id
-        
-        # Verify user has access to this profile
-        if profile_id:
-            profile = await family_profile_service.get_profile_by_id(profile_id, current_user.id)
-            if not profile:
-                raise HTTPException(status_code=403, detail="Access denied to this profile")
-        
         starred_reports = await data_service.get_starred_reports_by_user_and_profile(
             user_id=current_user.id,
             profile_id=profile_id
         )
-        return starred_reports if starred_reports else []
+        return _report_list_response(starred_reports)
         
-    except HTTPException:
-        raise
     except Exception as e:
-        logger.error(f"Error fetching starred reports: {e}")
+        logger.error("Error fetching starred reports: %s", e)
         return []
 
 @router.get("/reports/{report_id}", response_model=LabReport)
 async def get_report(
     report_id: str,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_active_user)
 ):
     """Get specific report"""
     report = await data_service.get_report(report_id)
@@ -146,29 +141,29 @@ async def delete_report(report_id: str):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error deleting report {report_id}: {e}")
+        logger.error("Error deleting report %s: %s", report_id, e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @router.get("/reports/{report_id}/download")
 async def download_report(report_id: str):
     """Download a specific report file"""
     try:
-        report = await data_service.get_report(report_id)
+        report = await data_service.get_report_meta(report_id)
 
         if not report:
             raise HTTPException(status_code=404, detail="Report not found")
 
         # For now, return file info - you can implement actual file download later
         return {
-            "download_url": f"/uploads/{report.filename}",
-            "filename": report.filename,
-            "file_path": report.file_path
+            "download_url": f"/uploads/{report['filename']}",
+            "filename": report["filename"],
+            "file_path": report["file_path"]
         }
 
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error downloading report {report_id}: {e}")
+        logger.error("Error downloading report %s: %s", report_id, e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @router.post("/reports/{report_id}/star")
@@ -189,5 +184,5 @@ async def toggle_report_star(report_id: str, star_request: StarRequest):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error updating star status for report {report_id}: {e}")
+        logger.error("Error updating star status for report %s: %s", report_id, e)
         raise HTTPException(status_code=500, detail="Internal server error")
\ No newline at end of file
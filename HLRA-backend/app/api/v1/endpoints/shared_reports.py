@@ -1,17 +1,25 @@
 # app/api/v1/endpoints/shared_reports.py
 from fastapi import APIRouter, HTTPException, Depends, Header, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import FileResponse
+from cachetools import TTLCache
+from dataclasses import dataclass, field, fields
 from typing import Optional, Dict, Any
 from datetime import datetime, timedelta
+import asyncio
 import hashlib
+import hmac
+import os
 import secrets
 import bcrypt
-from pathlib import Path
 from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ReturnDocument
 
-from app.database.connection import get_database
+from app.models.health_data import LabReport
 from app.models.user import User
 from app.core.auth import get_current_user
+from app.core.config import settings
+from app.core.responses import FastJSONResponse
 from app.services.data_service import DataService
 import logging
 
@@ -20,61 +28,159 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 data_service = DataService()
 
+# Recently verified (share, password) pairs, so viewers reloading a protected
+# share skip bcrypt. Keys are HMACs, never the password; failures are not cached.
+SHARE_PASSWORD_CACHE_TTL_SECONDS = 300
+_verified_share_passwords: TTLCache = TTLCache(maxsize=10000, ttl=SHARE_PASSWORD_CACHE_TTL_SECONDS)
+
+# Report files never change once uploaded; private keeps them out of shared caches
+SHARED_DOWNLOAD_CACHE_CONTROL = "private, max-age=3600"
+
+# bcrypt releases the GIL, so one thread per core is as fast as it gets; the
+# cap keeps password traffic from occupying the whole shared threadpool
+_bcrypt_slots = asyncio.Semaphore(os.cpu_count() or 1)
+
+async def _run_bcrypt(func, *args):
+    """Run a bcrypt call in the threadpool, at most one per CPU at a time"""
+    async with _bcrypt_slots:
+        return await run_in_threadpool(func, *args)
+
+async def _check_share_password(share_link: "ShareLink", password: str) -> bool:
+    """bcrypt check of a share password, memoized for successful attempts"""
+    # The stored hash is part of the key, so a changed password misses the cache
+    cache_key = hmac.new(
+        settings.SECRET_KEY.encode(),
+        f"{share_link.id}:{share_link.password_hash}:{password}".encode(),
+        hashlib.sha256
+    ).digest()
+    if cache_key in _verified_share_passwords:
+        return True
+
+    # bcrypt is deliberately slow; keep it off the event loop
+    valid = await _run_bcrypt(
+        bcrypt.checkpw, password.encode('utf-8'), share_link.password_hash.encode('utf-8')
+    )
+    if valid:
+        _verified_share_passwords[cache_key] = True
+    return valid
+
 async def verify_report_ownership(report_id: str, user_id: str):
     """Verify that a user owns a specific report"""
-    report = await data_service.get_report(report_id)
-    if not report or report.user_id != user_id:
+    report = await data_service.get_report_meta(report_id)
+    if not report or report["user_id"] != user_id:
         return None
     return report
 
-# Shared link model
+# Shared link model, field for field the shared_links document
+@dataclass(slots=True)
 class ShareLink:
-    def __init__(self, **kwargs):
-        self.id = kwargs.get('id', self.generate_id())
-        self.report_id = kwargs.get('report_id')
-        self.user_id = kwargs.get('user_id')
-        self.token = kwargs.get('token', self.generate_token())
-        self.access_level = kwargs.get('access_level', 'view')  # view, comment, edit
-        self.password_hash = kwargs.get('password_hash')
-        self.expires_at = kwargs.get('expires_at')
-        self.created_at = kwargs.get('created_at', datetime.utcnow())
-        self.access_count = kwargs.get('access_count', 0)
-        self.is_active = kwargs.get('is_active', True)
-        self.last_accessed = kwargs.get('last_accessed')
-
-    @staticmethod
-    def generate_id():
-        return secrets.token_hex(16)
-    
-    @staticmethod
-    def generate_token():
-        return secrets.token_urlsafe(32)
+    report_id: str
+    user_id: str
+    id: str = field(default_factory=lambda: secrets.token_hex(16))
+    token: str = field(default_factory=lambda: secrets.token_urlsafe(32))
+    access_level: str = 'view'  # view, comment, edit
+    password_hash: Optional[str] = None
+    expires_at: Optional[datetime] = None
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    access_count: int = 0
+    is_active: bool = True
+    last_accessed: Optional[datetime] = None
 
-    def dict(self):
-        return {
-            'id': self.id,
-            'report_id': self.report_id,
-            'user_id': self.user_id,
-            'token': self.token,
-            'access_level': self.access_level,
-            'password_hash': self.password_hash,
-            'expires_at': self.expires_at,
-            'created_at': self.created_at,
-            'access_count': self.access_count,
-            'is_active': self.is_active,
-            'last_accessed': self.last_accessed
-        }
+    @classmethod
+    def from_document(cls, document: Dict[str, Any]) -> "ShareLink":
+        """Build from a shared_links document, ignoring Mongo's _id"""
+        return cls(**{name: document[name] for name in _SHARE_LINK_FIELDS if name in document})
+
+    def dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in _SHARE_LINK_FIELDS}
 
-async def get_shared_links_collection():
-    """Get the shared_links collection"""
-    db = await get_database()
-    return db.shared_links
+_SHARE_LINK_FIELDS = tuple(f.name for f in fields(ShareLink))
+
+async def get_shared_links_collection(request: Request) -> AsyncIOMotorCollection:
+    """Dependency returning the shared_links handle resolved once at startup"""
+    return request.app.state.shared_links
+
+def _live_share_filter(report_id: str, token: str, now: datetime) -> Dict[str, Any]:
+    """Filter matching an active, unexpired share link"""
+    return {
+        "report_id": report_id,
+        "token": token,
+        "is_active": True,
+        "$or": [{"expires_at": None}, {"expires_at": {"$gt": now}}]
+    }
+
+def _access_update(now: datetime) -> Dict[str, Any]:
+    """Update recording one access of a share link"""
+    return {"$inc": {"access_count": 1}, "$set": {"last_accessed": now}}
+
+async def _record_share_access(
+    collection: AsyncIOMotorCollection,
+    report_id: str,
+    token: str,
+    extra_filter: Optional[Dict[str, Any]] = None
+) -> Optional[ShareLink]:
+    """Validate a share link and count the access in a single round-trip"""
+    now = datetime.utcnow()
+    share_link_data = await collection.find_one_and_update(
+        {**_live_share_filter(report_id, token, now), **(extra_filter or {})},
+        _access_update(now),
+        return_document=ReturnDocument.BEFORE
+    )
+    return ShareLink.from_document(share_link_data) if share_link_data else None
+
+def _serialize_shared_report(report: LabReport, share_link: ShareLink) -> Dict[str, Any]:
+    """Response body for a report viewed through a share link"""
+    return {
+        "id": report.id,
+        "title": report.filename,
+        "uploadDate": report.upload_date.isoformat(),
+        "parameters": [
+            {
+                "name": param.name,
+                "value": param.value,
+                "unit": param.unit,
+                "status": getattr(param.status, "value", param.status),
+                "reference_range": param.reference_range or "N/A"
+            }
+            for param in report.parameters
+        ],
+        # Owner is anonymized for privacy
+        "ownerName": "Report Owner",
+        "accessLevel": share_link.access_level,
+        "requiresPassword": False,
+        "expiresAt": share_link.expires_at.isoformat() if share_link.expires_at else None
+    }
+
+async def _find_live_share(
+    collection: AsyncIOMotorCollection,
+    report_id: str,
+    token: str,
+    invalid_detail: str
+) -> ShareLink:
+    """Load a share link, raising 401 when it is unknown, revoked or expired"""
+    share_link_data = await collection.find_one({
+        "report_id": report_id,
+        "token": token,
+        "is_active": True
+    })
+    
+    if not share_link_data:
+        raise HTTPException(status_code=401, detail=invalid_detail)
+    
+    share_link = ShareLink.from_document(share_link_data)
+    
+    # Check expiration
+    if share_link.expires_at and share_link.expires_at < datetime.utcnow():
+        raise HTTPException(status_code=401, detail="Share link has expired")
+    
+    return share_link
 
 @router.post("/reports/{report_id}/share")
 async def create_share_link(
     report_id: str,
     share_data: Dict[str, Any],
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    collection: AsyncIOMotorCollection = Depends(get_shared_links_collection)
 ):
     """Create a shareable link for a report"""
     try:
@@ -83,8 +189,6 @@ async def create_share_link(
         if not report:
             raise HTTPException(status_code=404, detail="Report not found")
 
-        collection = await get_shared_links_collection()
-        
         # Create share link
         share_link = ShareLink(
             report_id=report_id,
@@ -95,7 +199,8 @@ async def create_share_link(
         # Handle password protection
         if share_data.get('password'):
             password_bytes = share_data['password'].encode('utf-8')
-            share_link.password_hash = bcrypt.hashpw(password_bytes, bcrypt.gensalt()).decode('utf-8')
+            password_hash = await _run_bcrypt(bcrypt.hashpw, password_bytes, bcrypt.gensalt())
+            share_link.password_hash = password_hash.decode('utf-8')
 
         # Handle expiration
         expires_in = share_data.get('expires_in')
@@ -132,7 +237,8 @@ async def create_share_link(
 async def get_shared_report(
     report_id: str,
     share_token: Optional[str] = Header(None, alias="Share-Token"),
-    token: Optional[str] = None  # Query parameter fallback
+    token: Optional[str] = None,  # Query parameter fallback
+    collection: AsyncIOMotorCollection = Depends(get_shared_links_collection)
 ):
     """Get a shared report using share token"""
     try:
@@ -141,68 +247,28 @@ async def get_shared_report(
         if not access_token:
             raise HTTPException(status_code=401, detail="Share token required")
 
-        collection = await get_shared_links_collection()
-        
-        # Find and validate share link
-        share_link_data = await collection.find_one({
-            "report_id": report_id,
-            "token": access_token,
-            "is_active": True
-        })
-        
-        if not share_link_data:
-            raise HTTPException(status_code=401, detail="Invalid or expired share link")
-        
-        share_link = ShareLink(**share_link_data)
-        
-        # Check expiration
-        if share_link.expires_at and share_link.expires_at < datetime.utcnow():
-            raise HTTPException(status_code=401, detail="Share link has expired")
+        # Serving an unprotected share and counting the view is one round-trip,
+        # and the report loads alongside it
+        share_link, report = await asyncio.gather(
+            _record_share_access(collection, report_id, access_token, {"password_hash": None}),
+            data_service.get_report(report_id)
+        )
         
-        # Check if password is required
-        if share_link.password_hash:
+        if not share_link:
+            # Not served: either it needs a password or the link is dead
+            share_link = await _find_live_share(
+                collection, report_id, access_token, "Invalid or expired share link"
+            )
             return {
                 "requiresPassword": True,
                 "accessLevel": share_link.access_level,
                 "expiresAt": share_link.expires_at.isoformat() if share_link.expires_at else None
             }
         
-        # Get the actual report
-        report = await data_service.get_report(report_id)
         if not report or report.user_id != share_link.user_id:
             raise HTTPException(status_code=404, detail="Report not found")
         
-        # Update access count
-        await collection.update_one(
-            {"_id": share_link_data["_id"]},
-            {
-                "$inc": {"access_count": 1},
-                "$set": {"last_accessed": datetime.utcnow()}
-            }
-        )
-        
-        # Get owner information (anonymize for privacy)
-        owner_name = "Report Owner"  # Could get from user table if needed
-        
-        return {
-            "id": report.id,
-            "title": report.filename,
-            "uploadDate": report.upload_date.isoformat(),
-            "parameters": [
-                {
-                    "name": param.name,
-                    "value": param.value,
-                    "unit": param.unit,
-                    "status": param.status.value if hasattr(param.status, 'value') else param.status,
-                    "reference_range": param.reference_range or "N/A"
-                }
-                for param in report.parameters
-            ],
-            "ownerName": owner_name,
-            "accessLevel": share_link.access_level,
-            "requiresPassword": False,
-            "expiresAt": share_link.expires_at.isoformat() if share_link.expires_at else None
-        }
+        return FastJSONResponse(_serialize_shared_report(report, share_link))
         
     except HTTPException:
         raise
@@ -214,7 +280,8 @@ async def get_shared_report(
 async def verify_shared_report_password(
     report_id: str,
     password_data: Dict[str, str],
-    share_token: Optional[str] = Header(None, alias="Share-Token")
+    share_token: Optional[str] = Header(None, alias="Share-Token"),
+    collection: AsyncIOMotorCollection = Depends(get_shared_links_collection)
 ):
     """Verify password for password-protected shared report"""
     try:
@@ -225,67 +292,26 @@ async def verify_shared_report_password(
         if not password:
             raise HTTPException(status_code=400, detail="Password required")
 
-        collection = await get_shared_links_collection()
-        
-        # Find share link
-        share_link_data = await collection.find_one({
-            "report_id": report_id,
-            "token": share_token,
-            "is_active": True
-        })
-        
-        if not share_link_data:
-            raise HTTPException(status_code=401, detail="Invalid share link")
-        
-        share_link = ShareLink(**share_link_data)
-        
-        # Check expiration
-        if share_link.expires_at and share_link.expires_at < datetime.utcnow():
-            raise HTTPException(status_code=401, detail="Share link has expired")
+        # The password is checked before the access is counted, so this one
+        # needs the share link up front
+        share_link = await _find_live_share(collection, report_id, share_token, "Invalid share link")
         
         # Verify password
         if not share_link.password_hash:
             raise HTTPException(status_code=400, detail="This report is not password protected")
         
-        password_bytes = password.encode('utf-8')
-        if not bcrypt.checkpw(password_bytes, share_link.password_hash.encode('utf-8')):
+        if not await _check_share_password(share_link, password):
             raise HTTPException(status_code=403, detail="Incorrect password")
         
-        # Get the report (same as get_shared_report)
-        report = await data_service.get_report(report_id)
+        # Count the access while the report loads (same as get_shared_report)
+        report, _ = await asyncio.gather(
+            data_service.get_report(report_id),
+            collection.update_one({"id": share_link.id}, _access_update(datetime.utcnow()))
+        )
         if not report or report.user_id != share_link.user_id:
             raise HTTPException(status_code=404, detail="Report not found")
         
-        # Update access count
-        await collection.update_one(
-            {"_id": share_link_data["_id"]},
-            {
-                "$inc": {"access_count": 1},
-                "$set": {"last_accessed": datetime.utcnow()}
-            }
-        )
-        
-        owner_name = "Report Owner"
-        
-        return {
-            "id": report.id,
-            "title": report.filename,
-            "uploadDate": report.upload_date.isoformat(),
-            "parameters": [
-                {
-                    "name": param.name,
-                    "value": param.value,
-                    "unit": param.unit,
-                    "status": param.status.value if hasattr(param.status, 'value') else param.status,
-                    "reference_range": param.reference_range or "N/A"
-                }
-                for param in report.parameters
-            ],
-            "ownerName": owner_name,
-            "accessLevel": share_link.access_level,
-            "requiresPassword": False,
-            "expiresAt": share_link.expires_at.isoformat() if share_link.expires_at else None
-        }
+        return FastJSONResponse(_serialize_shared_report(report, share_link))
         
     except HTTPException:
         raise
@@ -296,53 +322,45 @@ async def verify_shared_report_password(
 @router.get("/shared/reports/{report_id}/download")
 async def download_shared_report(
     report_id: str,
-    share_token: Optional[str] = Header(None, alias="Share-Token")
+    share_token: Optional[str] = Header(None, alias="Share-Token"),
+    collection: AsyncIOMotorCollection = Depends(get_shared_links_collection)
 ):
     """Download a shared report as PDF"""
     try:
         if not share_token:
             raise HTTPException(status_code=401, detail="Share token required")
 
-        collection = await get_shared_links_collection()
-        
-        # Validate share link
-        share_link_data = await collection.find_one({
-            "report_id": report_id,
-            "token": share_token,
-            "is_active": True
-        })
-        
-        if not share_link_data:
+        # Validate the share link and count the download in one round-trip,
+        # looking up the file alongside it
+        share_link, report = await asyncio.gather(
+            _record_share_access(collection, report_id, share_token),
+            data_service.get_report_meta(report_id)
+        )
+        if not share_link:
+            # Only failures pay for a second lookup, to report why
+            await _find_live_share(collection, report_id, share_token, "Invalid share link")
             raise HTTPException(status_code=401, detail="Invalid share link")
         
-        share_link = ShareLink(**share_link_data)
-        
-        # Check expiration
-        if share_link.expires_at and share_link.expires_at < datetime.utcnow():
-            raise HTTPException(status_code=401, detail="Share link has expired")
-        
-        # Get the report
-        report = await data_service.get_report(report_id)
-        if not report or report.user_id != share_link.user_id:
+        if not report or report["user_id"] != share_link.user_id:
             raise HTTPException(status_code=404, detail="Report not found")
         
-        # Update access count
-        await collection.update_one(
-            {"_id": share_link_data["_id"]},
-            {"$inc": {"access_count": 1}}
-        )
-        
-        # Return the original file if available
-        file_path = Path(report.file_path) if report.file_path else None
-        if file_path and file_path.exists():
-            return FileResponse(
-                str(file_path),
-                media_type="application/pdf",
-                filename=f"{report.filename}"
-            )
-        else:
+        # Return the original file if available; the stat doubles as the
+        # existence check and is handed to FileResponse so it isn't repeated
+        try:
+            file_stat = await run_in_threadpool(os.stat, report["file_path"]) if report["file_path"] else None
+        except FileNotFoundError:
+            file_stat = None
+        if not file_stat:
             raise HTTPException(status_code=404, detail="Report file not found")
         
+        return FileResponse(
+            report["file_path"],
+            media_type="application/pdf",
+            filename=f"{report['filename']}",
+            stat_result=file_stat,
+            headers={"Cache-Control": SHARED_DOWNLOAD_CACHE_CONTROL}
+        )
+        
     except HTTPException:
         raise
     except Exception as e:
@@ -352,25 +370,26 @@ async def download_shared_report(
 @router.get("/reports/{report_id}/shares")
 async def get_report_shares(
     report_id: str,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    collection: AsyncIOMotorCollection = Depends(get_shared_links_collection)
 ):
     """Get all share links for a report"""
     try:
-        # Verify user owns the report
-        report = await verify_report_ownership(report_id, current_user.id)
+        # Shares are already scoped to the user, so the ownership check can run
+        # alongside the (index-served) share query; the hash is never needed here
+        report, shares_data = await asyncio.gather(
+            verify_report_ownership(report_id, current_user.id),
+            collection.find(
+                {"user_id": current_user.id, "report_id": report_id},
+                projection={"password_hash": 0}
+            ).to_list(None)
+        )
         if not report:
             raise HTTPException(status_code=404, detail="Report not found")
-
-        collection = await get_shared_links_collection()
-        
-        shares_data = await collection.find({
-            "report_id": report_id,
-            "user_id": current_user.id
-        }).to_list(None)
         
         shares = []
         for share_data in shares_data:
-            share_link = ShareLink(**share_data)
+            share_link = ShareLink.from_document(share_data)
             shares.append({
                 "id": share_link.id,
                 "url": f"/shared/reports/{report_id}?token={share_link.token}",
@@ -382,8 +401,10 @@ async def get_report_shares(
                 "last_accessed": share_link.last_accessed.isoformat() if share_link.last_accessed else None
             })
         
-        return {"shares": shares}
+        return FastJSONResponse({"shares": shares})
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting report shares: {e}")
         raise HTTPException(status_code=500, detail="Failed to get shares")
@@ -391,27 +412,20 @@ async def get_report_shares(
 @router.delete("/shares/{share_id}")
 async def revoke_share_link(
     share_id: str,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    collection: AsyncIOMotorCollection = Depends(get_shared_links_collection)
 ):
     """Revoke/delete a share link"""
     try:
-        collection = await get_shared_links_collection()
-        
-        # Verify user owns the share link
-        share_data = await collection.find_one({
-            "id": share_id,
-            "user_id": current_user.id
-        })
-        
-        if not share_data:
-            raise HTTPException(status_code=404, detail="Share link not found")
-        
-        # Deactivate the share link
-        await collection.update_one(
-            {"id": share_id},
+        # Deactivate the share link; the user filter doubles as the ownership check
+        result = await collection.update_one(
+            {"id": share_id, "user_id": current_user.id},
             {"$set": {"is_active": False}}
         )
         
+        if result.matched_count == 0:
+            raise HTTPException(status_code=404, detail="Share link not found")
+        
         return {"message": "Share link revoked successfully"}
         
     except HTTPException:
@@ -1,69 +1,105 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Response
 from typing import Optional
 from app.services.data_service import data_service
+from app.models.health_data import TrendData, TrendDataResponse
 from app.schemas.request import TrendExportRequest
+from app.core.responses import model_response
 import logging
+import orjson
 from datetime import datetime, timedelta
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-@router.get("/trends/{parameter}")
+# Fixed list for now, so the response is encoded once; declared before
+# /trends/{parameter}, which would otherwise match "parameters"
+AVAILABLE_PARAMETERS = [
+      {"name": "glucose", "display_name": "Glucose", "unit": "mg/dL"},
+      {"name": "cholesterol", "display_name": "Total Cholesterol", "unit": "mg/dL"},
+      {"name": "hdl", "display_name": "HDL Cholesterol", "unit": "mg/dL"},
+      {"name": "ldl", "display_name": "LDL Cholesterol", "unit": "mg/dL"},
+      {"name": "triglycerides", "display_name": "Triglycerides", "unit": "mg/dL"},
+      {"name": "hemoglobin", "display_name": "Hemoglobin", "unit": "g/dL"},
+  ]
+PARAMETERS_CACHE_CONTROL = "public, max-age=86400, stale-while-revalidate=604800"
+_PARAMETERS_BODY = orjson.dumps({"parameters": AVAILABLE_PARAMETERS, "success": True})
+
+@router.get("/trends/parameters")
+async def get_available_parameters():
+      """Get list of available parameters for trending"""
+      return Response(
+          content=_PARAMETERS_BODY,
+          media_type="application/json",
+          headers={"Cache-Control": PARAMETERS_CACHE_CONTROL}
+      )
+
+def _trend_response(**fields) -> Response:
+      """
+      JSON response for a trend lookup, dumped straight from its fields
+
+      The chart points come validated from the service, so the response model is
+      only constructed, not validated again point by point.
+      """
+      return model_response(TrendDataResponse.model_construct(**fields), exclude_none=True)
+
+def _trend_columns_response(parameter: str, date_range: Optional[str], trend_data: TrendData) -> Response:
+      """
+      JSON response carrying the chart as parallel dates/values/statuses arrays
+
+      Same data as chart_data without repeating the keys of every point, which
+      keeps long series at a fraction of the size.
+      """
+      points = trend_data.data_points
+      return Response(
+          content=orjson.dumps({
+              "parameter_name": parameter,
+              "date_range": date_range,
+              "dates": [point.date for point in points],
+              "values": [point.value for point in points],
+              "statuses": [point.status for point in points],
+              "trend_direction": trend_data.trend_direction,
+              "success": True
+          }),
+          media_type="application/json"
+      )
+
+@router.get("/trends/{parameter}", response_model=TrendDataResponse, response_model_exclude_none=True)
 async def get_trend_data(
       parameter: str,
       date_range: Optional[str] = Query(default="3months"),
-      user_id: Optional[str] = Query(default=None)
+      user_id: Optional[str] = Query(default=None),
+      layout: str = Query(
+          default="points",
+          pattern="^(points|columns)$",
+          description="'columns' returns the chart as parallel dates/values/statuses arrays"
+      )
   ):
       """Get trend data for a specific parameter"""
       try:
           # Get trend data from service
           trend_data = await data_service.get_trend_data(parameter, user_id)
 
-          return {
-              "parameter_name": parameter,
-              "date_range": date_range,
-              "chart_data": trend_data.data_points,
-              "trend_direction": trend_data.trend_direction,
-              "success": True
-          }
+          if layout == "columns":
+              return _trend_columns_response(parameter, date_range, trend_data)
 
-      except Exception as e:
-          logger.error(f"Error getting trend data for {parameter}: {e}")
-          return {
-              "parameter_name": parameter,
-              "date_range": date_range,
-              "chart_data": [],
-              "trend_direction": "stable",
-              "success": False,
-              "error": str(e)
-          }
-
-@router.get("/trends/parameters")
-async def get_available_parameters():
-      """Get list of available parameters for trending"""
-      try:
-          # For now, return static list - you can make this dynamic later
-          parameters = [
-              {"name": "glucose", "display_name": "Glucose", "unit": "mg/dL"},
-              {"name": "cholesterol", "display_name": "Total Cholesterol", "unit": "mg/dL"},
-              {"name": "hdl", "display_name": "HDL Cholesterol", "unit": "mg/dL"},
-              {"name": "ldl", "display_name": "LDL Cholesterol", "unit": "mg/dL"},
-              {"name": "triglycerides", "display_name": "Triglycerides", "unit": "mg/dL"},
-              {"name": "hemoglobin", "display_name": "Hemoglobin", "unit": "g/dL"},
-          ]
-
-          return {
-              "parameters": parameters,
-              "success": True
-          }
+          return _trend_response(
+              parameter_name=parameter,
+              date_range=date_range,
+              chart_data=trend_data.data_points,
+              trend_direction=trend_data.trend_direction,
+              success=True
+          )
 
       except Exception as e:
-          logger.error(f"Error getting available parameters: {e}")
-          return {
-              "parameters": [],
-              "success": False,
-              "error": str(e)
-          }
+          logger.error(f"Error getting trend data for {parameter}: {e}")
+          return _trend_response(
+              parameter_name=parameter,
+              date_range=date_range,
+              chart_data=[],
+              trend_direction="stable",
+              success=False,
+              error=str(e)
+          )
 
 @router.post("/trends/export")
 async def export_trend_data(export_request: TrendExportRequest):
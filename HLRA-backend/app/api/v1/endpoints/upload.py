@@ -1,139 +1,125 @@
 # app/endpoints/upload.py
 from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks, Depends
 from app.models.file_models import FileUploadResponse
+from app.models.health_data import FileStatus, ParameterStatus
 from app.models.user import UserInDB
 from app.services.file_service import file_service
 from app.services.data_service import data_service
 from app.services.family_profile_service import family_profile_service
+from app.services.progress_service import progress_service
+from app.services.processing_service import processing_service
+from app.services.notification_service import notification_service
 from app.core.exceptions import FileUploadError, ValidationError
 from app.core.auth import get_current_active_user
+from app.core.config import settings
+import asyncio
+import logging
+import os
+import psutil
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# The API process, whose memory usage is logged around each report
+_process = psutil.Process(os.getpid())
+
+# OCR and extraction are CPU- and memory-heavy, so only this many reports are
+# processed at once (one per processing worker); the rest queue here
+_processing_slots = asyncio.Semaphore(settings.ocr_concurrency)
+
+# Parameter statuses that raise a health alert
+ALERT_STATUSES = frozenset({ParameterStatus.HIGH, ParameterStatus.LOW, ParameterStatus.CRITICAL})
+
 async def process_uploaded_file(report_id: str):
-    """Background task to process uploaded file with proper resource management"""
-    from app.services.ocr_service import ocr_service
-    from app.services.extraction_service import extraction_service
-    from app.services.notification_service import notification_service
-    from app.models.health_data import FileStatus
-    import logging
-    import gc
-    import psutil
-    import os
-    
-    logger = logging.getLogger(__name__)
-    process = psutil.Process(os.getpid())
-    initial_memory = process.memory_info().rss / 1024 / 1024  # MB
+    """Background task to process uploaded file, waiting for a free processing slot"""
+    async with _processing_slots:
+        await _process_uploaded_file(report_id)
+
+async def _process_uploaded_file(report_id: str):
+    """Run OCR and extraction for an uploaded report and record the outcome"""
+    # Memory sampling costs a /proc read per call, so it only runs when debugging
+    debug_memory = logger.isEnabledFor(logging.DEBUG)
+    if debug_memory:
+        initial_memory = _process.memory_info().rss / 1024 / 1024  # MB
     
-    logger.info(f"Starting background processing for report: {report_id} (Memory: {initial_memory:.2f}MB)")
+    logger.info("Starting background processing for report: %s", report_id)
     
     report = None
-    raw_text = None
-    parameters = None
-    
     try:
         # Get report
         report = await data_service.get_report(report_id)
         if not report:
-            logger.error(f"Report not found: {report_id}")
+            logger.error("Report not found: %s", report_id)
             return
         
-        # Update status to processing
-        report.processing_status = FileStatus.PROCESSING
-        await data_service.update_report(report)
-        logger.info(f"Report {report_id} status updated to processing")
+        # Update status to processing (fresh uploads are already stored as processing)
+        if report.processing_status != FileStatus.PROCESSING:
+            report.processing_status = FileStatus.PROCESSING
+            await data_service.update_report(report)
+            progress_service.publish(report)
+            logger.info("Report %s status updated to processing", report_id)
         
-        # Extract text with memory monitoring
-        try:
-            raw_text = ocr_service.extract_text_from_file(report.file_path)
-            report.raw_text = raw_text
-            logger.info(f"Raw text extracted for report {report_id}, length: {len(raw_text) if raw_text else 0}")
-            
-            # Memory checkpoint
-            current_memory = process.memory_info().rss / 1024 / 1024
-            logger.info(f"Memory after OCR: {current_memory:.2f}MB")
-            
-        except Exception as ocr_error:
-            logger.error(f"OCR extraction failed for report {report_id}: {ocr_error}")
-            raise ocr_error
-        
-        # Extract parameters with cleanup
-        try:
-            parameters = extraction_service.extract_parameters(raw_text)
-            report.parameters = parameters
-            logger.info(f"Parameters extracted for report {report_id}, count: {len(parameters)}")
-            
-            # Clear raw_text from memory after parameter extraction
-            del raw_text
-            gc.collect()
-            
-        except Exception as extraction_error:
-            logger.error(f"Parameter extraction failed for report {report_id}: {extraction_error}")
-            raise extraction_error
+        # OCR and parameter extraction run in a worker process
+        raw_text, parameters = await processing_service.extract(report.file_path)
+        report.raw_text = raw_text
+        report.parameters = parameters
+        logger.info(
+            "Extracted report %s: %s characters, %s parameters",
+            report_id, len(raw_text) if raw_text else 0, len(parameters)
+        )
         
         # Update status to completed
         report.processing_status = FileStatus.COMPLETED
         await data_service.update_report(report)
-        logger.info(f"Report {report_id} processing completed successfully")
+        progress_service.publish(report)
+        logger.info("Report %s processing completed successfully", report_id)
         
-        # Create notification for report completion
+        # Notify that the report is ready and alert on out-of-range parameters,
+        # the alerts going out in one bulk insert
         try:
-            await notification_service.create_report_ready_notification(
-                user_id=report.user_id,
-                profile_id=report.profile_id,
-                report_id=report.id,
-                filename=report.original_filename
+            alerts = [param for param in parameters if param.status in ALERT_STATUSES]
+            await asyncio.gather(
+                notification_service.create_report_ready_notification(
+                    user_id=report.user_id,
+                    profile_id=report.profile_id,
+                    report_id=report.id,
+                    filename=report.original_filename
+                ),
+                notification_service.create_health_alerts(
+                    user_id=report.user_id,
+                    profile_id=report.profile_id,
+                    report_id=report.id,
+                    parameters=alerts
+                )
             )
-            
-            # Check for health alerts in parameters
-            for param in parameters:
-                if param.status in ['high', 'low', 'critical']:
-                    await notification_service.create_health_alert(
-                        user_id=report.user_id,
-                        profile_id=report.profile_id,
-                        parameter_name=param.name,
-                        value=str(param.value),
-                        status=param.status,
-                        report_id=report.id
-                    )
-                    
+
         except Exception as notif_error:
-            logger.error(f"Error creating notifications for report {report_id}: {notif_error}")
+            logger.error("Error creating notifications for report %s: %s", report_id, notif_error)
             # Don't fail the whole process if notification creation fails
         
     except Exception as e:
-        logger.error(f"Error processing report {report_id}: {e}")
+        logger.error("Error processing report %s: %s", report_id, e)
         # Update status to failed
         try:
-            report = await data_service.get_report(report_id)
+            # Reuse the report already loaded; only a failed lookup needs another go
+            if report is None:
+                report = await data_service.get_report(report_id)
             if report:
                 report.processing_status = FileStatus.FAILED
                 report.error_message = str(e)
                 await data_service.update_report(report)
+                progress_service.publish(report)
         except Exception as update_error:
-            logger.error(f"Error updating failed status for report {report_id}: {update_error}")
+            logger.error("Error updating failed status for report %s: %s", report_id, update_error)
     
     finally:
-        # Cleanup resources and log memory usage
-        try:
-            # Clear all variables from memory
-            if 'raw_text' in locals():
-                del raw_text
-            if 'parameters' in locals():
-                del parameters
-            if 'report' in locals():
-                del report
-            
-            # Force garbage collection
-            gc.collect()
-            
-            # Log final memory usage
-            final_memory = process.memory_info().rss / 1024 / 1024
-            memory_diff = final_memory - initial_memory
-            logger.info(f"Background task completed for {report_id}. Memory: {final_memory:.2f}MB (Δ{memory_diff:+.2f}MB)")
-            
-        except Exception as cleanup_error:
-            logger.error(f"Error during cleanup for report {report_id}: {cleanup_error}")
+        if debug_memory:
+            final_memory = _process.memory_info().rss / 1024 / 1024
+            logger.debug(
+                "Background task completed for %s. Memory: %.2fMB (Δ%+.2fMB)",
+                report_id, final_memory, final_memory - initial_memory
+            )
 
 @router.post("/upload", response_model=FileUploadResponse)
 async def upload_file(
@@ -149,9 +135,9 @@ async def upload_file(
             # Auto-create self profile if none exists
             try:
                 active_profile = await family_profile_service.create_self_profile(current_user)
-                logger.info(f"Auto-created self profile for user {current_user.id} during upload")
+                logger.info("Auto-created self profile for user %s during upload", current_user.id)
             except Exception as e:
-                logger.warning(f"Failed to auto-create self profile during upload: {e}")
+                logger.warning("Failed to auto-create self profile during upload: %s", e)
         
         profile_id = active_profile.id if active_profile else None
         
@@ -162,6 +148,10 @@ async def upload_file(
         if profile_id:
             lab_report.profile_id = profile_id
         
+        # Stored as processing right away so the background task doesn't need
+        # a separate status write before it starts
+        lab_report.processing_status = FileStatus.PROCESSING
+        
         # Save to database
         await data_service.save_report(lab_report)
         
@@ -181,6 +171,5 @@ async def upload_file(
         )
         
     except (FileUploadError, ValidationError) as e:
-        raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
\ No newline at end of file
+        # Rejected uploads are reported as bad requests
+        raise HTTPException(status_code=400, detail=e.detail)
\ No newline at end of file
@@ -1,23 +1,126 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from app.core.security import verify_token
+from cachetools import TTLCache
+from app.core.security import decode_access_token
 from app.services.auth_service import AuthService
 from app.database.connection import get_database
-from app.models.user import UserInDB
-from typing import Optional
+from app.models.user import TokenClaims, UserInDB
+from app.core.config import settings
+from typing import Optional, Tuple
+from datetime import datetime, timezone
+import asyncio
+import functools
+import hashlib
+import logging
+import time
+
+logger = logging.getLogger(__name__)
 
 security = HTTPBearer(auto_error=False)
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db = Depends(get_database)
-) -> UserInDB:
+# Verified token -> user cache. Keys are SHA-256 digests so raw tokens are never
+# kept in memory; each entry also carries its own deadline, capped by the JWT exp,
+# and the token's jti so cache hits still honour revocation.
+USER_CACHE_TTL_SECONDS = 60
+_user_cache: TTLCache = TTLCache(maxsize=10000, ttl=USER_CACHE_TTL_SECONDS)
+
+def _token_cache_key(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+def _get_cached_user(token: str) -> Optional[Tuple[UserInDB, Optional[str]]]:
+    """Cached (user, jti) for a token, or None"""
+    entry = _user_cache.get(_token_cache_key(token))
+    if entry is None:
+        return None
+    user, expires_at, jti = entry
+    if expires_at <= time.time():
+        return None
+    return user, jti
+
+def _cache_deadline(token_exp: Optional[float]) -> float:
+    expires_at = time.time() + USER_CACHE_TTL_SECONDS
+    if token_exp is not None:
+        expires_at = min(expires_at, token_exp)
+    return expires_at
+
+def _cache_user(token: str, user: UserInDB, payload: dict) -> None:
+    expires_at = _cache_deadline(payload.get("exp"))
+    if expires_at > time.time():
+        _user_cache[_token_cache_key(token)] = (user, expires_at, payload.get("jti"))
+
+# Verified token -> claims, for routes that only need the caller's identity
+_claims_cache: TTLCache = TTLCache(maxsize=10000, ttl=USER_CACHE_TTL_SECONDS)
+
+def _get_cached_claims(token: str) -> Optional[Tuple[TokenClaims, Optional[str]]]:
+    """Cached (claims, jti) for a token, or None"""
+    entry = _claims_cache.get(_token_cache_key(token))
+    if entry is None or entry[1] <= time.time():
+        return None
+    return entry[0], entry[2]
+
+def _cache_claims(token: str, claims: TokenClaims, payload: dict) -> None:
+    expires_at = _cache_deadline(payload.get("exp"))
+    if expires_at > time.time():
+        _claims_cache[_token_cache_key(token)] = (claims, expires_at, payload.get("jti"))
+
+def invalidate_cached_user(token: str) -> None:
+    """Drop a token from the user cache (logout, profile changes)"""
+    key = _token_cache_key(token)
+    _user_cache.pop(key, None)
+    _claims_cache.pop(key, None)
+
+def invalidate_cached_user_id(user_id: str) -> None:
+    """Drop every cached token of a user, e.g. after their profile changed"""
+    for cache in (_user_cache, _claims_cache):
+        stale_keys = [key for key, (cached, _, _) in list(cache.items()) if cached.id == user_id]
+        for key in stale_keys:
+            cache.pop(key, None)
+
+# Revoked access-token ids. The revoked_tokens collection (TTL-indexed on
+# expires_at) is the source of truth shared between workers; this set spares
+# the lookup for tokens revoked in this process.
+_revoked_jtis: TTLCache = TTLCache(
+    maxsize=10000, ttl=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+)
+
+async def revoke_token(token: str, db) -> None:
+    """Revoke an access token until it expires and drop it from the user cache
+
+    Other workers may still hold the token in their caches; they see the
+    revoked_tokens entry because cache hits check revocation too.
     """
-    Dependency to get the current authenticated user
+    invalidate_cached_user(token)
+    payload = decode_access_token(token)
+    if not payload or not payload.get("jti"):
+        return
+
+    jti = payload["jti"]
+    _revoked_jtis[jti] = True
+    expires_at = datetime.fromtimestamp(payload["exp"], tz=timezone.utc)
+    await db.revoked_tokens.update_one(
+        {"_id": jti},
+        {"$set": {"expires_at": expires_at}},
+        upsert=True
+    )
+
+async def _is_revoked(jti: Optional[str], db) -> bool:
+    if not jti:
+        return False
+    if jti in _revoked_jtis:
+        return True
+    return await db.revoked_tokens.find_one({"_id": jti}, {"_id": 1}) is not None
+
+@functools.lru_cache(maxsize=1)
+def _auth_service(db) -> AuthService:
+    """AuthService for a database handle, built once rather than per request
+
+    get_database hands out a fresh handle each call, but handles compare equal
+    by client and name, so they all share the one service.
     """
-    import logging
-    logger = logging.getLogger(__name__)
-    
+    return AuthService(db)
+
+async def _authenticate(credentials: Optional[HTTPAuthorizationCredentials], db) -> UserInDB:
+    """Resolve bearer credentials to a user, raising 401 when they don't check out"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -25,40 +128,113 @@ async def get_current_user(
     )
 
     if not credentials:
-        logger.warning("🚫 No credentials provided - Authorization header missing")
+        logger.debug("No credentials provided - Authorization header missing")
         raise credentials_exception
 
     token = credentials.credentials
-    logger.info(f"🔍 Verifying token: {token[:20]}...")
-    
-    email = verify_token(token)
-    logger.info(f"🔍 Token verification result - Email: {email}")
+
+    cached = _get_cached_user(token)
+    if cached is not None:
+        cached_user, jti = cached
+        if await _is_revoked(jti, db):
+            logger.warning("❌ Token has been revoked")
+            invalidate_cached_user(token)
+            raise credentials_exception
+        return cached_user
+
+    payload = decode_access_token(token)
+    email = payload["sub"] if payload else None
     
     if email is None:
         logger.warning("❌ Token verification failed")
         raise credentials_exception
 
-    auth_service = AuthService(db)
-    user = await auth_service.get_user_by_email(email)
-    logger.info(f"🔍 User lookup result: {user.email if user else 'None'}")
+    auth_service = _auth_service(db)
+    user, revoked = await asyncio.gather(
+        auth_service.get_user_by_email(email),
+        _is_revoked(payload.get("jti"), db)
+    )
     
+    if revoked:
+        logger.warning("❌ Token has been revoked")
+        raise credentials_exception
+
     if user is None:
         logger.warning("❌ User not found in database")
         raise credentials_exception
     
-    logger.info(f"✅ Authentication successful for user: {user.email}")
+    _cache_user(token, user, payload)
+    logger.debug("Authenticated user %s", user.id)
     return user
 
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db = Depends(get_database)
+) -> UserInDB:
+    """
+    Dependency to get the current authenticated user
+    """
+    return await _authenticate(credentials, db)
+
 async def get_current_active_user(
-    current_user: UserInDB = Depends(get_current_user),
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db = Depends(get_database)
 ) -> UserInDB:
     """
     Dependency to get the current active user
+
+    Resolves the token itself rather than depending on get_current_user, so
+    authenticated routes carry a single node in the dependency graph.
     """
+    current_user = await _authenticate(credentials, db)
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
+def _revoked_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+async def get_current_user_claims(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db = Depends(get_database)
+) -> TokenClaims:
+    """
+    Dependency for routes that only need to know who is calling
+
+    Trusts the signed token's uid claim instead of loading the user. Revocation
+    is still honoured; tokens issued without a uid fall back to the full lookup.
+    """
+    if credentials:
+        token = credentials.credentials
+
+        cached_claims = _get_cached_claims(token)
+        if cached_claims is None:
+            cached_user = _get_cached_user(token)
+            if cached_user is not None:
+                user, jti = cached_user
+                cached_claims = TokenClaims(id=user.id, email=user.email), jti
+        if cached_claims is not None:
+            claims, jti = cached_claims
+            if await _is_revoked(jti, db):
+                invalidate_cached_user(token)
+                raise _revoked_exception()
+            return claims
+
+        payload = decode_access_token(token)
+        if payload and payload.get("uid"):
+            if await _is_revoked(payload.get("jti"), db):
+                raise _revoked_exception()
+            claims = TokenClaims(id=payload["uid"], email=payload["sub"])
+            _cache_claims(token, claims, payload)
+            return claims
+
+    user = await _authenticate(credentials, db)
+    return TokenClaims(id=user.id, email=user.email)
+
 def get_optional_current_user():
     """
     Optional dependency to get current user (returns None if not authenticated)
@@ -69,18 +245,11 @@ def get_optional_current_user():
     ) -> Optional[UserInDB]:
         if not credentials:
             return None
-            
+
+        # Same resolution (cache, revocation) as the required dependencies
         try:
-            token = credentials.credentials
-            email = verify_token(token)
-            
-            if email is None:
-                return None
-
-            auth_service = AuthService(db)
-            user = await auth_service.get_user_by_email(email)
-            return user
-        except:
+            return await _authenticate(credentials, db)
+        except HTTPException:
             return None
     
     return _get_optional_current_user
\ No newline at end of file
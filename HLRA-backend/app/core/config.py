@@ -1,6 +1,7 @@
 from pydantic_settings import BaseSettings
 from pydantic import Field
-from typing import List
+from typing import List, Tuple
+from functools import cached_property, lru_cache
 import os
 
 class Settings(BaseSettings):
@@ -22,6 +23,8 @@ class Settings(BaseSettings):
 
       # OCR Configuration
       tesseract_path: str = ""
+      # Reports processed at once; further uploads wait their turn
+      ocr_concurrency: int = Field(default=os.cpu_count() or 2, env="OCR_CONCURRENCY")
 
       # MongoDB Configuration
       mongodb_url: str = Field(env="MONGODB_URL")
@@ -38,14 +41,14 @@ class Settings(BaseSettings):
       # Gemini AI Configuration
       gemini_api_key: str = Field(default="", env="GEMINI_API_KEY")
 
-      @property
-      def allowed_origins(self) -> List[str]:
-          """Parse CORS origins from environment variable"""
-          if self.cors_origins:
-              return [origin.strip() for origin in self.cors_origins.split(",")]
-          return ["http://localhost:3000", "http://localhost:5173"]
+      # Settings don't change after startup, so the derived values are parsed once
+      @cached_property
+      def allowed_origins(self) -> Tuple[str, ...]:
+          """Parse CORS origins from environment variable (a tuple, so it can't drift or be mutated)"""
+          origins = tuple(origin.strip() for origin in self.cors_origins.split(",") if origin.strip())
+          return origins or ("http://localhost:3000", "http://localhost:5173")
 
-      @property
+      @cached_property
       def effective_public_app_url(self) -> str:
           """Get the effective public app URL with intelligent fallback"""
           if self.public_app_url:
@@ -70,4 +73,9 @@ class Settings(BaseSettings):
           env_file = ".env"
           case_sensitive = False
 
-settings = Settings()
\ No newline at end of file
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+      """The process-wide settings, read from the environment and .env once"""
+      return Settings()
+
+settings = get_settings()
@@ -0,0 +1,90 @@
+from fastapi import Depends, HTTPException, Request, status
+from pymongo.errors import DuplicateKeyError
+from typing import Any, AsyncIterator, Optional
+from datetime import datetime, timedelta
+from app.core.auth import get_current_active_user
+from app.core.responses import encode_json
+from app.database.connection import get_database
+from app.models.user import UserInDB
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+IDEMPOTENCY_TTL = timedelta(hours=24)
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
+
+class IdempotentReplay(Exception):
+    """Raised for a key that was already answered; handled in main.py"""
+
+    def __init__(self, body: bytes, status_code: int):
+        self.body = body
+        self.status_code = status_code
+
+class IdempotencyRecord:
+    """Claimed idempotency key; the endpoint saves its response on it"""
+
+    def __init__(self, collection, record_id: str):
+        self._collection = collection
+        self._id = record_id
+        self.saved = False
+
+    async def save(self, content: Any, status_code: int = 200) -> None:
+        """Store the response so replays of the key get it back unchanged"""
+        await self._collection.update_one(
+            {"_id": self._id},
+            {"$set": {
+                "body": encode_json(content),
+                "status_code": status_code,
+                "completed": True
+            }}
+        )
+        self.saved = True
+
+async def idempotency(
+    request: Request,
+    current_user: UserInDB = Depends(get_current_active_user),
+    db = Depends(get_database)
+) -> AsyncIterator[Optional[IdempotencyRecord]]:
+    """
+    Dependency honouring the Idempotency-Key header of a write endpoint
+
+    Yields None when the header is absent. Otherwise the key is claimed for the
+    caller and route (kept 24h by the TTL index on idempotency_keys.expires_at):
+    a key that was answered before replays the stored response, one still in
+    flight gets 409, and a claim whose request fails is released for a retry.
+
+    Routes using it authenticate with get_current_active_user as well, so the
+    caller is resolved once per request.
+    """
+    key = request.headers.get(IDEMPOTENCY_HEADER)
+    if not key:
+        yield None
+        return
+
+    if len(key) > MAX_IDEMPOTENCY_KEY_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{IDEMPOTENCY_HEADER} must be at most {MAX_IDEMPOTENCY_KEY_LENGTH} characters"
+        )
+
+    collection = db.idempotency_keys
+    record_id = f"{current_user.id}:{request.method}:{request.url.path}:{key}"
+    try:
+        await collection.insert_one({
+            "_id": record_id,
+            "completed": False,
+            "expires_at": datetime.utcnow() + IDEMPOTENCY_TTL
+        })
+    except DuplicateKeyError:
+        existing = await collection.find_one({"_id": record_id})
+        if existing and existing.get("completed"):
+            raise IdempotentReplay(existing["body"], existing["status_code"])
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A request with this Idempotency-Key is still being processed"
+        )
+
+    record = IdempotencyRecord(collection, record_id)
+    try:
+        yield record
+    finally:
+        if not record.saved:
+            await collection.delete_one({"_id": record_id})
@@ -0,0 +1,48 @@
+from fastapi import HTTPException, Request, status
+from cachetools import TTLCache
+from typing import Hashable, Optional
+import math
+import time
+
+class RateLimiter:
+    """In-process token bucket per key.
+
+    Each key may spend `limit` requests in a burst and regains them evenly over
+    `period` seconds. Buckets idle for a full period are full again, so they
+    are simply allowed to expire from the cache.
+    """
+
+    def __init__(self, limit: int, period: float = 60.0, maxsize: int = 100000):
+        self.limit = limit
+        self.rate = limit / period
+        self._buckets: TTLCache = TTLCache(maxsize=maxsize, ttl=period)
+
+    def hit(self, key: Hashable) -> Optional[float]:
+        """Spend one token for key; returns seconds to wait if none are left"""
+        now = time.monotonic()
+        tokens, last = self._buckets.get(key, (self.limit, now))
+        tokens = min(self.limit, tokens + (now - last) * self.rate)
+
+        if tokens < 1:
+            self._buckets[key] = (tokens, now)
+            return (1 - tokens) / self.rate
+
+        self._buckets[key] = (tokens - 1, now)
+        return None
+
+    def check(self, key: Hashable) -> None:
+        """Like hit, but raises 429 with Retry-After when the key is over its limit"""
+        retry_after = self.hit(key)
+        if retry_after is not None:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many attempts. Please wait a moment and try again.",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+
+def client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+# Checked before any DB lookup or bcrypt work in the auth endpoints
+login_rate_limiter = RateLimiter(limit=10)
+register_rate_limiter = RateLimiter(limit=10)
@@ -0,0 +1,47 @@
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+from bson import ObjectId
+from typing import Any
+import orjson
+
+def _orjson_default(obj: Any) -> Any:
+    """Encode the types orjson doesn't know natively"""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+def encode_json(content: Any) -> bytes:
+    """orjson-encode plain data that may contain models, ObjectIds and datetimes"""
+    return orjson.dumps(content, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS)
+
+class FastJSONResponse(JSONResponse):
+    """
+    orjson-encoded response for endpoints that build plain dicts
+
+    Return an instance directly from routes without a response_model: FastAPI
+    then skips jsonable_encoder, which is most of the cost for large payloads.
+    Routes with a response_model are already serialized by Pydantic and should
+    keep the default response class.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return encode_json(content)
+
+
+def model_response(model: BaseModel, status_code: int = 200, **dump_options: Any) -> Response:
+    """
+    JSON response dumped straight from an already-valid model
+
+    For hot routes whose model is built from trusted data (e.g. with
+    construct_from): the route still declares its response_model for the docs,
+    but returning this skips FastAPI's validation of the result.
+    """
+    return Response(
+        content=model.model_dump_json(**dump_options),
+        status_code=status_code,
+        media_type="application/json"
+    )
@@ -4,13 +4,14 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from pydantic import ValidationError
 from app.core.config import settings
+import uuid
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 ALGORITHM = "HS256"
 
 def create_access_token(
-    subject: Union[str, Any], expires_delta: timedelta = None
+    subject: Union[str, Any], expires_delta: timedelta = None, user_id: Optional[str] = None
 ) -> str:
     if expires_delta:
         expire = datetime.now(timezone.utc) + expires_delta
@@ -18,7 +19,11 @@ def create_access_token(
         expire = datetime.now(timezone.utc) + timedelta(
             minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
         )
-    to_encode = {"exp": expire, "sub": str(subject)}
+    # jti identifies the token so logout can revoke it
+    to_encode = {"exp": expire, "sub": str(subject), "jti": uuid.uuid4().hex}
+    # uid lets claims-only routes identify the user without loading it
+    if user_id:
+        to_encode["uid"] = str(user_id)
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
@@ -42,6 +47,13 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 def verify_token(token: str) -> Optional[str]:
+    payload = decode_access_token(token)
+    if payload is None:
+        return None
+    return payload["sub"]
+
+def decode_access_token(token: str) -> Optional[dict]:
+    """Verify an access token and return its claims (guaranteed to carry 'sub')"""
     import logging
     logger = logging.getLogger(__name__)
 
@@ -53,16 +65,16 @@ def verify_token(token: str) -> Optional[str]:
         if token_data is None:
             logger.warning("⚠️ Token decoded but 'sub' field is missing")
             return None
-        logger.info(f"✅ Token verified successfully for: {token_data}")
-        return token_data
+        logger.debug("✅ Token verified successfully")
+        return payload
     except jwt.ExpiredSignatureError:
         logger.warning("⏰ Token has expired")
         return None
     except jwt.JWTError as e:
-        logger.error(f"🔐 JWT decode error: {str(e)}")
+        logger.error("🔐 JWT decode error: %s", e)
         return None
     except ValidationError as e:
-        logger.error(f"❌ Validation error: {str(e)}")
+        logger.error("❌ Validation error: %s", e)
         return None
 
 def verify_refresh_token(token: str) -> Optional[str]:
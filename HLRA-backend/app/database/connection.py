@@ -14,6 +14,9 @@ async def get_database():
 
 async def connect_to_mongo():
       """Create database connection"""
+      if database.client is not None:
+          # One client (and connection pool) per process
+          return
       try:
           database.client = AsyncIOMotorClient(settings.mongodb_url)
           # Test the connection
@@ -23,10 +26,53 @@ async def connect_to_mongo():
           logger.error(f"Failed to connect to MongoDB: {e}")
           raise
 
+async def ensure_indexes():
+      """Create the indexes the services rely on (no-op when they already exist)
+
+      Each index is created on its own so one failure doesn't skip the rest.
+      The unique users.email index is the exception: registration relies on it
+      to reject duplicate accounts, so startup fails without it.
+      """
+      db = await get_database()
+      # Lets registration insert directly and rely on the duplicate-key error
+      await db.users.create_index("email", unique=True)
+
+      reports = await get_reports_collection()
+      family_profiles = await get_family_profiles_collection()
+      indexes = [
+          # Revoked tokens only matter until they would have expired anyway
+          (db.revoked_tokens, "expires_at", {"expireAfterSeconds": 0}),
+          # Serves the paginated, newest-first report listing
+          (reports, [("user_id", 1), ("upload_date", -1), ("_id", -1)], {}),
+          # Same listing filtered by profile, which is how the app usually asks for it
+          (reports, [("user_id", 1), ("profile_id", 1), ("upload_date", -1), ("_id", -1)], {}),
+          # Serve the newest-first starred listing, with and without a profile filter
+          (reports, [("user_id", 1), ("is_starred", 1), ("upload_date", -1)], {}),
+          (reports, [("user_id", 1), ("profile_id", 1), ("is_starred", 1), ("upload_date", -1)], {}),
+          # Serves the unread count and the critical-unread check on the notification list
+          (db.notifications, [("user_id", 1), ("is_read", 1), ("priority", 1)], {}),
+          # Serve the owner's share list and share revocation
+          (db.shared_links, [("user_id", 1), ("report_id", 1)], {}),
+          (db.shared_links, [("user_id", 1), ("id", 1)], {}),
+          # Idempotency keys are only honoured for a day
+          (db.idempotency_keys, "expires_at", {"expireAfterSeconds": 0}),
+          # At most one active self profile per user, whatever races save_self_profile
+          (family_profiles, [("user_id", 1), ("relationship", 1)], {
+              "unique": True,
+              "partialFilterExpression": {"relationship": "self", "is_active": True}
+          }),
+      ]
+      for collection, keys, options in indexes:
+          try:
+              await collection.create_index(keys, **options)
+          except Exception as e:
+              logger.error("Failed to create MongoDB index %s on %s: %s", keys, collection.name, e)
+
 async def close_mongo_connection():
       """Close database connection"""
       if database.client:
           database.client.close()
+          database.client = None
           logger.info("Disconnected from MongoDB")
 
   # Database collections
@@ -1,12 +1,19 @@
 from fastapi import FastAPI, Request
+from fastapi.exception_handlers import request_validation_exception_handler
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 import os
 import logging
 from app.core.config import settings
+from app.core.idempotency import IdempotentReplay
 from app.api.v1.api import api_router
 from app.api.v1.endpoints import upload, extraction, reports, stats, trends
-from app.database.connection import connect_to_mongo, close_mongo_connection
+from app.database.connection import connect_to_mongo, close_mongo_connection, ensure_indexes, get_database
+from app.models.user import USER_INPUT_ERROR
+from app.services.ai_chat_service import ai_chat_service
+from app.services.processing_service import processing_service
 
 
   # Setup logging
@@ -17,10 +24,10 @@ logger = logging.getLogger(__name__)
 os.makedirs(settings.upload_dir, exist_ok=True)
 
   # Log configuration info
-logger.info(f"🌐 CORS Origins: {settings.allowed_origins}")
-logger.info(f"🔗 Public App URL for shared links: {settings.effective_public_app_url}")
-logger.info(f"📁 Upload directory: {settings.upload_dir}")
-logger.info(f"🔑 JWT expires in: {settings.ACCESS_TOKEN_EXPIRE_MINUTES} minutes")
+logger.info("🌐 CORS Origins: %s", settings.allowed_origins)
+logger.info("🔗 Public App URL for shared links: %s", settings.effective_public_app_url)
+logger.info("📁 Upload directory: %s", settings.upload_dir)
+logger.info("🔑 JWT expires in: %s minutes", settings.ACCESS_TOKEN_EXPIRE_MINUTES)
 
 app = FastAPI(
       title="Health API",
@@ -31,11 +38,49 @@ app = FastAPI(
   # Middleware to log incoming requests
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
-      logger.info(f"Incoming request: {request.method} {request.url}")
+      logger.info("Incoming request: %s %s", request.method, request.url)
       response = await call_next(request)
-      logger.info(f"Response status: {response.status_code}")
+      logger.info("Response status: %s", response.status_code)
       return response
 
+  # Replays of an answered Idempotency-Key get the stored response back
+@app.exception_handler(IdempotentReplay)
+async def idempotent_replay_handler(request: Request, exc: IdempotentReplay):
+      return Response(
+          content=exc.body,
+          status_code=exc.status_code,
+          media_type="application/json",
+          headers={"Idempotent-Replayed": "true"}
+      )
+
+  # Failed account checks (name, password strength) keep their old shape: a 400
+  # whose detail is the message itself. Other validation errors stay 422.
+@app.exception_handler(RequestValidationError)
+async def validation_exception_handler(request: Request, exc: RequestValidationError):
+      messages = [error["msg"] for error in exc.errors() if error["type"] == USER_INPUT_ERROR]
+      if messages:
+          return JSONResponse(status_code=400, content={"detail": " ".join(messages)})
+      return await request_validation_exception_handler(request, exc)
+
+  # Anything the endpoints don't handle themselves ends up here. This handler runs
+  # outside CORSMiddleware, so allowed origins get their CORS headers added here.
+@app.exception_handler(Exception)
+async def unhandled_exception_handler(request: Request, exc: Exception):
+      logger.exception("Unhandled error on %s %s", request.method, request.url.path)
+      headers = {}
+      origin = request.headers.get("origin")
+      if origin in settings.allowed_origins:
+          headers = {
+              "Access-Control-Allow-Origin": origin,
+              "Access-Control-Allow-Credentials": "true",
+              "Vary": "Origin"
+          }
+      return JSONResponse(
+          status_code=500,
+          content={"detail": "An unexpected error occurred. Please try again or contact support if the problem persists."},
+          headers=headers
+      )
+
   # CORS middleware
 app.add_middleware(
       CORSMiddleware,
@@ -43,6 +88,7 @@ app.add_middleware(
       allow_credentials=True,
       allow_methods=["*"],
       allow_headers=["*"],
+      expose_headers=["X-Next-Cursor"],
   )
 
   # Static files for uploads
@@ -67,9 +113,16 @@ async def health_check():
 async def startup_event():
       await connect_to_mongo()
       logger.info("MongoDB connected")
+      await ensure_indexes()
+      # Hot collection handles, resolved once instead of on every request
+      db = await get_database()
+      app.state.shared_links = db.shared_links
+      processing_service.start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
+      await ai_chat_service.close()
+      await processing_service.shutdown()
       await close_mongo_connection()
       logger.info("MongoDB disconnected")
 
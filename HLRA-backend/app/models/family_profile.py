@@ -2,8 +2,8 @@
 from datetime import datetime, date
 from enum import Enum
 from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, Field, validator
-import uuid
+from pydantic import BaseModel, ConfigDict, Field, validator
+from app.utils.helpers import new_id
 
 # Keep some system relationship types for internal logic
 class SystemRelationshipType(str, Enum):
@@ -58,8 +58,31 @@ class ProfilePermissions(BaseModel):
     can_delete_reports: bool = False
     can_invite_users: bool = False
 
+    # Shared between profiles (see below), so never modified in place
+    model_config = ConfigDict(frozen=True)
+
+# The only two permission sets profiles get, built once instead of per profile
+SELF_PERMISSIONS = ProfilePermissions(
+    can_view_reports=True,
+    can_upload_reports=True,
+    can_share_reports=True,
+    can_export_data=True,
+    can_manage_settings=True,
+    can_delete_reports=True,
+    can_invite_users=True
+)
+FAMILY_PERMISSIONS = ProfilePermissions(
+    can_view_reports=True,
+    can_upload_reports=True,
+    can_share_reports=False,
+    can_export_data=False,
+    can_manage_settings=False,
+    can_delete_reports=False,
+    can_invite_users=False
+)
+
 class FamilyProfile(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=new_id)
     user_id: str  # Owner of this family profile
     name: str  # User-defined profile name (e.g., "Mom", "John", "My Son", "Grandpa Joe")
     relationship: SystemRelationshipType  # Only "self" or "family"
@@ -100,26 +123,9 @@ class FamilyProfile(BaseModel):
         """Set default permissions based on relationship"""
         if values.get('relationship') == SystemRelationshipType.SELF:
             # Full permissions for self
-            return ProfilePermissions(
-                can_view_reports=True,
-                can_upload_reports=True,
-                can_share_reports=True,
-                can_export_data=True,
-                can_manage_settings=True,
-                can_delete_reports=True,
-                can_invite_users=True
-            )
-        else:
-            # Default permissions for family members
-            return ProfilePermissions(
-                can_view_reports=True,
-                can_upload_reports=True,
-                can_share_reports=False,
-                can_export_data=False,
-                can_manage_settings=False,
-                can_delete_reports=False,
-                can_invite_users=False
-            )
+            return SELF_PERMISSIONS
+        # Default permissions for family members
+        return FAMILY_PERMISSIONS
 
 class FamilyProfileCreate(BaseModel):
     name: str = Field(..., min_length=1, max_length=100, description="Profile name (e.g., 'Mom', 'John', 'My Daughter')")
@@ -170,8 +176,7 @@ class FamilyProfileResponse(BaseModel):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 class FamilyProfileListResponse(BaseModel):
     profiles: List[FamilyProfileResponse]
@@ -2,8 +2,8 @@
 from datetime import datetime
 from enum import Enum
 from typing import List, Optional, Union
-from pydantic import BaseModel, validator
-import uuid
+from pydantic import BaseModel, ConfigDict, Field, validator
+from app.utils.helpers import new_id
 from app.utils.date_utils import to_utc_datetime, serialize_datetime
 
 class FileStatus(str, Enum):
@@ -28,7 +28,12 @@ class ParameterCategory(str, Enum):
       VITAMIN = "vitamin"
 
 class HealthParameter(BaseModel):
-      id: str = None
+      # Parsed parameters are shared (reports, worker results) and never edited in place
+      model_config = ConfigDict(frozen=True)
+
+      # A default factory rather than a custom __init__: with __init__ overridden,
+      # pydantic-core calls back into Python for every nested parameter of a report
+      id: str = Field(default_factory=new_id)
       name: str
       value: Union[float, str]
       unit: Optional[str] = None
@@ -37,13 +42,26 @@ class HealthParameter(BaseModel):
       category: Optional[ParameterCategory] = None
       extracted_text: Optional[str] = None
 
-      def __init__(self, **data):
-          if 'id' not in data or data['id'] is None:
-              data['id'] = str(uuid.uuid4())
-          super().__init__(**data)
+      @classmethod
+      def from_document(cls, document: dict) -> "HealthParameter":
+          """
+          Rebuild a stored parameter without validating it again
+
+          Parameters are validated before they are saved, so reads only restore
+          what storage flattens: the enums, and whole-number values saved as ints.
+          """
+          value = document.get("value")
+          category = document.get("category")
+          return cls.model_construct(**{
+              **document,
+              "id": document.get("id") or new_id(),
+              "value": float(value) if isinstance(value, int) else value,
+              "status": ParameterStatus(document["status"]),
+              "category": ParameterCategory(category) if category else None
+          })
 
 class LabReport(BaseModel):
-      id: str = None
+      id: str = Field(default_factory=new_id)
       user_id: str  # Owner of the report
       profile_id: Optional[str] = None  # Family profile associated with this report
       filename: str
@@ -58,12 +76,10 @@ class LabReport(BaseModel):
       file_type: str
       is_starred: bool = False
 
-      def __init__(self, **data):
-          if 'id' not in data or data['id'] is None:
-              data['id'] = str(uuid.uuid4())
-          super().__init__(**data)
-
 class TrendDataPoint(BaseModel):
+      # Points are served from the per-user trend cache, so they must not change
+      model_config = ConfigDict(frozen=True)
+
       date: datetime
       value: Union[float, str]
       status: ParameterStatus
@@ -71,4 +87,12 @@ class TrendDataPoint(BaseModel):
 class TrendData(BaseModel):
       parameter_name: str
       data_points: List[TrendDataPoint]
-      trend_direction: Optional[str] = None  # "improving", "declining", "stable"
\ No newline at end of file
+      trend_direction: Optional[str] = None  # "improving", "declining", "stable"
+
+class TrendDataResponse(BaseModel):
+      parameter_name: str
+      date_range: Optional[str] = None
+      chart_data: List[TrendDataPoint] = []
+      trend_direction: Optional[str] = None
+      success: bool
+      error: Optional[str] = None
\ No newline at end of file
@@ -2,8 +2,8 @@
 from datetime import datetime
 from enum import Enum
 from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, Field
-import uuid
+from pydantic import BaseModel, ConfigDict, Field
+from app.utils.helpers import new_id
 
 class NotificationType(str, Enum):
     SYSTEM = "system"
@@ -23,7 +23,7 @@ class NotificationPriority(str, Enum):
     CRITICAL = "critical"
 
 class Notification(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=new_id)
     user_id: str  # Recipient user
     profile_id: Optional[str] = None  # Associated profile if applicable
     type: NotificationType
@@ -51,6 +51,15 @@ class Notification(BaseModel):
     # Actions (optional buttons/links)
     actions: List[Dict[str, str]] = []  # [{"label": "View Report", "url": "/reports/123"}]
 
+    @classmethod
+    def from_document(cls, document: Dict[str, Any]) -> "Notification":
+        """Rebuild a stored notification without validating it again (it was on creation)"""
+        return cls.model_construct(**{
+            **document,
+            "type": NotificationType(document["type"]),
+            "priority": NotificationPriority(document.get("priority", NotificationPriority.NORMAL))
+        })
+
 class NotificationCreate(BaseModel):
     user_id: str
     profile_id: Optional[str] = None
@@ -70,6 +79,9 @@ class NotificationUpdate(BaseModel):
     read_at: Optional[datetime] = None
     dismissed_at: Optional[datetime] = None
 
+class NotificationBulkReadRequest(BaseModel):
+    ids: List[str] = Field(..., min_length=1, max_length=500)
+
 class NotificationResponse(BaseModel):
     id: str
     type: NotificationType
@@ -86,8 +98,7 @@ class NotificationResponse(BaseModel):
     persist: bool
     actions: List[Dict[str, str]]
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 class NotificationListResponse(BaseModel):
     notifications: List[NotificationResponse]
@@ -1,10 +1,45 @@
 from datetime import datetime
 from typing import Optional
-from pydantic import BaseModel, EmailStr, Field
-import uuid
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, field_validator
+from pydantic_core import PydanticCustomError
+from app.utils.helpers import new_id
+
+# Error type of the account checks below; main.py answers these with a plain 400
+USER_INPUT_ERROR = "user_input"
+
+_HAS_UPPER = 1
+_HAS_LOWER = 2
+_HAS_DIGIT = 4
+
+def password_strength_error(password: str) -> Optional[str]:
+    """Return why a password is too weak, or None if it is acceptable"""
+    if len(password) < 8:
+        return "Password must be at least 8 characters long for security."
+
+    # BCrypt has a 72-byte limit, check password length in bytes
+    if len(password.encode('utf-8')) > 72:
+        return "Password is too long. Please use a password with fewer characters."
+
+    # Single pass over the password collecting character classes
+    flags = 0
+    for c in password:
+        if 'A' <= c <= 'Z':
+            flags |= _HAS_UPPER
+        elif 'a' <= c <= 'z':
+            flags |= _HAS_LOWER
+        elif '0' <= c <= '9':
+            flags |= _HAS_DIGIT
+
+    if not flags & _HAS_UPPER:
+        return "Password must contain at least one uppercase letter."
+    if not flags & _HAS_LOWER:
+        return "Password must contain at least one lowercase letter."
+    if not flags & _HAS_DIGIT:
+        return "Password must contain at least one number."
+    return None
 
 class User(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=new_id)
     email: EmailStr
     full_name: str
     hashed_password: str
@@ -27,6 +62,21 @@ class UserCreate(BaseModel):
     email: EmailStr
     full_name: str
     password: str = Field(..., min_length=6, description="Password must be at least 6 characters")
+
+    @field_validator('full_name')
+    @classmethod
+    def validate_full_name(cls, v: str) -> str:
+        if len(v.strip()) < 2:
+            raise PydanticCustomError(USER_INPUT_ERROR, "Please provide your full name (at least 2 characters).")
+        return v
+
+    @field_validator('password')
+    @classmethod
+    def validate_password_strength(cls, v: str) -> str:
+        error = password_strength_error(v)
+        if error:
+            raise PydanticCustomError(USER_INPUT_ERROR, error)
+        return v
     
 class UserUpdate(BaseModel):
     email: Optional[EmailStr] = None
@@ -48,8 +98,7 @@ class UserResponse(BaseModel):
     created_at: datetime
     last_login: Optional[datetime] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 class UserLogin(BaseModel):
     email: EmailStr
@@ -64,5 +113,10 @@ class Token(BaseModel):
 class TokenData(BaseModel):
     email: Optional[str] = None
 
+class TokenClaims(BaseModel):
+    """Identity carried by a verified access token, without the stored user"""
+    id: str
+    email: str
+
 class RefreshTokenRequest(BaseModel):
     refresh_token: str
\ No newline at end of file
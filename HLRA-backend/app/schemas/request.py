@@ -9,6 +9,9 @@ class UpdateReportRequest(BaseModel):
       status: Optional[str] = Field(None, pattern="^(pending|processing|completed|failed)$")
       notes: Optional[str] = None
 
+# Parameters that can be trended, checked on every trend request
+TREND_PARAMETERS = frozenset({'glucose', 'cholesterol', 'hemoglobin', 'blood_pressure'})
+
 class TrendDataRequest(BaseModel):
       parameter_name: str = Field(..., min_length=1)
       start_date: Optional[datetime] = None
@@ -17,10 +20,11 @@ class TrendDataRequest(BaseModel):
 
       @validator('parameter_name')
       def validate_parameter_name(cls, v):
-          allowed_params = ['glucose', 'cholesterol', 'hemoglobin', 'blood_pressure']
-          if v.lower() not in allowed_params:
-              raise ValueError(f'Parameter must be one of: {allowed_params}')
-          return v
+          # Normalised here so callers don't lower-case it again
+          name = v.lower()
+          if name not in TREND_PARAMETERS:
+              raise ValueError(f'Parameter must be one of: {sorted(TREND_PARAMETERS)}')
+          return name
 
 class TrendExportRequest(BaseModel):
       parameters: List[str] = Field(..., min_items=1)
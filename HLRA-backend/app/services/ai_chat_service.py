@@ -4,8 +4,14 @@ Provides health-related chat functionality with context from user's health data
 Uses REST API approach (same as AMS-Backend)
 """
 
+import asyncio
+import hashlib
+import json
+import re
 import aiohttp
-from typing import Dict, List, Optional, Any
+from cachetools import TTLCache
+from urllib.parse import quote
+from typing import AsyncIterator, Dict, List, Optional, Any, Tuple
 from app.core.config import settings
 from app.database.connection import get_database
 from datetime import datetime
@@ -13,6 +19,27 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on concurrent Gemini calls; bursts beyond this wait their turn
+# instead of all hitting the provider's rate limit at once
+MAX_CONCURRENT_GEMINI_REQUESTS = 8
+
+# Connection pool to the Gemini endpoint. Every call holds a request slot, so
+# more connections than slots would never be used; idle connections and DNS
+# answers are kept for a minute or more so bursty chat traffic reuses them
+# instead of paying for a new TLS handshake per question.
+GEMINI_KEEPALIVE_SECONDS = 75
+GEMINI_DNS_CACHE_SECONDS = 300
+GEMINI_REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=30)
+GEMINI_STREAM_TIMEOUT = aiohttp.ClientTimeout(total=60)
+
+# Conversations fetched per round-trip when streaming chat history
+HISTORY_BATCH_SIZE = 50
+
+# Answers are reused when the same user asks the same question (ignoring case,
+# spacing and trailing punctuation) against unchanged health data and history
+RESPONSE_CACHE_TTL_SECONDS = 3600
+_QUESTION_NOISE = re.compile(r"[\s?!.]+")
+
 
 class AIChatService:
     """Service for AI-powered health chat"""
@@ -23,6 +50,27 @@ class AIChatService:
         # Fallback to gemini-2.0-flash-exp, gemini-1.5-flash, or gemini-pro if not available
         self.model_name = "gemini-2.5-flash"
         self.base_url = f"https://generativelanguage.googleapis.com/v1beta/models/{self.model_name}:generateContent"
+        # Primary model first, then fallbacks; request URLs are fixed for the
+        # process lifetime, so build them once here instead of per request
+        self.models_to_try = [
+            self.model_name,  # gemini-2.5-flash
+            "gemini-2.0-flash-exp",  # Experimental 2.0
+            "gemini-1.5-flash",  # Stable 1.5
+            "gemini-pro"  # Original
+        ]
+        self.model_urls = {
+            model: f"https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent?key={quote(self.api_key)}"
+            for model in self.models_to_try
+        }
+        self.stream_urls = {
+            model: f"https://generativelanguage.googleapis.com/v1beta/models/{model}:streamGenerateContent?alt=sse&key={quote(self.api_key)}"
+            for model in self.models_to_try
+        }
+        # Shared session so keep-alive connections (and their TLS handshakes)
+        # are reused across chat requests; created lazily inside the event loop
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._request_slots = asyncio.Semaphore(MAX_CONCURRENT_GEMINI_REQUESTS)
+        self._response_cache: TTLCache = TTLCache(maxsize=1000, ttl=RESPONSE_CACHE_TTL_SECONDS)
         
         if not self.api_key:
             logger.warning("Gemini API key not configured")
@@ -97,59 +145,56 @@ class AIChatService:
             logger.error(f"Error fetching family profiles: {str(e)}")
             return ""
 
-    async def _is_available(self) -> bool:
-        """Check if Gemini API is available"""
-        if not self.api_key or self.api_key == "":
-            return False
-        
-        # Try to check availability with the primary model
-        try:
-            async with aiohttp.ClientSession() as session:
-                test_url = f"{self.base_url}?key={self.api_key}"
-                async with session.post(
-                    test_url,
-                    json={"contents": [{"parts": [{"text": "Hello"}]}]},
-                    timeout=aiohttp.ClientTimeout(total=10)
-                ) as response:
-                    return response.status == 200
-        except Exception as e:
-            logger.warning(f"Gemini API not available with {self.model_name}: {e}")
-            return False
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Return the pooled HTTP session, creating it on first use"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=MAX_CONCURRENT_GEMINI_REQUESTS,
+                    keepalive_timeout=GEMINI_KEEPALIVE_SECONDS,
+                    ttl_dns_cache=GEMINI_DNS_CACHE_SECONDS
+                )
+            )
+        return self._session
+
+    async def close(self):
+        """Close the pooled HTTP session (called on app shutdown)"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    @staticmethod
+    def _generation_payload(prompt: str) -> Dict[str, Any]:
+        return {
+            "contents": [{
+                "parts": [{"text": prompt}]
+            }],
+            "generationConfig": {
+                "temperature": 0.7,
+                "topK": 40,
+                "topP": 0.95,
+                "maxOutputTokens": 2048
+            }
+        }
 
     async def _make_request(self, prompt: str) -> Optional[str]:
         """Make request to Gemini API using REST endpoint with fallback to gemini-1.5-flash"""
-        if not await self._is_available():
+        if not self.api_key:
             return None
         
-        # Try primary model first, then fallback models
-        models_to_try = [
-            self.model_name,  # gemini-2.5-flash
-            "gemini-2.0-flash-exp",  # Experimental 2.0
-            "gemini-1.5-flash",  # Stable 1.5
-            "gemini-pro"  # Original
-        ]
+        async with self._request_slots:
+            # Try primary model first, then fallback models
+            models_to_try = self.models_to_try
         
-        for model in models_to_try:
-            try:
-                base_url = f"https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent"
-                async with aiohttp.ClientSession() as session:
-                    url = f"{base_url}?key={self.api_key}"
-                    payload = {
-                        "contents": [{
-                            "parts": [{"text": prompt}]
-                        }],
-                        "generationConfig": {
-                            "temperature": 0.7,
-                            "topK": 40,
-                            "topP": 0.95,
-                            "maxOutputTokens": 2048
-                        }
-                    }
-                    
+            for model in models_to_try:
+                try:
+                    session = self._get_session()
+                    url = self.model_urls[model]
+                
                     async with session.post(
                         url,
-                        json=payload,
-                        timeout=aiohttp.ClientTimeout(total=30)
+                        json=self._generation_payload(prompt),
+                        timeout=GEMINI_REQUEST_TIMEOUT
                     ) as response:
                         if response.status == 200:
                             result = await response.json()
@@ -164,14 +209,14 @@ class AIChatService:
                             else:
                                 logger.warning(f"Model {model} failed, trying next...")
                                 continue
-            except Exception as e:
-                if model == models_to_try[-1]:  # Last model, log error
-                    logger.error(f"Error calling Gemini API with {model}: {e}", exc_info=True)
-                else:
-                    logger.warning(f"Error with model {model}, trying next: {e}")
-                    continue
+                except Exception as e:
+                    if model == models_to_try[-1]:  # Last model, log error
+                        logger.error(f"Error calling Gemini API with {model}: {e}", exc_info=True)
+                    else:
+                        logger.warning(f"Error with model {model}, trying next: {e}")
+                        continue
         
-        return None
+            return None
 
     def create_system_prompt(self, health_context: str, family_context: str) -> str:
         """
@@ -207,6 +252,114 @@ When answering questions:
 """
         return system_prompt
 
+    async def _build_prompt(
+        self,
+        user_id: str,
+        message: str,
+        conversation_history: Optional[List[Dict[str, str]]] = None
+    ) -> Tuple[str, bool]:
+        """Build the prompt up to the user's question; also reports whether health data was included"""
+        # Get user's health and family context (independent queries, run together)
+        health_context, family_context = await asyncio.gather(
+            self.get_user_health_context(user_id),
+            self.get_family_profiles_context(user_id)
+        )
+
+        # Create system prompt
+        system_prompt = self.create_system_prompt(health_context, family_context)
+
+        # Build conversation history context
+        history_context = ""
+        if conversation_history:
+            recent_messages = conversation_history[-5:]  # Last 5 messages
+            history_parts = []
+            for msg in recent_messages:
+                role = msg.get("role", "user")
+                content = msg.get("content", "")
+                if content.strip():
+                    history_parts.append(f"{role.capitalize()}: {content}")
+            if history_parts:
+                history_context = "\n\nPrevious conversation:\n" + "\n".join(history_parts)
+
+        has_health_context = bool(health_context and "No health reports" not in health_context)
+        return f"{system_prompt}{history_context}", has_health_context
+
+    @staticmethod
+    def _full_prompt(context_prompt: str, message: str) -> str:
+        return f"{context_prompt}\n\nUser Question: {message}"
+
+    @staticmethod
+    def _response_cache_key(user_id: str, context_prompt: str, message: str) -> Tuple[str, bytes, str]:
+        question = _QUESTION_NOISE.sub(" ", message.lower()).strip()
+        return user_id, hashlib.sha256(context_prompt.encode()).digest(), question
+
+    async def chat_stream(
+        self,
+        user_id: str,
+        message: str,
+        conversation_history: Optional[List[Dict[str, str]]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Like chat, but yields the response text as Gemini generates it
+
+        Falls back through models_to_try until one accepts the request; once
+        text has been streamed there is no further fallback. The complete
+        answer is stored in the history when the stream ends.
+        """
+        if not self.api_key:
+            raise Exception("Gemini API key not configured")
+
+        context_prompt, _ = await self._build_prompt(user_id, message, conversation_history)
+        cache_key = self._response_cache_key(user_id, context_prompt, message)
+        cached = self._response_cache.get(cache_key)
+        if cached is not None:
+            await self._store_conversation(user_id=user_id, user_message=message, ai_response=cached)
+            yield cached
+            return
+
+        payload = self._generation_payload(self._full_prompt(context_prompt, message))
+        session = self._get_session()
+
+        async with self._request_slots:
+            for model in self.models_to_try:
+                async with session.post(
+                    self.stream_urls[model],
+                    json=payload,
+                    timeout=GEMINI_STREAM_TIMEOUT
+                ) as response:
+                    if response.status != 200:
+                        error_text = await response.text()
+                        logger.warning(f"Streaming with {model} failed: {response.status} - {error_text}")
+                        continue
+
+                    if model != self.model_name:
+                        logger.info(f"Using fallback model: {model}")
+
+                    parts = []
+                    # Gemini sends one JSON chunk per SSE "data:" line
+                    async for line in response.content:
+                        if not line.startswith(b"data:"):
+                            continue
+                        chunk = json.loads(line[5:])
+                        for candidate in chunk.get("candidates", [])[:1]:
+                            for part in candidate.get("content", {}).get("parts", []):
+                                text = part.get("text")
+                                if text:
+                                    parts.append(text)
+                                    yield text
+
+                    answer = "".join(parts).strip()
+                    if answer:
+                        self._response_cache[cache_key] = answer
+                    await self._store_conversation(
+                        user_id=user_id,
+                        user_message=message,
+                        ai_response=answer
+                    )
+                    return
+
+        raise Exception("Failed to get response from Gemini API")
+
     async def chat(
         self,
         user_id: str,
@@ -228,34 +381,20 @@ When answering questions:
             if not self.api_key:
                 raise Exception("Gemini API key not configured")
 
-            # Get user's health context
-            health_context = await self.get_user_health_context(user_id)
-            family_context = await self.get_family_profiles_context(user_id)
-
-            # Create system prompt
-            system_prompt = self.create_system_prompt(health_context, family_context)
-
-            # Build conversation history context
-            history_context = ""
-            if conversation_history:
-                recent_messages = conversation_history[-5:]  # Last 5 messages
-                history_parts = []
-                for msg in recent_messages:
-                    role = msg.get("role", "user")
-                    content = msg.get("content", "")
-                    if content.strip():
-                        history_parts.append(f"{role.capitalize()}: {content}")
-                if history_parts:
-                    history_context = "\n\nPrevious conversation:\n" + "\n".join(history_parts)
+            context_prompt, has_health_context = await self._build_prompt(
+                user_id, message, conversation_history
+            )
 
-            # Prepare the full prompt with system context and history
-            full_prompt = f"{system_prompt}{history_context}\n\nUser Question: {message}"
+            cache_key = self._response_cache_key(user_id, context_prompt, message)
+            response_text = self._response_cache.get(cache_key)
+            if response_text is None:
+                # Get AI response using REST API
+                response_text = await self._make_request(self._full_prompt(context_prompt, message))
 
-            # Get AI response using REST API
-            response_text = await self._make_request(full_prompt)
+                if not response_text:
+                    raise Exception("Failed to get response from Gemini API")
 
-            if not response_text:
-                raise Exception("Failed to get response from Gemini API")
+                self._response_cache[cache_key] = response_text
 
             # Store conversation in database for history
             await self._store_conversation(
@@ -268,7 +407,7 @@ When answering questions:
                 "success": True,
                 "response": response_text.strip(),
                 "timestamp": datetime.utcnow().isoformat(),
-                "has_health_context": bool(health_context and "No health reports" not in health_context)
+                "has_health_context": has_health_context
             }
 
         except Exception as e:
@@ -342,11 +481,7 @@ When answering questions:
             all_messages = []
             for conv in reversed(conversations):  # Reverse to get chronological order
                 for msg in conv.get("messages", []):
-                    all_messages.append({
-                        "role": msg.get("role"),
-                        "content": msg.get("content"),
-                        "timestamp": msg.get("timestamp").isoformat() if msg.get("timestamp") else None
-                    })
+                    all_messages.append(self._history_message(msg))
 
             return all_messages
 
@@ -354,12 +489,61 @@ When answering questions:
             logger.error(f"Error fetching conversation history: {str(e)}")
             return []
 
+    async def stream_conversation_history(
+        self,
+        user_id: str,
+        limit: int = 50
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Same messages as get_conversation_history, yielded one at a time
+
+        Conversations are read oldest-first in cursor batches, so memory stays
+        bounded by the batch size rather than by the history length.
+        """
+        try:
+            db = await get_database()
+            chat_history_collection = db.chat_history
+
+            # Oldest of the newest `limit` conversations; everything from it on is read
+            boundary = await chat_history_collection.find(
+                {"user_id": user_id}, {"created_at": 1}
+            ).sort("created_at", -1).skip(limit - 1).limit(1).to_list(length=1)
+
+            query = {"user_id": user_id}
+            if boundary:
+                query["created_at"] = {"$gte": boundary[0]["created_at"]}
+
+            cursor = chat_history_collection.find(
+                query, {"messages": 1}
+            ).sort("created_at", 1).batch_size(HISTORY_BATCH_SIZE)
+
+            async for conv in cursor:
+                for msg in conv.get("messages", []):
+                    yield self._history_message(msg)
+
+        except Exception as e:
+            logger.error(f"Error streaming conversation history: {str(e)}")
+
+    @staticmethod
+    def _history_message(msg: Dict[str, Any]) -> Dict[str, Any]:
+        """Stored chat message as returned to the client"""
+        return {
+            "role": msg.get("role"),
+            "content": msg.get("content"),
+            "timestamp": msg.get("timestamp").isoformat() if msg.get("timestamp") else None
+        }
+
     async def clear_conversation_history(self, user_id: str) -> bool:
         """Clear conversation history for a user"""
         try:
             db = await get_database()
             chat_history_collection = db.chat_history
             result = await chat_history_collection.delete_many({"user_id": user_id})
+
+            # Forget cached answers along with the history they came from
+            for key in [key for key in self._response_cache if key[0] == user_id]:
+                self._response_cache.pop(key, None)
+
             return result.deleted_count > 0
         except Exception as e:
             logger.error(f"Error clearing conversation history: {str(e)}")
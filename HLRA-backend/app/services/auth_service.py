@@ -2,6 +2,8 @@ from datetime import datetime, timedelta, timezone
 from typing import Optional
 from fastapi import HTTPException, status
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import DuplicateKeyError
+from bson import ObjectId
 from app.core.security import verify_password, get_password_hash, create_access_token, create_refresh_token
 from app.models.user import User, UserCreate, UserInDB, UserLogin, UserUpdate, Token
 from app.core.config import settings
@@ -39,6 +41,26 @@ class AuthService:
                 detail="Failed to create user"
             )
 
+    async def create_user_if_new(self, user_create: UserCreate) -> Optional[UserInDB]:
+        """Insert a new user in one round-trip; returns None if the email is taken.
+
+        Relies on the unique index on users.email instead of a find_one pre-check.
+        """
+        hashed_password = get_password_hash(user_create.password)
+        user_data = User(
+            email=user_create.email,
+            full_name=user_create.full_name,
+            hashed_password=hashed_password
+        )
+
+        try:
+            result = await self.collection.insert_one(user_data.dict())
+        except DuplicateKeyError:
+            return None
+
+        user_data.id = str(result.inserted_id)
+        return UserInDB(**user_data.dict())
+
     async def authenticate_user(self, user_login: UserLogin) -> Optional[UserInDB]:
         user = await self.collection.find_one({"email": user_login.email})
         if not user:
@@ -56,6 +78,21 @@ class AuthService:
         user["id"] = str(user["_id"])
         return UserInDB(**user)
 
+    async def verify_login(self, user: UserInDB, password: str) -> Optional[UserInDB]:
+        """Check a password against an already-fetched user and record the login.
+
+        Same as authenticate_user, minus the second lookup by email.
+        """
+        if not verify_password(password, user.hashed_password):
+            return None
+
+        user.last_login = datetime.utcnow()
+        await self.collection.update_one(
+            {"_id": ObjectId(user.id)},
+            {"$set": {"last_login": user.last_login}}
+        )
+        return user
+
     async def get_user_by_email(self, email: str) -> Optional[UserInDB]:
         user = await self.collection.find_one({"email": email})
         if user:
@@ -64,7 +101,6 @@ class AuthService:
         return None
 
     async def get_user_by_id(self, user_id: str) -> Optional[UserInDB]:
-        from bson import ObjectId
         try:
             user = await self.collection.find_one({"_id": ObjectId(user_id)})
             if user:
@@ -79,7 +115,7 @@ class AuthService:
         refresh_token_expires = timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
         
         access_token = create_access_token(
-            subject=user.email, expires_delta=access_token_expires
+            subject=user.email, expires_delta=access_token_expires, user_id=user.id
         )
         refresh_token = create_refresh_token(
             subject=user.email, expires_delta=refresh_token_expires
@@ -112,34 +148,25 @@ class AuthService:
 
     async def update_user(self, user_id: str, user_update: UserUpdate) -> Optional[UserInDB]:
         """Update user profile information"""
-        from bson import ObjectId
+        # Create update data, only including non-None fields
+        update_data = {k: v for k, v in user_update.dict(exclude_unset=True).items() if v is not None}
         
-        try:
-            # Create update data, only including non-None fields
-            update_data = {k: v for k, v in user_update.dict(exclude_unset=True).items() if v is not None}
-            
-            if not update_data:
-                # No fields to update
-                return await self.get_user_by_id(user_id)
-            
-            # Add updated timestamp
-            update_data["updated_at"] = datetime.utcnow()
-            
-            # Update user in database
-            result = await self.collection.update_one(
-                {"_id": ObjectId(user_id)},
-                {"$set": update_data}
-            )
-            
-            if result.modified_count > 0:
-                # Return updated user
-                return await self.get_user_by_id(user_id)
-            else:
-                # User not found or no changes made
-                return None
-                
-        except Exception as e:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Failed to update user: {str(e)}"
-            )
\ No newline at end of file
+        if not update_data:
+            # No fields to update
+            return await self.get_user_by_id(user_id)
+        
+        # Add updated timestamp
+        update_data["updated_at"] = datetime.utcnow()
+        
+        # Update user in database
+        result = await self.collection.update_one(
+            {"_id": ObjectId(user_id)},
+            {"$set": update_data}
+        )
+        
+        if result.modified_count > 0:
+            # Return updated user
+            return await self.get_user_by_id(user_id)
+        else:
+            # User not found or no changes made
+            return None
\ No newline at end of file
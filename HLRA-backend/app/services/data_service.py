@@ -1,16 +1,45 @@
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
+import base64
 import random
 from bson import ObjectId
+from cachetools import TTLCache
 from app.models.health_data import LabReport, TrendData, TrendDataPoint, ParameterStatus,HealthParameter,FileStatus
 from app.database.connection import get_reports_collection
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Other workers' writes reach a cached trend after at most this long
+TREND_CACHE_TTL_SECONDS = 300
+# Reference ranges for trend point statuses. This should come from the
+# database eventually, but for now the ranges are hardcoded
+TREND_REFERENCE_RANGES = {
+      "glucose": {"min": 70, "max": 100},
+      "cholesterol": {"min": 0, "max": 200},
+      "hemoglobin": {"min": 12.0, "max": 17.0},
+      "blood_pressure": {"min": 90, "max": 140},
+      "creatinine": {"min": 0.6, "max": 1.2}
+}
+
+def _encode_report_cursor(document: dict) -> str:
+      """Opaque cursor pointing just past the given report in newest-first order"""
+      raw = f"{document['upload_date'].isoformat()}|{document['_id']}"
+      return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def _decode_report_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+      """Inverse of _encode_report_cursor; raises ValueError for malformed cursors"""
+      try:
+          upload_date, report_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+          return datetime.fromisoformat(upload_date), ObjectId(report_id)
+      except Exception as e:
+          raise ValueError(f"Invalid cursor: {cursor}") from e
+
 class DataService:
       def __init__(self):
-          pass
+          # user_id -> {parameter name: TrendData}; evicted whenever one of the
+          # user's reports is updated or deleted in this process
+          self._trend_cache: TTLCache = TTLCache(maxsize=10000, ttl=TREND_CACHE_TTL_SECONDS)
 
       async def save_report(self, report: LabReport) -> LabReport:
           """Save lab report to MongoDB"""
@@ -65,40 +94,42 @@ class DataService:
               logger.error(f"Error getting report {report_id}: {e}")
               return None
 
-      async def get_all_reports(self) -> List[LabReport]:
-          """Get all reports from MongoDB"""
+      async def get_report_meta(self, report_id: str) -> Optional[Dict[str, Optional[str]]]:
+          """
+          Ownership and file fields of a report, without its parameters or raw text
+
+          For callers that only check access or point at the file.
+          """
           try:
               collection = await get_reports_collection()
 
-              # Find all documents
-              cursor = collection.find({})
-              documents = await cursor.to_list(length=None)
+              document = await collection.find_one(
+                  {"_id": ObjectId(report_id)},
+                  projection={"user_id": 1, "profile_id": 1, "filename": 1, "file_path": 1}
+              )
 
-              # Convert all documents to LabReport objects
-              reports = []
-              for doc in documents:
-                  report = self._document_to_lab_report(doc)
-                  if report:
-                      reports.append(report)
+              if not document:
+                  return None
 
-              return reports
+              return {
+                  "id": str(document["_id"]),
+                  "user_id": document.get("user_id"),
+                  "profile_id": document.get("profile_id"),
+                  "filename": document.get("filename"),
+                  "file_path": document.get("file_path")
+              }
 
           except Exception as e:
-              logger.error(f"Error getting all reports: {e}")
-              return []
+              logger.error(f"Error getting report metadata {report_id}: {e}")
+              return None
 
-      async def get_reports_by_user_and_profile(self, user_id: str, profile_id: Optional[str] = None) -> List[LabReport]:
-          """Get reports for a specific user and optionally filter by profile"""
+      async def get_all_reports(self) -> List[LabReport]:
+          """Get all reports from MongoDB"""
           try:
               collection = await get_reports_collection()
 
-              # Build query
-              query = {"user_id": user_id}
-              if profile_id:
-                  query["profile_id"] = profile_id
-
-              # Find documents matching the query
-              cursor = collection.find(query).sort("upload_date", -1)  # Sort by newest first
+              # Find all documents
+              cursor = collection.find({})
               documents = await cursor.to_list(length=None)
 
               # Convert all documents to LabReport objects
@@ -111,9 +142,107 @@ class DataService:
               return reports
 
           except Exception as e:
-              logger.error(f"Error getting reports for user {user_id}, profile {profile_id}: {e}")
+              logger.error(f"Error getting all reports: {e}")
               return []
 
+      async def get_reports_page(
+          self,
+          user_id: str,
+          profile_id: Optional[str] = None,
+          limit: Optional[int] = None,
+          cursor: Optional[str] = None
+      ) -> Tuple[List[LabReport], Optional[str]]:
+          """Get one page of a user's reports, newest first, plus the cursor for the next page
+
+          Without a limit every remaining report is returned and there is no next page.
+          """
+          query = {"user_id": user_id}
+          if profile_id:
+              query["profile_id"] = profile_id
+          if cursor:
+              upload_date, report_id = _decode_report_cursor(cursor)
+              query["$or"] = [
+                  {"upload_date": {"$lt": upload_date}},
+                  {"upload_date": upload_date, "_id": {"$lt": report_id}}
+              ]
+
+          collection = await get_reports_collection()
+          find = collection.find(query).sort([("upload_date", -1), ("_id", -1)])
+          if limit is None:
+              documents = await find.to_list(length=None)
+          else:
+              # One extra row tells us whether another page exists
+              documents = await find.limit(limit + 1).to_list(length=limit + 1)
+
+          next_cursor = None
+          if limit is not None and len(documents) > limit:
+              documents = documents[:limit]
+              next_cursor = _encode_report_cursor(documents[-1])
+
+          reports = []
+          for doc in documents:
+              report = self._document_to_lab_report(doc)
+              if report:
+                  reports.append(report)
+
+          return reports, next_cursor
+
+      async def get_dashboard_counts(self, user_id: str, since: datetime) -> Dict[str, int]:
+          """Count a user's reports: all of them, those uploaded since `since`, and failed ones"""
+          collection = await get_reports_collection()
+          pipeline = [
+              {"$match": {"user_id": user_id}},
+              {"$facet": {
+                  "total": [{"$count": "n"}],
+                  "this_month": [{"$match": {"upload_date": {"$gte": since}}}, {"$count": "n"}],
+                  "failed": [{"$match": {"processing_status": FileStatus.FAILED.value}}, {"$count": "n"}]
+              }}
+          ]
+          results = await collection.aggregate(pipeline).to_list(length=1)
+          facets = results[0] if results else {}
+
+          return {
+              name: facets[name][0]["n"] if facets.get(name) else 0
+              for name in ("total", "this_month", "failed")
+          }
+
+      async def aggregate_parameter_stats(self, user_id: str) -> List[Dict]:
+          """Per-parameter status counts and numeric value stats across a user's reports.
+
+          Grouped in MongoDB, in order of first appearance in the newest-first
+          report list. Values that are not numbers are left out of avg/min/max.
+          """
+          def status_count(status: ParameterStatus) -> Dict:
+              return {"$sum": {"$cond": [{"$eq": ["$parameters.status", status.value]}, 1, 0]}}
+
+          numeric_value = {"$convert": {
+              "input": "$parameters.value", "to": "double", "onError": None, "onNull": None
+          }}
+          pipeline = [
+              {"$match": {"user_id": user_id}},
+              {"$sort": {"upload_date": -1}},
+              {"$unwind": {"path": "$parameters", "includeArrayIndex": "parameter_index"}},
+              {"$group": {
+                  "_id": "$parameters.name",
+                  "unit": {"$first": "$parameters.unit"},
+                  "category": {"$first": "$parameters.category"},
+                  "first_seen": {"$first": "$upload_date"},
+                  "first_index": {"$first": "$parameter_index"},
+                  "total": {"$sum": 1},
+                  "normal": status_count(ParameterStatus.NORMAL),
+                  "high": status_count(ParameterStatus.HIGH),
+                  "low": status_count(ParameterStatus.LOW),
+                  "critical": status_count(ParameterStatus.CRITICAL),
+                  "avg_value": {"$avg": numeric_value},
+                  "min_value": {"$min": numeric_value},
+                  "max_value": {"$max": numeric_value}
+              }},
+              {"$sort": {"first_seen": -1, "first_index": 1}}
+          ]
+
+          collection = await get_reports_collection()
+          return await collection.aggregate(pipeline).to_list(length=None)
+
       async def get_starred_reports_by_user_and_profile(self, user_id: str, profile_id: Optional[str] = None) -> List[LabReport]:
           """Get starred reports for a specific user and optionally filter by profile"""
           try:
@@ -171,6 +300,7 @@ class DataService:
                   logger.warning(f"No report found with ID: {report.id}")
                   return None
 
+              self.invalidate_trends(report.user_id)
               logger.info(f"Report updated: {report.id}")
               return report
 
@@ -178,18 +308,42 @@ class DataService:
               logger.error(f"Error updating report {report.id}: {e}")
               raise
 
+      async def claim_report_for_processing(self, report_id: str) -> bool:
+          """Atomically move an unprocessed or failed report to processing.
+
+          Returns False when another request got there first, so concurrent or
+          retried extraction requests schedule the work only once.
+          """
+          collection = await get_reports_collection()
+          result = await collection.update_one(
+              {
+                  "_id": ObjectId(report_id),
+                  "processing_status": {"$in": [FileStatus.UPLOADING.value, FileStatus.FAILED.value]}
+              },
+              {"$set": {
+                  "processing_status": FileStatus.PROCESSING.value,
+                  "error_message": None,
+                  "updated_at": datetime.utcnow()
+              }}
+          )
+          return result.modified_count == 1
+
       async def delete_report(self, report_id: str) -> bool:
           """Delete report from MongoDB"""
           try:
               collection = await get_reports_collection()
 
-              # Delete document
-              result = await collection.delete_one({"_id": ObjectId(report_id)})
+              # Delete document, getting back its owner to drop their cached trends
+              deleted = await collection.find_one_and_delete(
+                  {"_id": ObjectId(report_id)},
+                  projection={"user_id": 1}
+              )
 
-              if result.deleted_count == 0:
+              if not deleted:
                   logger.warning(f"No report found with ID: {report_id}")
                   return False
 
+              self.invalidate_trends(deleted.get("user_id"))
               logger.info(f"Report deleted: {report_id}")
               return True
 
@@ -198,9 +352,14 @@ class DataService:
               return False
 
       def _document_to_lab_report(self, document: dict) -> Optional[LabReport]:
-          """Convert MongoDB document to LabReport object"""
+          """Convert MongoDB document to LabReport object
+
+          Stored reports were validated on the way in, so the model is only
+          constructed; with dozens of parameters per report, validating every
+          listed report again was most of a page's cost.
+          """
           try:
-              return LabReport(
+              return LabReport.model_construct(
                   id=str(document["_id"]),
                   user_id=document.get("user_id", ""),
                   profile_id=document.get("profile_id"),
@@ -210,7 +369,7 @@ class DataService:
                   file_type=document.get("file_type", "unknown"),
                   file_size=document.get("file_size", 0),
                   upload_date=document.get("upload_date", datetime.utcnow()),
-                  parameters=[HealthParameter(**param) for param in document.get("parameters", [])],
+                  parameters=[HealthParameter.from_document(param) for param in document.get("parameters", [])],
                   processing_status=FileStatus(document.get("processing_status", "pending")),
                   raw_text=document.get("raw_text"),
                   error_message=document.get("error_message"),
@@ -221,80 +380,100 @@ class DataService:
               return None
 
       async def get_trend_data(self, parameter_name: str, user_id: str = None) -> TrendData:
-          """Get actual trend data from MongoDB instead of generating mock data"""
+          """Get actual trend data from MongoDB, cached per user until their reports change"""
+          key = parameter_name.lower()
+          user_trends = self._trend_cache.get(user_id)
+          if user_trends is not None and key in user_trends:
+              return user_trends[key]
+
           try:
-              collection = await get_reports_collection()
+              trend_data = await self._query_trend_data(parameter_name, user_id)
+          except Exception as e:
+              logger.error(f"Error getting trend data for {parameter_name}: {e}")
+              # Return empty trend data on error (not cached)
+              return TrendData(
+                  parameter_name=parameter_name,
+                  data_points=[],
+                  trend_direction="stable"
+              )
 
-              # Query for completed reports with extracted data
-              query = {
-                  "status": "completed",
-                  "extracted_data": {"$exists": True, "$ne": None}
-              }
+          self._trend_cache.setdefault(user_id, {})[key] = trend_data
+          return trend_data
 
-              if user_id:
-                  query["user_id"] = user_id
+      def invalidate_trends(self, user_id: Optional[str]):
+          """Drop cached trends after a user's reports changed"""
+          self._trend_cache.pop(user_id, None)
+          # Trends requested without a user span everyone's reports
+          self._trend_cache.pop(None, None)
 
-              # Find reports and sort by date
-              cursor = collection.find(query).sort("created_at", 1)
-              documents = await cursor.to_list(length=None)
+      async def _query_trend_data(self, parameter_name: str, user_id: Optional[str]) -> TrendData:
+          """Build a parameter's trend from the stored reports"""
+          collection = await get_reports_collection()
 
-              data_points = []
-              for doc in documents:
-                  extracted_data = doc.get("extracted_data", {})
-                  parameters = extracted_data.get("parameters", [])
-
-                  # Look for the specific parameter
-                  for param in parameters:
-                      if param.get("name", "").lower() == parameter_name.lower():
-                          value = param.get("value")
-                          if value is not None:
-                              # Determine status based on value and reference ranges
-                              status = self._determine_parameter_status(parameter_name, value)
-
-                              data_points.append(TrendDataPoint(
-                                  date=doc["created_at"],
-                                  value=float(value),
-                                  status=status
-                              ))
-
-              # If no data found, return empty trend data
-              if not data_points:
-                  return TrendData(
-                      parameter_name=parameter_name,
-                      data_points=[],
-                      trend_direction="stable"
-                  )
-
-              # Determine trend direction
-              trend_direction = self._calculate_trend_direction(data_points, parameter_name)
+          # Query for completed reports with extracted data
+          query = {
+              "status": "completed",
+              "extracted_data": {"$exists": True, "$ne": None}
+          }
 
-              return TrendData(
-                  parameter_name=parameter_name,
-                  data_points=data_points,
-                  trend_direction=trend_direction
-              )
+          if user_id:
+              query["user_id"] = user_id
 
-          except Exception as e:
-              logger.error(f"Error getting trend data for {parameter_name}: {e}")
-              # Return empty trend data on error
+          # Find reports and sort by date, reading only what the chart needs
+          projection = {
+              "_id": 0,
+              "created_at": 1,
+              "extracted_data.parameters.name": 1,
+              "extracted_data.parameters.value": 1
+          }
+          cursor = collection.find(query, projection).sort("created_at", 1)
+          documents = await cursor.to_list(length=None)
+
+          wanted_name = parameter_name.lower()
+          data_points = []
+          for doc in documents:
+              extracted_data = doc.get("extracted_data", {})
+              parameters = extracted_data.get("parameters", [])
+
+              # Look for the specific parameter
+              for param in parameters:
+                  if param.get("name", "").lower() == wanted_name:
+                      try:
+                          value = float(param.get("value"))
+                      except (TypeError, ValueError):
+                          # Missing or non-numeric results ("trace") can't be charted
+                          continue
+
+                      # Determine status based on value and reference ranges
+                      status = self._determine_parameter_status(parameter_name, value)
+
+                      # Every field is already of its declared type here
+                      data_points.append(TrendDataPoint.model_construct(
+                          date=doc["created_at"],
+                          value=value,
+                          status=status
+                      ))
+
+          # If no data found, return empty trend data
+          if not data_points:
               return TrendData(
                   parameter_name=parameter_name,
                   data_points=[],
                   trend_direction="stable"
               )
 
+          # Determine trend direction
+          trend_direction = self._calculate_trend_direction(data_points, parameter_name)
+
+          return TrendData(
+              parameter_name=parameter_name,
+              data_points=data_points,
+              trend_direction=trend_direction
+          )
+
       def _determine_parameter_status(self, parameter_name: str, value: float) -> ParameterStatus:
           """Determine parameter status based on reference ranges"""
-          # This should come from database eventually, but for now use hardcoded ranges
-          reference_ranges = {
-              "glucose": {"min": 70, "max": 100},
-              "cholesterol": {"min": 0, "max": 200},
-              "hemoglobin": {"min": 12.0, "max": 17.0},
-              "blood_pressure": {"min": 90, "max": 140},
-              "creatinine": {"min": 0.6, "max": 1.2}
-          }
-
-          param_range = reference_ranges.get(parameter_name.lower())
+          param_range = TREND_REFERENCE_RANGES.get(parameter_name.lower())
           if not param_range:
               return ParameterStatus.NORMAL
 
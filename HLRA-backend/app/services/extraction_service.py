@@ -1,5 +1,4 @@
 import re
-import uuid
 from typing import List, Dict, Tuple, Optional
 from app.models.health_data import HealthParameter, ParameterStatus, ParameterCategory
 
@@ -179,7 +178,6 @@ class ExtractionService:
               display_name = self._format_parameter_name(param_name)
 
               return HealthParameter(
-                  id=str(uuid.uuid4()),
                   name=display_name,
                   value=value,
                   unit=unit,
@@ -1,7 +1,11 @@
 # app/services/family_profile_service.py
 from datetime import datetime, date
-from typing import List, Optional, Dict, Any
+import asyncio
+from typing import List, Optional, Dict, Any, Tuple
 from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from cachetools import TTLCache
 from app.database.connection import get_family_profiles_collection, get_user_profile_settings_collection
 from app.models.family_profile import (
     FamilyProfile, 
@@ -15,10 +19,20 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Resolved active profile per user, so report listings skip the settings and
+# profile lookups on every call. Local writes evict it; other workers may see
+# the previous profile for up to the TTL, like the user cache in app.core.auth.
+ACTIVE_PROFILE_CACHE_TTL_SECONDS = 60
+# Confirmed (user, profile) ownership for report filtering; deletes evict it
+OWNED_PROFILE_CACHE_TTL_SECONDS = 60
+
 class FamilyProfileService:
     def __init__(self):
         self._profiles_collection: Optional[AsyncIOMotorCollection] = None
         self._user_profile_settings_collection: Optional[AsyncIOMotorCollection] = None
+        self._active_profiles: TTLCache = TTLCache(maxsize=10000, ttl=ACTIVE_PROFILE_CACHE_TTL_SECONDS)
+        self._owned_profiles: TTLCache = TTLCache(maxsize=10000, ttl=OWNED_PROFILE_CACHE_TTL_SECONDS)
+        self._ownership_lookups: Dict[Tuple[str, str], asyncio.Future] = {}
 
     async def get_profiles_collection(self) -> AsyncIOMotorCollection:
         """Get the family profiles collection"""
@@ -57,8 +71,16 @@ class FamilyProfileService:
                 from app.models.family_profile import HealthInformation
                 profile.health_info = HealthInformation()
             
-            # Insert into database
-            result = await collection.insert_one(profile.dict())
+            # Insert into database. Users keep a single active self profile
+            # (partial unique index), so a second one is stored as family instead.
+            try:
+                result = await collection.insert_one(profile.dict())
+            except DuplicateKeyError:
+                if profile.relationship != SystemRelationshipType.SELF:
+                    raise
+                profile_dict['relationship'] = SystemRelationshipType.FAMILY
+                profile = FamilyProfile(user_id=user_id, **profile_dict)
+                result = await collection.insert_one(profile.dict())
             
             if not result.inserted_id:
                 raise Exception("Failed to create profile")
@@ -110,6 +132,42 @@ class FamilyProfileService:
             logger.error(f"Error fetching profile {profile_id}: {e}")
             return None
 
+    async def owns_profile(self, profile_id: str, user_id: str) -> bool:
+        """
+        Whether an active profile belongs to the user
+
+        Concurrent checks of the same pair share one query, and confirmed
+        ownership is cached, so bursts of report listings for a profile cost a
+        single lookup.
+        """
+        key = (user_id, profile_id)
+        if key in self._owned_profiles:
+            return True
+        
+        lookup = self._ownership_lookups.get(key)
+        if lookup is None:
+            lookup = asyncio.ensure_future(self._lookup_ownership(profile_id, user_id))
+            self._ownership_lookups[key] = lookup
+            lookup.add_done_callback(lambda _: self._ownership_lookups.pop(key, None))
+        
+        # Shielded so one cancelled caller doesn't cancel the others' lookup
+        owned = await asyncio.shield(lookup)
+        if owned:
+            self._owned_profiles[key] = True
+        return owned
+
+    async def _lookup_ownership(self, profile_id: str, user_id: str) -> bool:
+        try:
+            collection = await self.get_profiles_collection()
+            count = await collection.count_documents(
+                {"id": profile_id, "user_id": user_id, "is_active": True},
+                limit=1
+            )
+            return count > 0
+        except Exception as e:
+            logger.error(f"Error checking ownership of profile {profile_id}: {e}")
+            return False
+
     async def update_profile(self, profile_id: str, user_id: str, update_data: FamilyProfileUpdate) -> Optional[FamilyProfile]:
         """Update a family profile"""
         try:
@@ -119,17 +177,18 @@ class FamilyProfileService:
             update_dict = update_data.dict(exclude_unset=True, exclude_none=True)
             update_dict["updated_at"] = datetime.utcnow()
             
-            # Update the profile
-            result = await collection.update_one(
+            # Update the profile and read it back in the same round-trip
+            profile_data = await collection.find_one_and_update(
                 {"id": profile_id, "user_id": user_id},
-                {"$set": update_dict}
+                {"$set": update_dict},
+                return_document=ReturnDocument.AFTER
             )
             
-            if result.matched_count == 0:
+            if not profile_data or not profile_data.get("is_active"):
                 return None
             
-            # Return updated profile
-            return await self.get_profile_by_id(profile_id, user_id)
+            self._active_profiles.pop(user_id, None)
+            return FamilyProfile(**profile_data)
             
         except Exception as e:
             logger.error(f"Error updating profile {profile_id}: {e}")
@@ -140,20 +199,21 @@ class FamilyProfileService:
         try:
             collection = await self.get_profiles_collection()
             
-            # Don't allow deletion of 'self' profile
-            profile = await self.get_profile_by_id(profile_id, user_id)
-            if profile and profile.relationship == SystemRelationshipType.SELF:
-                logger.warning(f"Attempted to delete 'self' profile {profile_id}")
-                return False
-            
-            # Soft delete the profile
+            # Soft delete the profile; the 'self' profile is excluded by the filter
             result = await collection.update_one(
-                {"id": profile_id, "user_id": user_id},
+                {
+                    "id": profile_id,
+                    "user_id": user_id,
+                    "relationship": {"$ne": SystemRelationshipType.SELF}
+                },
                 {"$set": {"is_active": False, "updated_at": datetime.utcnow()}}
             )
             
             if result.matched_count == 0:
+                logger.warning(f"Profile {profile_id} not found or is a 'self' profile; not deleted")
                 return False
+            self._active_profiles.pop(user_id, None)
+            self._owned_profiles.pop((user_id, profile_id), None)
             
             # If this was the active profile, switch to 'self' profile
             active_profile_id = await self.get_active_profile_id(user_id)
@@ -191,38 +251,64 @@ class FamilyProfileService:
 
     async def create_self_profile(self, user: User) -> FamilyProfile:
         """Create a 'self' profile for a new user"""
+        return await self.save_self_profile(self.build_self_profile(user))
+
+    def build_self_profile(self, user: User) -> FamilyProfile:
+        """Build a user's 'self' profile in memory, without storing it"""
+        profile_data = FamilyProfileCreate(
+            name=user.full_name,
+            relationship_label="Self",
+            email=user.email,
+            phone=user.phone,
+            address=user.address
+        )
+        
+        # Create profile with special handling for self
+        profile_dict = profile_data.dict(exclude_unset=True)
+        profile_dict['relationship'] = SystemRelationshipType.SELF
+        
+        return FamilyProfile(
+            user_id=user.id,
+            **profile_dict
+        )
+
+    async def save_self_profile(self, profile: FamilyProfile) -> FamilyProfile:
+        """Store a profile from build_self_profile and make it the active one.
+
+        Inserts only if the user has no active self profile yet, so repeated or
+        concurrent calls converge on a single stored profile, which is returned.
+        A partial unique index backs this up; losing that race re-reads the winner.
+        """
         try:
-            profile_data = FamilyProfileCreate(
-                name=user.full_name,
-                relationship_label="Self",
-                email=user.email,
-                phone=user.phone,
-                address=user.address
-            )
-            
-            # Create profile with special handling for self
-            profile_dict = profile_data.dict(exclude_unset=True)
-            profile_dict['relationship'] = SystemRelationshipType.SELF
-            
-            profile = FamilyProfile(
-                user_id=user.id,
-                **profile_dict
-            )
-            
             collection = await self.get_profiles_collection()
-            result = await collection.insert_one(profile.dict())
             
-            if not result.inserted_id:
-                raise Exception("Failed to create self profile")
+            query = {
+                "user_id": profile.user_id,
+                "relationship": SystemRelationshipType.SELF,
+                "is_active": True
+            }
+            try:
+                stored = await collection.find_one_and_update(
+                    query,
+                    {"$setOnInsert": profile.dict()},
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER
+                )
+            except DuplicateKeyError:
+                stored = await collection.find_one(query)
+                if stored is None:
+                    # The profile that won the race is already gone again
+                    raise Exception("Self profile changed while being saved")
+            stored_profile = FamilyProfile(**stored)
             
             # Set as active profile
-            await self.set_active_profile(user.id, profile.id)
+            await self.set_active_profile(profile.user_id, stored_profile.id)
             
-            logger.info(f"Created self profile {profile.id} for user {user.id}")
-            return profile
+            logger.info(f"Saved self profile {stored_profile.id} for user {profile.user_id}")
+            return stored_profile
             
         except Exception as e:
-            logger.error(f"Error creating self profile for user {user.id}: {e}")
+            logger.error(f"Error creating self profile for user {profile.user_id}: {e}")
             raise
 
     async def set_active_profile(self, user_id: str, profile_id: str) -> bool:
@@ -246,6 +332,7 @@ class FamilyProfileService:
                 },
                 upsert=True
             )
+            self._active_profiles.pop(user_id, None)
             
             logger.info(f"Set active profile {profile_id} for user {user_id}")
             return True
@@ -277,12 +364,19 @@ class FamilyProfileService:
 
     async def get_active_profile(self, user_id: str) -> Optional[FamilyProfile]:
         """Get the active family profile for a user"""
+        cached_profile = self._active_profiles.get(user_id)
+        if cached_profile is not None:
+            return cached_profile
+        
         try:
             active_profile_id = await self.get_active_profile_id(user_id)
             if not active_profile_id:
                 return None
             
-            return await self.get_profile_by_id(active_profile_id, user_id)
+            profile = await self.get_profile_by_id(active_profile_id, user_id)
+            if profile:
+                self._active_profiles[user_id] = profile
+            return profile
             
         except Exception as e:
             logger.error(f"Error getting active profile for user {user_id}: {e}")
@@ -290,11 +384,16 @@ class FamilyProfileService:
 
     async def get_health_insights(self, profile_id: str, user_id: str) -> Optional[HealthInsightResponse]:
         """Generate health insights for a profile"""
+        profile = await self.get_profile_by_id(profile_id, user_id)
+        if not profile:
+            return None
+        
+        return self.build_health_insights(profile)
+
+    def build_health_insights(self, profile: FamilyProfile) -> Optional[HealthInsightResponse]:
+        """Generate health insights for an already loaded profile"""
+        profile_id = profile.id
         try:
-            profile = await self.get_profile_by_id(profile_id, user_id)
-            if not profile:
-                return None
-            
             # Calculate age if date of birth is available
             age = None
             age_group = None
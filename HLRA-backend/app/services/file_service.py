@@ -1,10 +1,14 @@
 import os
-import uuid
+import aiofiles
 from datetime import datetime
 from fastapi import UploadFile
 from app.models.health_data import LabReport, FileStatus
 from app.core.config import settings
 from app.core.exceptions import FileUploadError, ValidationError
+from app.utils.helpers import new_id
+
+# Uploads are copied to disk in chunks of this size so memory stays bounded
+UPLOAD_CHUNK_SIZE = 1024 * 1024
 
 class FileService:
     def __init__(self):
@@ -16,7 +20,7 @@ class FileService:
         await self._validate_file(file)
         
         # Generate unique filename
-        file_id = str(uuid.uuid4())
+        file_id = new_id()
         file_ext = os.path.splitext(file.filename)[1]
         filename = f"{file_id}{file_ext}"
         
@@ -24,14 +28,23 @@ class FileService:
         os.makedirs(settings.upload_dir, exist_ok=True)
         file_path = os.path.join(settings.upload_dir, filename)
         
-        # Save file
+        # Save file, enforcing the size limit on the bytes actually received
+        file_size = 0
         try:
-            with open(file_path, "wb") as buffer:
-                content = await file.read()
-                buffer.write(content)
+            async with aiofiles.open(file_path, "wb") as buffer:
+                while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                    file_size += len(chunk)
+                    if file_size > settings.max_file_size:
+                        break
+                    await buffer.write(chunk)
         except Exception as e:
+            self._remove_partial_file(file_path)
             raise FileUploadError(f"Failed to save file: {str(e)}")
         
+        if file_size > settings.max_file_size:
+            self._remove_partial_file(file_path)
+            raise ValidationError(f"File too large. Max size: {settings.max_file_size} bytes")
+        
         # Create LabReport
         lab_report = LabReport(
             id=file_id,
@@ -41,7 +54,7 @@ class FileService:
             file_path=file_path,
             upload_date=datetime.utcnow(),
             processing_status=FileStatus.UPLOADING,
-            file_size=len(content),
+            file_size=file_size,
             file_type=file.content_type or "unknown"
         )
         
@@ -57,12 +70,17 @@ class FileService:
         if file_ext not in settings.allowed_extensions:
             raise ValidationError(f"File type {file_ext} not allowed. Allowed types: {settings.allowed_extensions}")
         
-        # Check file size
-        content = await file.read()
-        if len(content) > settings.max_file_size:
+        # Reject early when the size is already known; save_file enforces the
+        # limit while copying, so the body is never read into memory here
+        if file.size is not None and file.size > settings.max_file_size:
             raise ValidationError(f"File too large. Max size: {settings.max_file_size} bytes")
-        
-        # Reset file pointer
-        await file.seek(0)
+
+    @staticmethod
+    def _remove_partial_file(file_path: str):
+        """Delete a file whose upload was rejected or failed midway"""
+        try:
+            os.remove(file_path)
+        except FileNotFoundError:
+            pass
 
 file_service = FileService()
\ No newline at end of file
@@ -1,8 +1,9 @@
 # app/services/notification_service.py
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from motor.motor_asyncio import AsyncIOMotorCollection
 from app.database.connection import get_database
+from app.models.health_data import HealthParameter
 from app.models.notification import (
     Notification,
     NotificationCreate,
@@ -57,30 +58,85 @@ class NotificationService:
         try:
             collection = await self.get_notifications_collection()
             
-            # Build query
-            query = {"user_id": user_id}
+            query = self._user_notifications_query(user_id, profile_id, unread_only)
+            cursor = collection.find(query).sort("created_at", -1).skip(offset).limit(limit)
+            notifications_data = await cursor.to_list(length=None)
             
-            if profile_id:
-                query["profile_id"] = profile_id
+            notifications = [Notification.from_document(notif_data) for notif_data in notifications_data]
+            return notifications
             
-            if unread_only:
-                query["is_read"] = False
+        except Exception as e:
+            logger.error(f"Error fetching notifications for user {user_id}: {e}")
+            return []
+
+    async def get_notifications_bundle(
+        self,
+        user_id: str,
+        profile_id: Optional[str] = None,
+        unread_only: bool = False,
+        limit: int = 50,
+        offset: int = 0
+    ) -> Tuple[List[Notification], int, int, bool]:
+        """Page of notifications with its total, unread count and critical flag.
+
+        All four come from one $facet aggregation over the user's unexpired
+        notifications, i.e. a single round-trip.
+        """
+        try:
+            collection = await self.get_notifications_collection()
             
-            # Add expiration filter
-            query["$or"] = [
-                {"expires_at": None},
-                {"expires_at": {"$gt": datetime.utcnow()}}
+            page_filter = {"is_read": False} if unread_only else {}
+            unread_filter = {"is_read": False}
+            critical_filter = {"is_read": False, "priority": NotificationPriority.CRITICAL.value}
+            
+            pipeline = [
+                {"$match": self._user_notifications_query(user_id, profile_id)},
+                {"$facet": {
+                    "items": [
+                        {"$match": page_filter},
+                        {"$sort": {"created_at": -1}},
+                        {"$skip": offset},
+                        {"$limit": limit}
+                    ],
+                    "total": [{"$match": page_filter}, {"$count": "n"}],
+                    "unread": [{"$match": unread_filter}, {"$count": "n"}],
+                    "critical": [{"$match": critical_filter}, {"$limit": 1}, {"$count": "n"}]
+                }}
             ]
+            results = await collection.aggregate(pipeline).to_list(length=1)
+            facets = results[0]
             
-            cursor = collection.find(query).sort("created_at", -1).skip(offset).limit(limit)
-            notifications_data = await cursor.to_list(length=None)
+            def count(name: str) -> int:
+                return facets[name][0]["n"] if facets[name] else 0
             
-            notifications = [Notification(**notif_data) for notif_data in notifications_data]
-            return notifications
+            notifications = [Notification.from_document(notif_data) for notif_data in facets["items"]]
+            return notifications, count("total"), count("unread"), count("critical") > 0
             
         except Exception as e:
             logger.error(f"Error fetching notifications for user {user_id}: {e}")
-            return []
+            return [], 0, 0, False
+
+    @staticmethod
+    def _user_notifications_query(
+        user_id: str,
+        profile_id: Optional[str] = None,
+        unread_only: bool = False
+    ) -> Dict[str, Any]:
+        """Filter shared by the notification list queries"""
+        query = {"user_id": user_id}
+        
+        if profile_id:
+            query["profile_id"] = profile_id
+        
+        if unread_only:
+            query["is_read"] = False
+        
+        # Add expiration filter
+        query["$or"] = [
+            {"expires_at": None},
+            {"expires_at": {"$gt": datetime.utcnow()}}
+        ]
+        return query
 
     async def get_notification(self, notification_id: str, user_id: str) -> Optional[Notification]:
         """Get a specific notification"""
@@ -95,7 +151,7 @@ class NotificationService:
             if not notification_data:
                 return None
             
-            return Notification(**notification_data)
+            return Notification.from_document(notification_data)
             
         except Exception as e:
             logger.error(f"Error fetching notification {notification_id}: {e}")
@@ -143,6 +199,22 @@ class NotificationService:
         result = await self.update_notification(notification_id, user_id, update_data)
         return result is not None
 
+    async def mark_many_as_read(self, user_id: str, notification_ids: List[str]) -> int:
+        """Mark the given notifications as read in a single update"""
+        try:
+            collection = await self.get_notifications_collection()
+            
+            result = await collection.update_many(
+                {"id": {"$in": notification_ids}, "user_id": user_id, "is_read": False},
+                {"$set": {"is_read": True, "read_at": datetime.utcnow()}}
+            )
+            
+            return result.modified_count
+            
+        except Exception as e:
+            logger.error(f"Error marking notifications as read for user {user_id}: {e}")
+            return 0
+
     async def mark_all_as_read(self, user_id: str, profile_id: Optional[str] = None) -> int:
         """Mark all notifications as read for a user"""
         try:
@@ -222,19 +294,19 @@ class NotificationService:
             return 0
 
     # Health-specific notification creators
-    async def create_health_alert(
-        self, 
-        user_id: str, 
+    def _health_alert(
+        self,
+        user_id: str,
         profile_id: str,
         parameter_name: str,
         value: str,
         status: str,
         report_id: str
-    ):
-        """Create a health parameter alert notification"""
+    ) -> Dict[str, Any]:
+        """Fields of the alert notification for one out-of-range parameter"""
         priority = NotificationPriority.HIGH if status == 'critical' else NotificationPriority.NORMAL
         
-        notification_data = NotificationCreate(
+        return dict(
             user_id=user_id,
             profile_id=profile_id,
             type=NotificationType.HEALTH_ALERT,
@@ -252,8 +324,43 @@ class NotificationService:
             ],
             expires_at=datetime.utcnow() + timedelta(days=30)
         )
-        
-        return await self.create_notification(notification_data)
+
+    async def create_health_alert(
+        self, 
+        user_id: str, 
+        profile_id: str,
+        parameter_name: str,
+        value: str,
+        status: str,
+        report_id: str
+    ):
+        """Create a health parameter alert notification"""
+        return await self.create_notification(NotificationCreate(
+            **self._health_alert(user_id, profile_id, parameter_name, value, status, report_id)
+        ))
+
+    async def create_health_alerts(
+        self,
+        user_id: str,
+        profile_id: str,
+        report_id: str,
+        parameters: List[HealthParameter]
+    ) -> int:
+        """Create alerts for several parameters of a report in a single insert"""
+        if not parameters:
+            return 0
+
+        collection = await self.get_notifications_collection()
+        documents = [
+            Notification(**self._health_alert(
+                user_id, profile_id, param.name, str(param.value), param.status, report_id
+            )).model_dump()
+            for param in parameters
+        ]
+        result = await collection.insert_many(documents, ordered=False)
+
+        logger.info(f"Created {len(result.inserted_ids)} health alerts for report {report_id}")
+        return len(result.inserted_ids)
 
     async def create_checkup_reminder(self, user_id: str, profile_id: str, days_since_last: int):
         """Create a checkup reminder notification"""
@@ -0,0 +1,70 @@
+# app/services/processing_service.py
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+from fastapi.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.models.health_data import HealthParameter
+import logging
+
+logger = logging.getLogger(__name__)
+
+def extract_report_data(file_path: str) -> Tuple[str, List[HealthParameter]]:
+    """OCR a report file and parse its parameters (runs in a worker process)"""
+    from app.services.ocr_service import ocr_service
+    from app.services.extraction_service import extraction_service
+
+    try:
+        raw_text = ocr_service.extract_text_from_file(file_path)
+        return raw_text, extraction_service.extract_parameters(raw_text)
+    except Exception as e:
+        # Results cross the process boundary pickled; a plain exception always does
+        raise RuntimeError(str(e)) from None
+
+def _warm_up_worker() -> None:
+    """Import the OCR and extraction services (compiling their patterns) ahead of the first report"""
+    from app.services.ocr_service import ocr_service
+    from app.services.extraction_service import extraction_service
+
+class ProcessingService:
+    """
+    Runs the CPU-bound part of report processing outside the API process
+
+    OCR holds the GIL for long stretches, so in a thread it still slows every
+    request; worker processes use the other cores instead. Without a started
+    pool (scripts, tests) the work falls back to the threadpool.
+    """
+
+    def __init__(self):
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def start(self):
+        """Start the worker processes (called on app startup)"""
+        if self._pool is None:
+            # spawn, not fork: the API process already runs threads (Motor, the threadpool)
+            self._pool = ProcessPoolExecutor(
+                max_workers=settings.ocr_concurrency,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            # Workers spawn lazily; warming each one up now keeps the interpreter
+            # start and imports off the first uploads' latency
+            for _ in range(settings.ocr_concurrency):
+                self._pool.submit(_warm_up_worker)
+            logger.info("Started %s report processing workers", settings.ocr_concurrency)
+
+    async def shutdown(self):
+        """Stop the worker processes, letting running extractions finish"""
+        if self._pool is not None:
+            pool, self._pool = self._pool, None
+            # Waiting for running extractions can take a while; keep the loop free meanwhile
+            await run_in_threadpool(pool.shutdown, wait=True, cancel_futures=True)
+
+    async def extract(self, file_path: str) -> Tuple[str, List[HealthParameter]]:
+        """Raw text and parameters of a report file"""
+        if self._pool is None:
+            return await run_in_threadpool(extract_report_data, file_path)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, extract_report_data, file_path)
+
+processing_service = ProcessingService()
@@ -0,0 +1,76 @@
+# app/services/progress_service.py
+import asyncio
+from typing import Dict, Set
+from app.models.file_models import FileProcessingStatus
+from app.models.health_data import FileStatus, LabReport
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Rough progress shown to the client for each processing stage
+_PROGRESS_MAP = {
+    FileStatus.UPLOADING: 20,
+    FileStatus.PROCESSING: 60,
+    FileStatus.COMPLETED: 100,
+    FileStatus.FAILED: 0
+}
+
+# Per-status (status, progress, message) fields, resolved once for every status
+_STATUS_FIELDS = {
+    status: (status.value, _PROGRESS_MAP.get(status, 0), f"Status: {status.value}")
+    for status in FileStatus
+}
+
+TERMINAL_STATUSES = (FileStatus.COMPLETED, FileStatus.FAILED)
+
+def build_processing_status(report: LabReport) -> FileProcessingStatus:
+    """Snapshot of a report's processing progress as sent to the client"""
+    status_value, progress, message = _STATUS_FIELDS[report.processing_status]
+
+    # Every field comes from an already validated report, so skip re-validation
+    return FileProcessingStatus.model_construct(
+        file_id=report.id,
+        status=status_value,
+        progress=progress,
+        message=message,
+        parameters_found=len(report.parameters),
+        error=report.error_message
+    )
+
+class ProgressService:
+    """In-process pub/sub of report processing updates, keyed by report id.
+
+    Background processing runs in the same process as the request that
+    scheduled it, so plain asyncio queues are enough to push its status
+    transitions to open extraction streams.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+
+    def subscribe(self, report_id: str) -> asyncio.Queue:
+        """Register a listener for a report's updates"""
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(report_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, report_id: str, queue: asyncio.Queue) -> None:
+        """Remove a listener registered with subscribe"""
+        queues = self._subscribers.get(report_id)
+        if not queues:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[report_id]
+
+    def publish(self, report: LabReport) -> None:
+        """Push the report's current status to everyone listening for it"""
+        queues = self._subscribers.get(report.id)
+        if not queues:
+            return
+        update = build_processing_status(report)
+        for queue in queues:
+            queue.put_nowait(update)
+
+# Create service instance
+progress_service = ProgressService()
@@ -0,0 +1,24 @@
+"""
+Small shared helpers for the API layer
+"""
+
+from typing import Any, Type, TypeVar
+from pydantic import BaseModel
+import uuid
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+def new_id() -> str:
+    """A new random document id (hyphenated UUID4, the format ids are stored in)"""
+    return str(uuid.uuid4())
+
+def construct_from(model_cls: Type[ModelT], source: BaseModel) -> ModelT:
+    """
+    Build a response model from an already-validated model without re-validating
+
+    Copies only the fields model_cls declares, by attribute, so there's no
+    intermediate .dict() and no second validation pass. Only use this when
+    source's fields already have the types model_cls expects.
+    """
+    values: dict[str, Any] = {name: getattr(source, name) for name in model_cls.model_fields}
+    return model_cls.model_construct(**values)
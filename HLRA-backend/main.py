@@ -11,5 +11,16 @@ from app.main import app
 if __name__ == "__main__":
     import uvicorn
     port = int(os.environ.get("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    uvicorn.run(
+        "app.main:app",
+        host="0.0.0.0",
+        port=port,
+        # uvicorn[standard] ships both; pinned so a missing one fails loudly
+        # instead of silently falling back to asyncio and h11
+        loop="uvloop",
+        http="httptools",
+        # Each worker starts its own OCR process pool, so size OCR_CONCURRENCY
+        # with this in mind
+        workers=int(os.environ.get("WEB_CONCURRENCY", 1))
+    )
 
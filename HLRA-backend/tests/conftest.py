@@ -52,7 +52,7 @@ def sample_user_data():
     return {
         "username": "testuser",
         "email": "test@example.com",
-        "password": "testpassword123"
+        "password": "TestPassword123"
     }
 
 
@@ -12,7 +12,7 @@ class TestAuthEndpoints:
         user_data = {
             "email": "newuser@example.com",
             "full_name": "New User",
-            "password": "securepassword123"
+            "password": "SecurePassword123"
         }
         
         response = await async_client.post("/api/v1/auth/register", json=user_data)
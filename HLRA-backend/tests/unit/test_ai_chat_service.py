@@ -0,0 +1,179 @@
+import json
+from datetime import datetime
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.services.ai_chat_service import AIChatService
+
+
+class FakeStreamResponse:
+    """Minimal stand-in for an aiohttp response used as a context manager"""
+
+    def __init__(self, status, lines=(), body=None):
+        self.status = status
+        self._lines = lines
+        self._body = body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def text(self):
+        return "error"
+
+    async def json(self):
+        return self._body
+
+    @property
+    def content(self):
+        async def iterate():
+            for line in self._lines:
+                yield line
+        return iterate()
+
+
+def sse_line(text):
+    chunk = {"candidates": [{"content": {"parts": [{"text": text}]}}]}
+    return f"data: {json.dumps(chunk)}\r\n".encode()
+
+
+class TestChatStream:
+    @pytest.fixture
+    def service(self):
+        """Chat service with a key configured and DB access stubbed out"""
+        with patch('app.services.ai_chat_service.settings') as mock_settings:
+            mock_settings.gemini_api_key = "test-key"
+            service = AIChatService()
+        service._build_prompt = AsyncMock(return_value=("prompt", False))
+        service._store_conversation = AsyncMock()
+        return service
+
+    @pytest.mark.asyncio
+    async def test_yields_text_and_stores_answer(self, service):
+        """Test streamed fragments are yielded in order and stored once complete"""
+        session = MagicMock()
+        session.post.return_value = FakeStreamResponse(200, [sse_line("Hello"), b"\r\n", sse_line(" there")])
+        service._get_session = MagicMock(return_value=session)
+
+        tokens = [token async for token in service.chat_stream("user-1", "Hi")]
+
+        assert tokens == ["Hello", " there"]
+        service._store_conversation.assert_awaited_once_with(
+            user_id="user-1", user_message="Hi", ai_response="Hello there"
+        )
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_next_model(self, service):
+        """Test a rejected model is skipped before anything is streamed"""
+        session = MagicMock()
+        session.post.side_effect = [FakeStreamResponse(404), FakeStreamResponse(200, [sse_line("OK")])]
+        service._get_session = MagicMock(return_value=session)
+
+        tokens = [token async for token in service.chat_stream("user-1", "Hi")]
+
+        assert tokens == ["OK"]
+        assert session.post.call_count == 2
+
+
+class TestMakeRequest:
+    @pytest.mark.asyncio
+    async def test_single_upstream_call_per_question(self):
+        """Test a question costs one Gemini call, with no availability probe first"""
+        with patch('app.services.ai_chat_service.settings') as mock_settings:
+            mock_settings.gemini_api_key = "test-key"
+            service = AIChatService()
+        body = {"candidates": [{"content": {"parts": [{"text": "Answer"}]}}]}
+        session = MagicMock()
+        session.post.return_value = FakeStreamResponse(200, body=body)
+        service._get_session = MagicMock(return_value=session)
+
+        assert await service._make_request("prompt") == "Answer"
+        session.post.assert_called_once()
+
+
+class TestResponseCache:
+    @pytest.fixture
+    def service(self):
+        """Chat service with the prompt context and history storage stubbed out"""
+        with patch('app.services.ai_chat_service.settings') as mock_settings:
+            mock_settings.gemini_api_key = "test-key"
+            service = AIChatService()
+        service._build_prompt = AsyncMock(return_value=("context", True))
+        service._store_conversation = AsyncMock()
+        service._make_request = AsyncMock(return_value="Cached answer")
+        return service
+
+    @pytest.mark.asyncio
+    async def test_repeated_question_served_from_cache(self, service):
+        """Test the same question with the same context only reaches Gemini once"""
+        first = await service.chat("user-1", "What is a normal blood sugar?")
+        second = await service.chat("user-1", "  what is a normal BLOOD sugar ")
+
+        assert first["response"] == second["response"] == "Cached answer"
+        service._make_request.assert_awaited_once()
+        assert service._store_conversation.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_cache_is_per_user_and_context(self, service):
+        """Test other users and changed context miss the cache"""
+        await service.chat("user-1", "Question")
+        await service.chat("user-2", "Question")
+        service._build_prompt.return_value = ("new context", True)
+        await service.chat("user-1", "Question")
+
+        assert service._make_request.await_count == 3
+
+
+class FakeCursor:
+    """Chainable stand-in for a Motor cursor over a fixed list of documents"""
+
+    def __init__(self, documents):
+        self._documents = documents
+
+    def sort(self, *args):
+        return self
+
+    def skip(self, *args):
+        return self
+
+    def limit(self, *args):
+        return self
+
+    def batch_size(self, size):
+        self.batch = size
+        return self
+
+    async def to_list(self, length=None):
+        return self._documents[:length]
+
+    def __aiter__(self):
+        async def iterate():
+            for document in self._documents:
+                yield document
+        return iterate()
+
+
+class TestHistoryStream:
+    @pytest.mark.asyncio
+    async def test_streams_messages_from_boundary(self):
+        """Test history is read oldest-first from the limit boundary, in batches"""
+        boundary_date = datetime(2024, 1, 1)
+        conversations = FakeCursor([
+            {"messages": [{"role": "user", "content": "Hi", "timestamp": boundary_date}]},
+            {"messages": [{"role": "assistant", "content": "Hello"}]}
+        ])
+        db = MagicMock()
+        db.chat_history.find.side_effect = [FakeCursor([{"created_at": boundary_date}]), conversations]
+
+        with patch('app.services.ai_chat_service.get_database', AsyncMock(return_value=db)):
+            messages = [m async for m in AIChatService().stream_conversation_history("user-1", limit=2)]
+
+        assert messages == [
+            {"role": "user", "content": "Hi", "timestamp": boundary_date.isoformat()},
+            {"role": "assistant", "content": "Hello", "timestamp": None}
+        ]
+        query = db.chat_history.find.call_args.args[0]
+        assert query == {"user_id": "user-1", "created_at": {"$gte": boundary_date}}
+        assert conversations.batch == 50
@@ -0,0 +1,235 @@
+import pytest
+from motor.motor_asyncio import AsyncIOMotorClient
+from unittest.mock import AsyncMock, MagicMock, patch
+from datetime import timedelta
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from bson import ObjectId
+
+from app.core import auth
+from app.core.security import create_access_token
+from app.models.user import UserInDB
+
+
+class TestCurrentUserCache:
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        """Start every test with an empty user cache"""
+        auth._user_cache.clear()
+        auth._claims_cache.clear()
+        auth._revoked_jtis.clear()
+        auth._auth_service.cache_clear()
+        yield
+        auth._user_cache.clear()
+        auth._claims_cache.clear()
+        auth._revoked_jtis.clear()
+        auth._auth_service.cache_clear()
+
+    @pytest.fixture
+    def db(self):
+        """Database with an empty revoked_tokens collection"""
+        db = MagicMock()
+        db.revoked_tokens.find_one = AsyncMock(return_value=None)
+        db.revoked_tokens.update_one = AsyncMock()
+        return db
+
+    @pytest.fixture
+    def sample_user(self):
+        """Sample authenticated user"""
+        return UserInDB(
+            id=str(ObjectId()),
+            email="test@example.com",
+            full_name="Test User",
+            hashed_password="hashed"
+        )
+
+    @pytest.fixture
+    def credentials(self):
+        """Bearer credentials carrying a valid access token"""
+        token = create_access_token("test@example.com", expires_delta=timedelta(minutes=5))
+        return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+    @pytest.mark.asyncio
+    async def test_repeated_requests_hit_cache(self, credentials, sample_user, db):
+        """Test the DB lookup only runs on the first request for a token"""
+        with patch('app.core.auth.AuthService') as mock_service_cls:
+            mock_service = MagicMock()
+            mock_service.get_user_by_email = AsyncMock(return_value=sample_user)
+            mock_service_cls.return_value = mock_service
+
+            first = await auth.get_current_user(credentials, db=db)
+            second = await auth.get_current_user(credentials, db=db)
+
+            assert first.email == second.email == sample_user.email
+            mock_service.get_user_by_email.assert_called_once_with("test@example.com")
+
+    @pytest.mark.asyncio
+    async def test_invalidate_forces_lookup(self, credentials, sample_user, db):
+        """Test invalidated tokens go back to the database"""
+        with patch('app.core.auth.AuthService') as mock_service_cls:
+            mock_service = MagicMock()
+            mock_service.get_user_by_email = AsyncMock(return_value=sample_user)
+            mock_service_cls.return_value = mock_service
+
+            await auth.get_current_user(credentials, db=db)
+            auth.invalidate_cached_user(credentials.credentials)
+            await auth.get_current_user(credentials, db=db)
+
+            assert mock_service.get_user_by_email.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_invalid_token_not_cached(self):
+        """Test invalid tokens are rejected and never cached"""
+        credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials="invalid_token")
+
+        with pytest.raises(HTTPException) as exc_info:
+            await auth.get_current_user(credentials, db=MagicMock())
+
+        assert exc_info.value.status_code == 401
+        assert len(auth._user_cache) == 0
+
+    @pytest.mark.asyncio
+    async def test_revoked_token_rejected(self, credentials, sample_user, db):
+        """Test a token stops working once it has been revoked"""
+        with patch('app.core.auth.AuthService') as mock_service_cls:
+            mock_service = MagicMock()
+            mock_service.get_user_by_email = AsyncMock(return_value=sample_user)
+            mock_service_cls.return_value = mock_service
+
+            await auth.get_current_user(credentials, db=db)
+            await auth.revoke_token(credentials.credentials, db)
+
+            with pytest.raises(HTTPException) as exc_info:
+                await auth.get_current_user(credentials, db=db)
+
+            assert exc_info.value.status_code == 401
+            db.revoked_tokens.update_one.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_token_revoked_elsewhere_rejected(self, credentials, sample_user, db):
+        """Test tokens revoked by another worker are found in the database"""
+        db.revoked_tokens.find_one = AsyncMock(return_value={"_id": "revoked"})
+
+        with patch('app.core.auth.AuthService') as mock_service_cls:
+            mock_service = MagicMock()
+            mock_service.get_user_by_email = AsyncMock(return_value=sample_user)
+            mock_service_cls.return_value = mock_service
+
+            with pytest.raises(HTTPException) as exc_info:
+                await auth.get_current_user(credentials, db=db)
+
+            assert exc_info.value.status_code == 401
+
+    @pytest.mark.asyncio
+    async def test_cached_token_revoked_elsewhere_rejected(self, credentials, sample_user, db):
+        """Test a token cached here stops working once another worker revokes it"""
+        with patch('app.core.auth.AuthService') as mock_service_cls:
+            mock_service = MagicMock()
+            mock_service.get_user_by_email = AsyncMock(return_value=sample_user)
+            mock_service_cls.return_value = mock_service
+
+            await auth.get_current_user(credentials, db=db)
+            db.revoked_tokens.find_one = AsyncMock(return_value={"_id": "revoked"})
+
+            with pytest.raises(HTTPException) as exc_info:
+                await auth.get_current_user(credentials, db=db)
+
+            assert exc_info.value.status_code == 401
+            assert len(auth._user_cache) == 0
+
+    @pytest.mark.asyncio
+    async def test_optional_user_shares_cache(self, credentials, sample_user, db):
+        """Test the optional dependency resolves through the same cached path"""
+        get_optional_user = auth.get_optional_current_user()
+
+        with patch('app.core.auth.AuthService') as mock_service_cls:
+            mock_service = MagicMock()
+            mock_service.get_user_by_email = AsyncMock(return_value=sample_user)
+            mock_service_cls.return_value = mock_service
+
+            await auth.get_current_user(credentials, db=db)
+            user = await get_optional_user(credentials, db=db)
+
+            assert user.email == sample_user.email
+            mock_service.get_user_by_email.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_optional_user_invalid_token(self, db):
+        """Test the optional dependency returns None instead of raising"""
+        get_optional_user = auth.get_optional_current_user()
+        credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials="invalid_token")
+
+        assert await get_optional_user(credentials, db=db) is None
+
+    @pytest.mark.asyncio
+    async def test_claims_skip_user_lookup(self, sample_user, db):
+        """Test claims come from the token's uid without loading the user"""
+        token = create_access_token(
+            sample_user.email, expires_delta=timedelta(minutes=5), user_id=sample_user.id
+        )
+        credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+        with patch('app.core.auth.AuthService') as mock_service_cls:
+            claims = await auth.get_current_user_claims(credentials, db=db)
+            await auth.get_current_user_claims(credentials, db=db)
+
+            assert claims.id == sample_user.id
+            assert claims.email == sample_user.email
+            mock_service_cls.assert_not_called()
+            # Revocation is still checked on the cached request
+            assert db.revoked_tokens.find_one.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_claims_respect_revocation(self, sample_user, db):
+        """Test revoked tokens are rejected by the claims dependency too"""
+        token = create_access_token(
+            sample_user.email, expires_delta=timedelta(minutes=5), user_id=sample_user.id
+        )
+        credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+        await auth.get_current_user_claims(credentials, db=db)
+        await auth.revoke_token(token, db)
+
+        with pytest.raises(HTTPException) as exc_info:
+            await auth.get_current_user_claims(credentials, db=db)
+
+        assert exc_info.value.status_code == 401
+
+    @pytest.mark.asyncio
+    async def test_claims_fall_back_without_uid(self, credentials, sample_user, db):
+        """Test tokens issued without a uid claim still resolve via the user lookup"""
+        with patch('app.core.auth.AuthService') as mock_service_cls:
+            mock_service = MagicMock()
+            mock_service.get_user_by_email = AsyncMock(return_value=sample_user)
+            mock_service_cls.return_value = mock_service
+
+            claims = await auth.get_current_user_claims(credentials, db=db)
+
+            assert claims.id == sample_user.id
+            mock_service.get_user_by_email.assert_called_once_with("test@example.com")
+
+    @pytest.mark.asyncio
+    async def test_invalidate_user_drops_all_their_tokens(self, sample_user, db):
+        """Test a profile change reaches every token of the user, not just the caller's"""
+        tokens = [
+            HTTPAuthorizationCredentials(scheme="Bearer", credentials=create_access_token(sample_user.email))
+            for _ in range(2)
+        ]
+        with patch('app.core.auth.AuthService') as mock_service_cls:
+            mock_service = MagicMock()
+            mock_service.get_user_by_email = AsyncMock(return_value=sample_user)
+            mock_service_cls.return_value = mock_service
+
+            for credentials in tokens:
+                await auth.get_current_user(credentials, db=db)
+            auth.invalidate_cached_user_id(sample_user.id)
+            for credentials in tokens:
+                await auth.get_current_user(credentials, db=db)
+
+            assert mock_service.get_user_by_email.call_count == 4
+
+    def test_auth_service_shared_across_database_handles(self):
+        """Test equal database handles reuse one AuthService instead of building one per request"""
+        client = AsyncIOMotorClient("mongodb://localhost", connect=False)
+
+        assert auth._auth_service(client["hlra"]) is auth._auth_service(client["hlra"])
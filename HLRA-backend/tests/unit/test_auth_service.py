@@ -3,6 +3,7 @@ from unittest.mock import AsyncMock, MagicMock, patch
 from datetime import datetime
 from fastapi import HTTPException, status
 from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
 
 from app.services.auth_service import AuthService
 from app.models.user import UserCreate, UserLogin, UserUpdate, UserInDB
@@ -33,7 +34,7 @@ class TestAuthService:
         return UserCreate(
             email="test@example.com",
             full_name="Test User",
-            password="testpassword123"
+            password="TestPassword123"
         )
 
     @pytest.fixture
@@ -41,7 +42,7 @@ class TestAuthService:
         """Sample user login data"""
         return UserLogin(
             email="test@example.com",
-            password="testpassword123"
+            password="TestPassword123"
         )
 
     @pytest.fixture
@@ -90,6 +91,35 @@ class TestAuthService:
         assert exc_info.value.status_code == status.HTTP_400_BAD_REQUEST
         assert "Email already registered" in str(exc_info.value.detail)
 
+    @pytest.mark.asyncio
+    async def test_create_user_if_new_success(self, auth_service, mock_collection, sample_user_create):
+        """Test registration inserts without a pre-check query"""
+        mock_result = MagicMock()
+        mock_result.inserted_id = ObjectId()
+        mock_collection.insert_one.return_value = mock_result
+        
+        with patch('app.services.auth_service.get_password_hash') as mock_hash:
+            mock_hash.return_value = "hashed_password"
+            
+            result = await auth_service.create_user_if_new(sample_user_create)
+            
+            assert isinstance(result, UserInDB)
+            assert result.id == str(mock_result.inserted_id)
+            mock_collection.find_one.assert_not_called()
+            mock_collection.insert_one.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_create_user_if_new_existing_email(self, auth_service, mock_collection, sample_user_create):
+        """Test a duplicate email returns None instead of raising"""
+        mock_collection.insert_one.side_effect = DuplicateKeyError("E11000 duplicate key error")
+        
+        with patch('app.services.auth_service.get_password_hash') as mock_hash:
+            mock_hash.return_value = "hashed_password"
+            
+            result = await auth_service.create_user_if_new(sample_user_create)
+            
+            assert result is None
+
     @pytest.mark.asyncio
     async def test_authenticate_user_success(self, auth_service, mock_collection, sample_user_login, sample_user_db):
         """Test successful user authentication"""
@@ -127,6 +157,34 @@ class TestAuthService:
             
             assert result is None
 
+    @pytest.mark.asyncio
+    async def test_verify_login_success(self, auth_service, mock_collection, sample_user_db):
+        """Test login verification reuses the fetched user"""
+        user = UserInDB(**{**sample_user_db, "id": str(sample_user_db["_id"])})
+        
+        with patch('app.services.auth_service.verify_password') as mock_verify:
+            mock_verify.return_value = True
+            
+            result = await auth_service.verify_login(user, "TestPassword123")
+            
+            assert result is user
+            assert result.last_login is not None
+            mock_collection.find_one.assert_not_called()
+            mock_collection.update_one.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_verify_login_wrong_password(self, auth_service, mock_collection, sample_user_db):
+        """Test login verification with wrong password"""
+        user = UserInDB(**{**sample_user_db, "id": str(sample_user_db["_id"])})
+        
+        with patch('app.services.auth_service.verify_password') as mock_verify:
+            mock_verify.return_value = False
+            
+            result = await auth_service.verify_login(user, "WrongPassword123")
+            
+            assert result is None
+            mock_collection.update_one.assert_not_called()
+
     @pytest.mark.asyncio
     async def test_get_user_by_email_success(self, auth_service, mock_collection, sample_user_db):
         """Test getting user by email"""
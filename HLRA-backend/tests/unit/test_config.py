@@ -0,0 +1,24 @@
+from app.core.config import Settings, get_settings
+
+
+class TestSettings:
+    def test_settings_loaded_once(self):
+        """Test every caller shares the one parsed Settings instance"""
+        assert get_settings() is get_settings()
+
+    def test_derived_origins_parsed_once(self):
+        """Test CORS origins are split once and the public URL prefers an HTTPS origin"""
+        settings = Settings(
+            mongodb_url="mongodb://localhost",
+            cors_origins="http://localhost:3000, https://app.example.com/,"
+        )
+
+        assert settings.allowed_origins == ("http://localhost:3000", "https://app.example.com/")
+        assert settings.allowed_origins is settings.allowed_origins
+        assert settings.effective_public_app_url == "https://app.example.com"
+
+    def test_empty_origins_fall_back_to_local_frontends(self):
+        """Test an empty CORS_ORIGINS still allows the local dev servers"""
+        settings = Settings(mongodb_url="mongodb://localhost", cors_origins=" , ")
+
+        assert settings.allowed_origins == ("http://localhost:3000", "http://localhost:5173")
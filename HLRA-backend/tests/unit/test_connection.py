@@ -0,0 +1,42 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from pymongo.errors import OperationFailure
+
+from app.database import connection
+
+
+@pytest.fixture
+def db():
+    """Database whose collections all accept create_index"""
+    db = MagicMock()
+    db.users.create_index = AsyncMock()
+    db.hlra.reports.create_index = AsyncMock()
+    db.hlra.family_profiles.create_index = AsyncMock()
+    for name in ("revoked_tokens", "notifications", "shared_links", "idempotency_keys"):
+        getattr(db, name).create_index = AsyncMock()
+    return db
+
+
+class TestEnsureIndexes:
+    @pytest.mark.asyncio
+    async def test_failed_index_does_not_skip_the_rest(self, db):
+        """Test one failing index is logged and the later ones are still created"""
+        db.revoked_tokens.create_index.side_effect = OperationFailure("conflict")
+
+        with patch.object(connection, "get_database", AsyncMock(return_value=db)), \
+             patch.object(connection, "get_reports_collection", AsyncMock(return_value=db.hlra.reports)), \
+             patch.object(connection, "get_family_profiles_collection", AsyncMock(return_value=db.hlra.family_profiles)):
+            await connection.ensure_indexes()
+
+        db.idempotency_keys.create_index.assert_awaited_once()
+        assert db.hlra.reports.create_index.await_count == 4
+        db.hlra.family_profiles.create_index.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_unique_email_index_failure_aborts(self, db):
+        """Test startup fails when duplicate accounts could no longer be rejected"""
+        db.users.create_index.side_effect = OperationFailure("duplicate key")
+
+        with patch.object(connection, "get_database", AsyncMock(return_value=db)), \
+             pytest.raises(OperationFailure):
+            await connection.ensure_indexes()
@@ -0,0 +1,223 @@
+import pytest
+from datetime import datetime
+from bson import ObjectId
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.models.health_data import LabReport, ParameterCategory, ParameterStatus, TrendData
+from app.services.data_service import DataService, _encode_report_cursor, _decode_report_cursor, data_service
+
+
+class TestReportCursor:
+    def test_cursor_round_trip(self):
+        """Test a cursor decodes back to the report's sort key"""
+        document = {"_id": ObjectId(), "upload_date": datetime(2024, 1, 15, 10, 30)}
+
+        upload_date, report_id = _decode_report_cursor(_encode_report_cursor(document))
+
+        assert upload_date == document["upload_date"]
+        assert report_id == document["_id"]
+
+    def test_malformed_cursor_rejected(self):
+        """Test garbage cursors raise ValueError"""
+        with pytest.raises(ValueError):
+            _decode_report_cursor("not-a-cursor")
+
+
+class TestReportsPage:
+    @pytest.fixture
+    def collection(self):
+        """Reports collection holding three reports, newest first"""
+        documents = [
+            {"_id": ObjectId(), "upload_date": datetime(2024, 1, day)} for day in (3, 2, 1)
+        ]
+        find = MagicMock()
+        find.sort.return_value = find
+        find.limit.side_effect = lambda n: MagicMock(to_list=AsyncMock(return_value=documents[:n]))
+        find.to_list = AsyncMock(return_value=documents)
+        collection = MagicMock()
+        collection.find.return_value = find
+        return collection
+
+    @pytest.mark.asyncio
+    async def test_without_limit_returns_everything(self, collection):
+        """Test the default reads the whole history and has no next page"""
+        with patch('app.services.data_service.get_reports_collection', AsyncMock(return_value=collection)), \
+             patch.object(data_service, "_document_to_lab_report", side_effect=lambda doc: doc):
+            reports, next_cursor = await data_service.get_reports_page("user-1")
+
+        assert len(reports) == 3
+        assert next_cursor is None
+        collection.find.return_value.limit.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_limit_returns_cursor_for_next_page(self, collection):
+        """Test a limited page stops at the limit and points at the next one"""
+        with patch('app.services.data_service.get_reports_collection', AsyncMock(return_value=collection)), \
+             patch.object(data_service, "_document_to_lab_report", side_effect=lambda doc: doc):
+            reports, next_cursor = await data_service.get_reports_page("user-1", limit=2)
+
+        assert len(reports) == 2
+        assert _decode_report_cursor(next_cursor) == (reports[-1]["upload_date"], reports[-1]["_id"])
+
+
+class TestDashboardCounts:
+    @pytest.mark.asyncio
+    async def test_counts_come_from_one_aggregation(self):
+        """Test the dashboard counters are read from facets, with empty facets as zero"""
+        cursor = MagicMock()
+        cursor.to_list = AsyncMock(return_value=[{"total": [{"n": 12}], "this_month": [{"n": 3}], "failed": []}])
+        collection = MagicMock()
+        collection.aggregate = MagicMock(return_value=cursor)
+        since = datetime(2024, 1, 1)
+
+        with patch('app.services.data_service.get_reports_collection', AsyncMock(return_value=collection)):
+            counts = await data_service.get_dashboard_counts("user-1", since=since)
+
+        assert counts == {"total": 12, "this_month": 3, "failed": 0}
+        match, facet = collection.aggregate.call_args.args[0]
+        assert match == {"$match": {"user_id": "user-1"}}
+        assert facet["$facet"]["this_month"][0] == {"$match": {"upload_date": {"$gte": since}}}
+
+
+class TestParameterStats:
+    @pytest.mark.asyncio
+    async def test_parameters_grouped_in_database(self):
+        """Test parameter stats are grouped by name server-side, newest reports first"""
+        cursor = MagicMock()
+        cursor.to_list = AsyncMock(return_value=[{"_id": "Glucose", "total": 2}])
+        collection = MagicMock()
+        collection.aggregate = MagicMock(return_value=cursor)
+
+        with patch('app.services.data_service.get_reports_collection', AsyncMock(return_value=collection)):
+            stats = await data_service.aggregate_parameter_stats("user-1")
+
+        assert stats == [{"_id": "Glucose", "total": 2}]
+        match, sort, unwind, group, order = collection.aggregate.call_args.args[0]
+        assert match == {"$match": {"user_id": "user-1"}}
+        assert sort == {"$sort": {"upload_date": -1}}
+        assert group["$group"]["_id"] == "$parameters.name"
+        assert group["$group"]["high"] == {"$sum": {"$cond": [{"$eq": ["$parameters.status", "high"]}, 1, 0]}}
+
+
+class TestReportMeta:
+    @pytest.mark.asyncio
+    async def test_fetches_only_ownership_fields(self):
+        """Test parameters and raw text are never loaded for access checks"""
+        object_id = ObjectId()
+        collection = MagicMock()
+        collection.find_one = AsyncMock(return_value={
+            "_id": object_id, "user_id": "u1", "filename": "lab.pdf", "file_path": "uploads/lab.pdf"
+        })
+
+        with patch('app.services.data_service.get_reports_collection', AsyncMock(return_value=collection)):
+            meta = await data_service.get_report_meta(str(object_id))
+
+        assert meta == {
+            "id": str(object_id), "user_id": "u1", "profile_id": None,
+            "filename": "lab.pdf", "file_path": "uploads/lab.pdf"
+        }
+        projection = collection.find_one.call_args.kwargs["projection"]
+        assert "parameters" not in projection and "raw_text" not in projection
+
+
+class TestStarredReports:
+    @pytest.mark.asyncio
+    async def test_failure_returns_empty_list(self):
+        """Test the starred listing always hands the endpoint a list"""
+        with patch('app.services.data_service.get_reports_collection', AsyncMock(side_effect=RuntimeError("down"))):
+            reports = await data_service.get_starred_reports_by_user_and_profile("u1", "p1")
+
+        assert reports == []
+
+
+class TestTrendCache:
+    @pytest.fixture
+    def service(self):
+        """Fresh service so cached trends don't leak between tests"""
+        return DataService()
+
+    @pytest.mark.asyncio
+    async def test_repeat_request_served_from_cache(self, service):
+        """Test a user's trend is queried once until their reports change"""
+        trend = TrendData(parameter_name="glucose", data_points=[], trend_direction="stable")
+        service._query_trend_data = AsyncMock(return_value=trend)
+
+        assert await service.get_trend_data("glucose", "u1") is trend
+        assert await service.get_trend_data("Glucose", "u1") is trend
+        service._query_trend_data.assert_awaited_once()
+
+        service.invalidate_trends("u1")
+        await service.get_trend_data("glucose", "u1")
+        assert service._query_trend_data.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_failures_not_cached(self, service):
+        """Test an error falls back to an empty trend without sticking"""
+        service._query_trend_data = AsyncMock(side_effect=RuntimeError("down"))
+
+        trend = await service.get_trend_data("glucose", "u1")
+
+        assert trend.data_points == []
+        assert service._trend_cache.get("u1") is None
+
+
+    @pytest.mark.asyncio
+    async def test_query_builds_points_from_projected_reports(self, service):
+        """Test trend points come from the matching parameter of each report, oldest first"""
+        documents = [
+            {"created_at": datetime(2024, 1, 1), "extracted_data": {"parameters": [{"name": "Glucose", "value": 90}]}},
+            {"created_at": datetime(2024, 2, 1), "extracted_data": {"parameters": [{"name": "HDL", "value": 50}]}},
+            {"created_at": datetime(2024, 2, 15), "extracted_data": {"parameters": [{"name": "Glucose", "value": "trace"}]}},
+            {"created_at": datetime(2024, 3, 1), "extracted_data": {"parameters": [{"name": "glucose", "value": "130"}]}}
+        ]
+        collection = MagicMock()
+        cursor = collection.find.return_value.sort.return_value
+        cursor.to_list = AsyncMock(return_value=documents)
+
+        with patch('app.services.data_service.get_reports_collection', AsyncMock(return_value=collection)):
+            trend = await service._query_trend_data("glucose", "u1")
+
+        assert [(p.date.month, p.value, p.status) for p in trend.data_points] == [
+            (1, 90.0, ParameterStatus.NORMAL), (3, 130.0, ParameterStatus.HIGH)
+        ]
+        assert trend.trend_direction == "declining"
+        projection = collection.find.call_args.args[1]
+        assert projection["_id"] == 0 and "extracted_data.parameters.value" in projection
+
+class TestDocumentToLabReport:
+    def test_stored_report_rebuilt_without_validation_drift(self):
+        """Test a stored report converts to the same JSON a validated LabReport gives"""
+        document = {
+            "_id": ObjectId(),
+            "user_id": "user-1",
+            "filename": "stored.pdf",
+            "original_filename": "report.pdf",
+            "file_path": "uploads/stored.pdf",
+            "file_type": "pdf",
+            "file_size": 1024,
+            "upload_date": datetime(2024, 1, 15),
+            "processing_status": "completed",
+            "parameters": [
+                {"id": "p1", "name": "Glucose", "value": 95, "unit": "mg/dL", "status": "normal", "category": "blood"},
+                {"id": "p2", "name": "Notes", "value": "trace", "status": "high"}
+            ]
+        }
+
+        report = DataService()._document_to_lab_report(document)
+
+        validated = LabReport(**{**document, "id": str(document["_id"])})
+        assert report.model_dump_json() == validated.model_dump_json()
+        assert report.parameters[0].status == ParameterStatus.NORMAL
+        assert report.parameters[0].category == ParameterCategory.BLOOD
+
+    def test_validated_parameters_get_ids(self):
+        """Test nested parameters validated from dicts still get an id when they lack one"""
+        report = LabReport(
+            user_id="user-1", filename="f.pdf", original_filename="f.pdf", file_path="uploads/f.pdf",
+            upload_date=datetime(2024, 1, 15), processing_status="completed", file_size=1, file_type="pdf",
+            parameters=[{"name": "Glucose", "value": 95, "status": "normal"}, {"id": "p2", "name": "HDL", "value": 50, "status": "low"}]
+        )
+
+        assert report.id and report.parameters[0].id
+        assert report.parameters[1].id == "p2"
+        assert report.parameters[0].value == 95.0
@@ -0,0 +1,123 @@
+import pytest
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+from fastapi import BackgroundTasks, FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from app.api.v1.endpoints import extraction
+from app.api.v1.endpoints.extraction import ExtractRequest, extract_data, stream_extraction_status
+from app.database.connection import get_database
+from app.models.health_data import FileStatus, LabReport
+
+
+def make_report(status=FileStatus.UPLOADING):
+    return LabReport(
+        id="r1",
+        user_id="u1",
+        filename="lab.pdf",
+        original_filename="lab.pdf",
+        file_path="uploads/lab.pdf",
+        upload_date=datetime(2024, 1, 15, 10, 30),
+        processing_status=status,
+        file_size=1024,
+        file_type="application/pdf"
+    )
+
+
+@pytest.fixture
+def data_service(monkeypatch):
+    """data_service with a single stored report owned by u1"""
+    service = MagicMock()
+    service.get_report = AsyncMock(return_value=make_report())
+    service.claim_report_for_processing = AsyncMock(return_value=True)
+    monkeypatch.setattr(extraction, "data_service", service)
+    return service
+
+
+class TestExtractData:
+    @pytest.mark.asyncio
+    async def test_owner_starts_extraction(self, data_service):
+        """Test the owner's request claims the report and schedules processing"""
+        background_tasks = BackgroundTasks()
+        record = MagicMock(save=AsyncMock())
+
+        response = await extract_data(
+            ExtractRequest(fileId="r1"), background_tasks, MagicMock(id="u1"), record
+        )
+
+        assert response["status"] == FileStatus.PROCESSING.value
+        data_service.claim_report_for_processing.assert_awaited_once_with("r1")
+        assert len(background_tasks.tasks) == 1
+        record.save.assert_awaited_once_with(response)
+
+    @pytest.mark.asyncio
+    async def test_other_users_report_is_not_found(self, data_service):
+        """Test another user's report is neither claimed nor revealed"""
+        background_tasks = BackgroundTasks()
+
+        with pytest.raises(HTTPException) as exc_info:
+            await extract_data(
+                ExtractRequest(fileId="r1"), background_tasks, MagicMock(id="u2"), None
+            )
+
+        assert exc_info.value.status_code == 404
+        data_service.claim_report_for_processing.assert_not_called()
+        assert background_tasks.tasks == []
+
+
+class TestStreamExtractionStatus:
+    @pytest.mark.asyncio
+    async def test_owner_gets_stream(self, data_service):
+        """Test the owner's request is answered with an event stream"""
+        data_service.get_report.return_value = make_report(FileStatus.COMPLETED)
+
+        response = await stream_extraction_status("r1", MagicMock(id="u1"))
+
+        assert response.media_type == "text/event-stream"
+
+    @pytest.mark.asyncio
+    async def test_other_users_report_is_not_found(self, data_service):
+        """Test another user's report is not streamed"""
+        with pytest.raises(HTTPException) as exc_info:
+            await stream_extraction_status("r1", MagicMock(id="u2"))
+
+        assert exc_info.value.status_code == 404
+
+
+class TestExtractionWebSocket:
+    @pytest.fixture
+    def client(self, data_service, monkeypatch):
+        """Client whose tokens resolve to users named by the token itself"""
+        async def authenticate(credentials, db):
+            if credentials is None or credentials.credentials == "bad":
+                raise HTTPException(status_code=401, detail="Could not validate credentials")
+            return MagicMock(id=credentials.credentials, is_active=True)
+
+        monkeypatch.setattr(extraction, "_authenticate", authenticate)
+        data_service.get_report.return_value = make_report(FileStatus.COMPLETED)
+        app = FastAPI()
+        app.include_router(extraction.router)
+        app.dependency_overrides[get_database] = lambda: MagicMock()
+        return TestClient(app)
+
+    def test_owner_receives_status(self, client):
+        """Test the owner's socket gets the current status before it closes"""
+        with client.websocket_connect("/extraction/r1/ws", subprotocols=["bearer", "u1"]) as websocket:
+            assert websocket.accepted_subprotocol == "bearer"
+            assert websocket.receive_json()["status"] == FileStatus.COMPLETED.value
+
+    @pytest.mark.parametrize("subprotocols", [None, ["bearer", "bad"], ["bearer", "u2"], ["chat", "u1"]])
+    def test_rejected_before_accept(self, client, subprotocols):
+        """Test missing or bad tokens and other users' reports are refused"""
+        with pytest.raises(WebSocketDisconnect) as exc_info:
+            with client.websocket_connect("/extraction/r1/ws", subprotocols=subprotocols):
+                pass
+
+        assert exc_info.value.code == 1008
+
+    def test_token_in_query_is_ignored(self, client):
+        """Test the token is not taken from the URL, where it would be logged"""
+        with pytest.raises(WebSocketDisconnect):
+            with client.websocket_connect("/extraction/r1/ws?token=u1"):
+                pass
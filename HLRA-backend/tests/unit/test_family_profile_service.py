@@ -0,0 +1,227 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from pydantic import ValidationError
+from pymongo.errors import DuplicateKeyError
+
+from app.models.family_profile import (
+    FAMILY_PERMISSIONS,
+    SELF_PERMISSIONS,
+    FamilyProfile,
+    FamilyProfileCreate,
+    FamilyProfileUpdate,
+    SystemRelationshipType
+)
+from app.models.user import User
+from app.services.family_profile_service import FamilyProfileService
+
+
+class TestSelfProfile:
+    @pytest.fixture
+    def user(self):
+        """User without any stored profiles"""
+        return User(email="test@example.com", full_name="Test User", hashed_password="hashed")
+
+    @pytest.fixture
+    def service(self):
+        """Service bound to mocked profile collections"""
+        service = FamilyProfileService()
+        service._profiles_collection = MagicMock()
+        service.set_active_profile = AsyncMock(return_value=True)
+        return service
+
+    def test_build_self_profile_is_in_memory(self, service, user):
+        """Test building the self profile touches no collection"""
+        profile = service.build_self_profile(user)
+
+        assert profile.user_id == user.id
+        assert profile.name == "Test User"
+        assert profile.relationship == SystemRelationshipType.SELF
+        assert service._profiles_collection.method_calls == []
+
+    @pytest.mark.asyncio
+    async def test_save_self_profile_returns_stored_profile(self, service, user):
+        """Test saving converges on the already stored self profile"""
+        profile = service.build_self_profile(user)
+        existing = service.build_self_profile(user).dict()
+        existing["id"] = "existing-self"
+        collection = service._profiles_collection
+        collection.find_one_and_update = AsyncMock(return_value=existing)
+
+        saved = await service.save_self_profile(profile)
+
+        assert saved.id == "existing-self"
+        query, update = collection.find_one_and_update.call_args.args
+        assert query == {"user_id": user.id, "relationship": SystemRelationshipType.SELF, "is_active": True}
+        assert update["$setOnInsert"]["id"] == profile.id
+        assert collection.find_one_and_update.call_args.kwargs["upsert"] is True
+        service.set_active_profile.assert_awaited_once_with(user.id, "existing-self")
+
+    @pytest.mark.asyncio
+    async def test_save_self_profile_after_lost_race(self, service, user):
+        """Test a duplicate-key upsert falls back to the concurrently stored profile"""
+        profile = service.build_self_profile(user)
+        existing = service.build_self_profile(user).dict()
+        existing["id"] = "existing-self"
+        collection = service._profiles_collection
+        collection.find_one_and_update = AsyncMock(side_effect=DuplicateKeyError("E11000"))
+        collection.find_one = AsyncMock(return_value=existing)
+
+        saved = await service.save_self_profile(profile)
+
+        assert saved.id == "existing-self"
+        service.set_active_profile.assert_awaited_once_with(user.id, "existing-self")
+
+    @pytest.mark.asyncio
+    async def test_save_self_profile_fails_when_winner_is_gone(self, service, user):
+        """Test a lost race whose winning profile vanished is an error, not a bad model"""
+        collection = service._profiles_collection
+        collection.find_one_and_update = AsyncMock(side_effect=DuplicateKeyError("E11000"))
+        collection.find_one = AsyncMock(return_value=None)
+
+        with pytest.raises(Exception, match="changed while being saved"):
+            await service.save_self_profile(service.build_self_profile(user))
+
+        service.set_active_profile.assert_not_called()
+
+
+class TestProfileWrites:
+    @pytest.fixture
+    def service(self):
+        """Service bound to mocked profile collections"""
+        service = FamilyProfileService()
+        service._profiles_collection = MagicMock()
+        service.get_active_profile_id = AsyncMock(return_value="other-profile")
+        return service
+
+    @pytest.mark.asyncio
+    async def test_second_self_profile_is_stored_as_family(self, service):
+        """Test a self-labelled profile for a user who already has one becomes family"""
+        collection = service._profiles_collection
+        collection.insert_one = AsyncMock(side_effect=[
+            DuplicateKeyError("E11000"), MagicMock(inserted_id="new")
+        ])
+        service.get_profiles_by_user = AsyncMock(return_value=[MagicMock(), MagicMock()])
+
+        profile = await service.create_profile("user-1", FamilyProfileCreate(name="Me", relationship_label="Self"))
+
+        assert profile.relationship == SystemRelationshipType.FAMILY
+        assert profile.permissions == FAMILY_PERMISSIONS
+        stored = collection.insert_one.call_args.args[0]
+        assert stored["relationship"] == SystemRelationshipType.FAMILY
+
+    @pytest.mark.asyncio
+    async def test_update_returns_updated_document(self, service):
+        """Test updates read the profile back in the same call"""
+        user = User(email="test@example.com", full_name="Test User", hashed_password="hashed")
+        stored = FamilyProfileService().build_self_profile(user).dict()
+        stored["name"] = "Renamed"
+        collection = service._profiles_collection
+        collection.find_one_and_update = AsyncMock(return_value=stored)
+        collection.find_one = AsyncMock()
+
+        profile = await service.update_profile(stored["id"], user.id, FamilyProfileUpdate(name="Renamed"))
+
+        assert profile.name == "Renamed"
+        collection.find_one.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_delete_excludes_self_profile_in_filter(self, service):
+        """Test deletion is one update that can never match the self profile"""
+        collection = service._profiles_collection
+        collection.update_one = AsyncMock(return_value=MagicMock(matched_count=0))
+
+        assert await service.delete_profile("profile-1", "user-1") is False
+
+        query = collection.update_one.call_args.args[0]
+        assert query["relationship"] == {"$ne": SystemRelationshipType.SELF}
+
+
+class TestActiveProfileCache:
+    @pytest.fixture
+    def service(self):
+        """Service whose active profile resolves to a stored self profile"""
+        service = FamilyProfileService()
+        user = User(email="test@example.com", full_name="Test User", hashed_password="hashed")
+        self.profile = service.build_self_profile(user)
+        service.get_active_profile_id = AsyncMock(return_value=self.profile.id)
+        service.get_profile_by_id = AsyncMock(return_value=self.profile)
+        return service
+
+    @pytest.mark.asyncio
+    async def test_active_profile_cached(self, service):
+        """Test repeated lookups of the active profile skip the database"""
+        first = await service.get_active_profile(self.profile.user_id)
+        second = await service.get_active_profile(self.profile.user_id)
+
+        assert first is second is self.profile
+        service.get_active_profile_id.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_set_active_profile_evicts_cache(self, service):
+        """Test switching profiles is seen by the next lookup"""
+        service._user_profile_settings_collection = MagicMock()
+        service._user_profile_settings_collection.update_one = AsyncMock()
+
+        await service.get_active_profile(self.profile.user_id)
+        await service.set_active_profile(self.profile.user_id, self.profile.id)
+        await service.get_active_profile(self.profile.user_id)
+
+        assert service.get_active_profile_id.await_count == 2
+
+
+class TestOwnsProfile:
+    @pytest.fixture
+    def service(self):
+        """Service whose profile collection finds one matching profile"""
+        service = FamilyProfileService()
+        service._profiles_collection = MagicMock()
+        service._profiles_collection.count_documents = AsyncMock(return_value=1)
+        return service
+
+    @pytest.mark.asyncio
+    async def test_concurrent_checks_share_one_query(self, service):
+        """Test simultaneous checks of the same profile cost a single lookup"""
+        results = await asyncio.gather(*(service.owns_profile("p1", "u1") for _ in range(5)))
+
+        assert results == [True] * 5
+        service._profiles_collection.count_documents.assert_awaited_once()
+        assert service._ownership_lookups == {}
+
+    @pytest.mark.asyncio
+    async def test_ownership_cached_until_delete(self, service):
+        """Test confirmed ownership is reused and dropped when the profile is deleted"""
+        collection = service._profiles_collection
+        collection.update_one = AsyncMock(return_value=MagicMock(matched_count=1))
+        service.get_active_profile_id = AsyncMock(return_value="other")
+
+        await service.owns_profile("p1", "u1")
+        await service.owns_profile("p1", "u1")
+        assert collection.count_documents.await_count == 1
+
+        await service.delete_profile("p1", "u1")
+        collection.count_documents.return_value = 0
+
+        assert await service.owns_profile("p1", "u1") is False
+
+    @pytest.mark.asyncio
+    async def test_foreign_profile_not_cached(self, service):
+        """Test a failed check is asked again next time"""
+        service._profiles_collection.count_documents.return_value = 0
+
+        assert await service.owns_profile("p1", "u2") is False
+        assert await service.owns_profile("p1", "u2") is False
+        assert service._profiles_collection.count_documents.await_count == 2
+
+
+class TestProfilePermissions:
+    def test_profiles_share_frozen_permission_sets(self):
+        """Test profiles reuse the two prebuilt permission sets, which can't be modified"""
+        own = FamilyProfile(user_id="user-1", name="Me", relationship=SystemRelationshipType.SELF)
+        mom = FamilyProfile(user_id="user-1", name="Mom", relationship=SystemRelationshipType.FAMILY)
+
+        assert own.permissions is SELF_PERMISSIONS
+        assert mom.permissions is FAMILY_PERMISSIONS
+        assert own.permissions.can_invite_users and not mom.permissions.can_share_reports
+        with pytest.raises(ValidationError):
+            mom.permissions.can_share_reports = True
@@ -0,0 +1,40 @@
+import io
+import pytest
+from unittest.mock import patch
+from fastapi import UploadFile
+
+from app.core.config import settings
+from app.core.exceptions import ValidationError
+from app.services.file_service import FileService
+
+
+def make_upload(content: bytes, filename: str = "report.pdf") -> UploadFile:
+    """Upload whose size is unknown up front, like a chunked request body"""
+    return UploadFile(file=io.BytesIO(content), filename=filename)
+
+
+class TestSaveFile:
+    @pytest.fixture(autouse=True)
+    def small_limits(self, tmp_path):
+        """Write into a temporary upload dir with a 1 KB limit"""
+        with patch.object(settings, "upload_dir", str(tmp_path)), \
+             patch.object(settings, "max_file_size", 1024), \
+             patch('app.services.file_service.UPLOAD_CHUNK_SIZE', 256):
+            yield
+
+    @pytest.mark.asyncio
+    async def test_saves_file_and_size(self, tmp_path):
+        """Test the upload is copied to disk and its size recorded"""
+        report = await FileService().save_file(make_upload(b"x" * 1000), "user-1")
+
+        assert report.file_size == 1000
+        with open(report.file_path, "rb") as saved:
+            assert saved.read() == b"x" * 1000
+
+    @pytest.mark.asyncio
+    async def test_oversized_upload_rejected_while_streaming(self, tmp_path):
+        """Test a too-large body is refused without leaving a partial file"""
+        with pytest.raises(ValidationError):
+            await FileService().save_file(make_upload(b"x" * 2000), "user-1")
+
+        assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,37 @@
+from datetime import datetime
+
+from app.models.notification import Notification, NotificationResponse, NotificationType
+from app.utils.helpers import construct_from
+
+
+class TestConstructFrom:
+    def test_copies_declared_fields_only(self):
+        """Test the response gets the source's values for its own fields"""
+        notification = Notification(
+            user_id="user-1",
+            type=NotificationType.REPORT_READY,
+            title="Report ready",
+            message="Your report has been processed"
+        )
+
+        response = construct_from(NotificationResponse, notification)
+
+        assert isinstance(response, NotificationResponse)
+        assert response.id == notification.id
+        assert response.created_at == notification.created_at
+        assert not hasattr(response, "user_id")
+
+    def test_serializes_like_validated_model(self):
+        """Test the constructed model dumps exactly like a validated one"""
+        notification = Notification(
+            user_id="user-1",
+            type=NotificationType.SYSTEM,
+            title="Hello",
+            message="World",
+            created_at=datetime(2024, 1, 1)
+        )
+
+        constructed = construct_from(NotificationResponse, notification)
+        validated = NotificationResponse(**notification.dict())
+
+        assert constructed.model_dump_json() == validated.model_dump_json()
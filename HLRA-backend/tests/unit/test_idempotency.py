@@ -0,0 +1,106 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from fastapi import HTTPException
+from pymongo.errors import DuplicateKeyError
+import orjson
+
+from app.core.idempotency import IdempotentReplay, idempotency
+from app.models.file_models import FileProcessingStatus
+
+
+class TestIdempotency:
+    @pytest.fixture
+    def user(self):
+        """Authenticated caller"""
+        return MagicMock(id="user-1")
+
+    @pytest.fixture
+    def db(self):
+        """Database with an empty idempotency_keys collection"""
+        db = MagicMock()
+        db.idempotency_keys.insert_one = AsyncMock()
+        db.idempotency_keys.update_one = AsyncMock()
+        db.idempotency_keys.delete_one = AsyncMock()
+        db.idempotency_keys.find_one = AsyncMock(return_value=None)
+        return db
+
+    def make_request(self, key=None):
+        request = MagicMock()
+        request.method = "POST"
+        request.url.path = "/api/v1/notifications"
+        request.headers = {"Idempotency-Key": key} if key else {}
+        return request
+
+    @pytest.mark.asyncio
+    async def test_no_header_yields_none(self, user, db):
+        """Test requests without the header are not tracked"""
+        dependency = idempotency(self.make_request(), user, db)
+
+        assert await dependency.__anext__() is None
+        db.idempotency_keys.insert_one.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_saved_response_is_kept(self, user, db):
+        """Test the claimed key stores the endpoint's response"""
+        dependency = idempotency(self.make_request("abc"), user, db)
+
+        record = await dependency.__anext__()
+        await record.save({"id": "n1"})
+        with pytest.raises(StopAsyncIteration):
+            await dependency.__anext__()
+
+        claimed = db.idempotency_keys.insert_one.call_args.args[0]
+        assert claimed["_id"] == "user-1:POST:/api/v1/notifications:abc"
+        update = db.idempotency_keys.update_one.call_args.args[1]["$set"]
+        assert update["body"] == b'{"id":"n1"}'
+        db.idempotency_keys.delete_one.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_saved_model_matches_response_json(self, user, db):
+        """Test a saved model replays as the same JSON its route would have sent"""
+        dependency = idempotency(self.make_request("abc"), user, db)
+        status = FileProcessingStatus(
+            file_id="f1", status="completed", progress=100, message="done", parameters_found=3
+        )
+
+        record = await dependency.__anext__()
+        await record.save(status)
+
+        update = db.idempotency_keys.update_one.call_args.args[1]["$set"]
+        assert orjson.loads(update["body"]) == status.model_dump(mode="json")
+
+    @pytest.mark.asyncio
+    async def test_failed_request_releases_key(self, user, db):
+        """Test a key whose request failed can be retried"""
+        dependency = idempotency(self.make_request("abc"), user, db)
+
+        await dependency.__anext__()
+        with pytest.raises(RuntimeError):
+            await dependency.athrow(RuntimeError("boom"))
+
+        db.idempotency_keys.delete_one.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_completed_key_replays(self, user, db):
+        """Test a repeated key replays the stored response"""
+        db.idempotency_keys.insert_one = AsyncMock(side_effect=DuplicateKeyError("dup"))
+        db.idempotency_keys.find_one = AsyncMock(
+            return_value={"completed": True, "body": b'{"id":"n1"}', "status_code": 200}
+        )
+
+        with pytest.raises(IdempotentReplay) as exc_info:
+            await idempotency(self.make_request("abc"), user, db).__anext__()
+
+        assert exc_info.value.body == b'{"id":"n1"}'
+        assert exc_info.value.status_code == 200
+
+    @pytest.mark.asyncio
+    async def test_in_flight_key_conflicts(self, user, db):
+        """Test a key whose first request is still running gets 409"""
+        db.idempotency_keys.insert_one = AsyncMock(side_effect=DuplicateKeyError("dup"))
+        db.idempotency_keys.find_one = AsyncMock(return_value={"completed": False})
+
+        with pytest.raises(HTTPException) as exc_info:
+            await idempotency(self.make_request("abc"), user, db).__anext__()
+
+        assert exc_info.value.status_code == 409
@@ -0,0 +1,32 @@
+import pytest
+from starlette.requests import Request
+
+from app.core.config import settings
+from app.main import unhandled_exception_handler
+
+
+def make_request(origin):
+    headers = [(b"origin", origin.encode())] if origin else []
+    return Request({"type": "http", "method": "GET", "path": "/api/v1/reports", "headers": headers})
+
+
+class TestUnhandledExceptionHandler:
+    @pytest.mark.asyncio
+    async def test_allowed_origin_gets_cors_headers(self):
+        """Test 500s stay readable for the frontend despite bypassing CORSMiddleware"""
+        origin = settings.allowed_origins[0]
+
+        response = await unhandled_exception_handler(make_request(origin), RuntimeError("boom"))
+
+        assert response.status_code == 500
+        assert response.headers["Access-Control-Allow-Origin"] == origin
+        assert response.headers["Access-Control-Allow-Credentials"] == "true"
+
+    @pytest.mark.parametrize("origin", [None, "https://evil.example.com"])
+    @pytest.mark.asyncio
+    async def test_other_origins_get_none(self, origin):
+        """Test unknown or missing origins are not granted access"""
+        response = await unhandled_exception_handler(make_request(origin), RuntimeError("boom"))
+
+        assert response.status_code == 500
+        assert "Access-Control-Allow-Origin" not in response.headers
@@ -0,0 +1,125 @@
+import pytest
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+from app.models.health_data import HealthParameter
+from app.models.notification import Notification, NotificationPriority, NotificationType
+from app.services.notification_service import NotificationService
+
+
+class TestNotificationService:
+    @pytest.fixture
+    def service(self):
+        """Service bound to a mocked notifications collection"""
+        service = NotificationService()
+        service._notifications_collection = MagicMock()
+        return service
+
+    @pytest.fixture
+    def notification_doc(self):
+        """Stored notification document as returned by the aggregation"""
+        return {
+            "_id": "object-id",
+            "id": "n1",
+            "user_id": "user-1",
+            "type": "system",
+            "priority": "critical",
+            "title": "Critical result",
+            "message": "Please review your latest report",
+            "is_read": False
+        }
+
+    @pytest.mark.asyncio
+    async def test_bundle_reads_all_facets(self, service, notification_doc):
+        """Test the page and its counters come from one aggregation"""
+        collection = service._notifications_collection
+        cursor = MagicMock()
+        cursor.to_list = AsyncMock(return_value=[{
+            "items": [notification_doc],
+            "total": [{"n": 120}],
+            "unread": [{"n": 7}],
+            "critical": [{"n": 1}]
+        }])
+        collection.aggregate = MagicMock(return_value=cursor)
+
+        notifications, total, unread_count, has_critical = await service.get_notifications_bundle(
+            "user-1", profile_id="profile-1", limit=10, offset=20
+        )
+
+        assert [n.id for n in notifications] == ["n1"]
+        assert (total, unread_count, has_critical) == (120, 7, True)
+        collection.aggregate.assert_called_once()
+
+        match, facet = collection.aggregate.call_args.args[0]
+        assert match["$match"]["user_id"] == "user-1"
+        assert match["$match"]["profile_id"] == "profile-1"
+        assert {"$skip": 20} in facet["$facet"]["items"]
+        assert {"$limit": 10} in facet["$facet"]["items"]
+        assert facet["$facet"]["critical"][0] == {"$match": {"is_read": False, "priority": "critical"}}
+
+    @pytest.mark.asyncio
+    async def test_bundle_empty_facets(self, service):
+        """Test empty count facets read as zero"""
+        cursor = MagicMock()
+        cursor.to_list = AsyncMock(return_value=[{"items": [], "total": [], "unread": [], "critical": []}])
+        service._notifications_collection.aggregate = MagicMock(return_value=cursor)
+
+        result = await service.get_notifications_bundle("user-1", unread_only=True)
+
+        assert result == ([], 0, 0, False)
+
+    @pytest.mark.asyncio
+    async def test_bundle_failure_returns_empty(self, service):
+        """Test a failing aggregation does not break the notification list"""
+        service._notifications_collection.aggregate = MagicMock(side_effect=Exception("boom"))
+
+        assert await service.get_notifications_bundle("user-1") == ([], 0, 0, False)
+
+    @pytest.mark.asyncio
+    async def test_mark_many_as_read_single_update(self, service):
+        """Test marking several notifications read is one update scoped to the user"""
+        collection = service._notifications_collection
+        collection.update_many = AsyncMock(return_value=MagicMock(modified_count=2))
+
+        count = await service.mark_many_as_read("user-1", ["n1", "n2"])
+
+        assert count == 2
+        collection.update_many.assert_awaited_once()
+        query, update = collection.update_many.call_args.args
+        assert query == {"id": {"$in": ["n1", "n2"]}, "user_id": "user-1", "is_read": False}
+        assert update["$set"]["is_read"] is True
+
+    @pytest.mark.asyncio
+    async def test_health_alerts_inserted_in_one_write(self, service):
+        """Test a report's alerts go out as a single unordered bulk insert"""
+        collection = service._notifications_collection
+        collection.insert_many = AsyncMock(return_value=MagicMock(inserted_ids=["a", "b"]))
+        parameters = [
+            HealthParameter(name="Glucose", value=180, status="high"),
+            HealthParameter(name="Potassium", value=7.1, status="critical")
+        ]
+
+        created = await service.create_health_alerts("user-1", "profile-1", "report-1", parameters)
+
+        assert created == 2
+        documents = collection.insert_many.call_args.args[0]
+        assert [doc["data"]["parameter"] for doc in documents] == ["Glucose", "Potassium"]
+        assert [doc["priority"] for doc in documents] == ["normal", "high"]
+        assert collection.insert_many.call_args.kwargs == {"ordered": False}
+
+    @pytest.mark.asyncio
+    async def test_no_alerts_skips_insert(self, service):
+        """Test a report without abnormal parameters writes nothing"""
+        service._notifications_collection.insert_many = AsyncMock()
+
+        assert await service.create_health_alerts("user-1", "profile-1", "report-1", []) == 0
+        service._notifications_collection.insert_many.assert_not_called()
+
+    def test_stored_notification_rebuilt_with_enums(self, notification_doc):
+        """Test stored notifications come back with their enums, without re-validation"""
+        notification_doc["created_at"] = datetime(2024, 1, 15, 10, 30)
+        notification = Notification.from_document(notification_doc)
+
+        assert notification.type == NotificationType.SYSTEM
+        assert notification.priority == NotificationPriority.CRITICAL
+        assert notification.model_dump_json() == Notification(**notification_doc).model_dump_json()
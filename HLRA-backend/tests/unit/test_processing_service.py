@@ -0,0 +1,45 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.models.health_data import HealthParameter, ParameterStatus
+from app.services.processing_service import ProcessingService, extract_report_data
+
+
+class TestExtractReportData:
+    def test_returns_text_and_parameters(self):
+        """Test OCR output is parsed in the same worker call"""
+        parameter = HealthParameter(name="Glucose", value=95, status=ParameterStatus.NORMAL)
+        with patch('app.services.ocr_service.ocr_service.extract_text_from_file', return_value="Glucose 95"), \
+             patch('app.services.extraction_service.extraction_service.extract_parameters', return_value=[parameter]):
+            raw_text, parameters = extract_report_data("report.pdf")
+
+        assert raw_text == "Glucose 95"
+        assert parameters == [parameter]
+
+    def test_failures_raised_as_plain_errors(self):
+        """Test errors keep their message but can always cross the process boundary"""
+        with pytest.raises(RuntimeError, match="Unsupported file type"):
+            extract_report_data("report.txt")
+
+
+class TestProcessingService:
+    @pytest.mark.asyncio
+    async def test_falls_back_to_threadpool_without_pool(self):
+        """Test extraction still works when the worker pool was never started"""
+        with patch('app.services.processing_service.extract_report_data', return_value=("text", [])) as extract:
+            assert await ProcessingService().extract("report.pdf") == ("text", [])
+
+        extract.assert_called_once_with("report.pdf")
+
+    @pytest.mark.asyncio
+    async def test_shutdown_waits_off_the_event_loop(self):
+        """Test the pool is shut down in the threadpool and dropped right away"""
+        service = ProcessingService()
+        pool = MagicMock()
+        service._pool = pool
+
+        with patch('app.services.processing_service.run_in_threadpool', AsyncMock()) as run:
+            await service.shutdown()
+
+        run.assert_awaited_once_with(pool.shutdown, wait=True, cancel_futures=True)
+        assert service._pool is None
@@ -0,0 +1,55 @@
+import pytest
+from datetime import datetime
+
+from app.models.health_data import FileStatus, LabReport
+from app.services.progress_service import ProgressService, build_processing_status
+
+
+class TestProgressService:
+    @pytest.fixture
+    def report(self):
+        """Report that is still being processed"""
+        return LabReport(
+            user_id="user-1",
+            filename="report.pdf",
+            original_filename="report.pdf",
+            file_path="/tmp/report.pdf",
+            file_type="application/pdf",
+            file_size=1024,
+            upload_date=datetime(2024, 1, 1),
+            processing_status=FileStatus.PROCESSING
+        )
+
+    def test_build_processing_status(self, report):
+        """Test progress is derived from the processing status"""
+        status = build_processing_status(report)
+
+        assert status.file_id == report.id
+        assert status.status == "processing"
+        assert status.progress == 60
+        assert status.parameters_found == 0
+
+    @pytest.mark.asyncio
+    async def test_publish_reaches_subscribers(self, report):
+        """Test subscribers of a report receive its status updates"""
+        service = ProgressService()
+        queue = service.subscribe(report.id)
+
+        report.processing_status = FileStatus.COMPLETED
+        service.publish(report)
+
+        update = queue.get_nowait()
+        assert update.status == "completed"
+        assert update.progress == 100
+
+    @pytest.mark.asyncio
+    async def test_unsubscribe_stops_updates(self, report):
+        """Test unsubscribed queues are dropped and receive nothing"""
+        service = ProgressService()
+        queue = service.subscribe(report.id)
+        service.unsubscribe(report.id, queue)
+
+        service.publish(report)
+
+        assert queue.empty()
+        assert service._subscribers == {}
@@ -0,0 +1,43 @@
+import pytest
+from fastapi import HTTPException
+from unittest.mock import patch
+
+from app.core.rate_limit import RateLimiter
+
+
+class TestRateLimiter:
+    def test_allows_burst_up_to_limit(self):
+        """Test a key may spend its whole budget at once"""
+        limiter = RateLimiter(limit=3, period=60)
+
+        assert [limiter.hit("key") for _ in range(3)] == [None, None, None]
+        assert limiter.hit("key") == pytest.approx(20, abs=0.1)
+
+    def test_keys_are_independent(self):
+        """Test one key running out doesn't affect another"""
+        limiter = RateLimiter(limit=1, period=60)
+
+        limiter.hit(("1.2.3.4", "a@example.com"))
+
+        assert limiter.hit(("1.2.3.4", "b@example.com")) is None
+
+    def test_tokens_refill_over_time(self):
+        """Test spent tokens come back at limit/period per second"""
+        limiter = RateLimiter(limit=2, period=60)
+
+        with patch('app.core.rate_limit.time.monotonic', side_effect=[0, 0, 0, 30]):
+            limiter.hit("key")
+            limiter.hit("key")
+            assert limiter.hit("key") is not None
+            assert limiter.hit("key") is None
+
+    def test_check_raises_429_with_retry_after(self):
+        """Test check rejects over-limit keys with a Retry-After header"""
+        limiter = RateLimiter(limit=1, period=60)
+        limiter.check("key")
+
+        with pytest.raises(HTTPException) as exc_info:
+            limiter.check("key")
+
+        assert exc_info.value.status_code == 429
+        assert exc_info.value.headers["Retry-After"] == "60"
@@ -0,0 +1,39 @@
+import json
+from datetime import datetime
+
+from app.api.v1.endpoints.reports import _report_list_response
+from app.models.health_data import FileStatus, HealthParameter, LabReport, ParameterStatus
+
+
+def make_report():
+    return LabReport(
+        id="r1",
+        user_id="u1",
+        filename="lab.pdf",
+        original_filename="lab.pdf",
+        file_path="uploads/lab.pdf",
+        upload_date=datetime(2024, 1, 15, 10, 30),
+        processing_status=FileStatus.COMPLETED,
+        parameters=[HealthParameter(id="p1", name="Glucose", value=95, unit="mg/dL", status=ParameterStatus.NORMAL)],
+        file_size=1024,
+        file_type="application/pdf"
+    )
+
+
+class TestReportListResponse:
+    def test_matches_model_json(self):
+        """Test the pre-serialized list is what the response model would produce"""
+        report = make_report()
+
+        response = _report_list_response([report], {"X-Next-Cursor": "abc"})
+
+        assert json.loads(response.body) == [report.model_dump(mode="json")]
+        assert response.headers["X-Next-Cursor"] == "abc"
+        assert response.media_type == "application/json"
+
+    def test_empty_list(self):
+        """Test an empty page encodes as an empty array without a cursor"""
+        response = _report_list_response([])
+
+        assert response.body == b"[]"
+        assert "X-Next-Cursor" not in response.headers
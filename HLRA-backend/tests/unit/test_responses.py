@@ -0,0 +1,43 @@
+import json
+from datetime import datetime
+from bson import ObjectId
+
+from app.core.responses import FastJSONResponse, model_response
+from app.models.file_models import FileProcessingStatus
+from app.models.user import UserInDB, UserResponse
+from app.utils.helpers import construct_from
+
+
+class TestFastJSONResponse:
+    def test_encodes_mongo_and_model_values(self):
+        """Test ObjectIds, datetimes and nested models encode without jsonable_encoder"""
+        object_id = ObjectId()
+        status = FileProcessingStatus(
+            file_id="f1", status="completed", progress=100, message="done", parameters_found=3
+        )
+
+        response = FastJSONResponse({
+            "id": object_id,
+            "created_at": datetime(2024, 1, 15, 10, 30),
+            "status": status,
+            "tags": {"a"},
+        })
+
+        body = json.loads(response.body)
+        assert body["id"] == str(object_id)
+        assert body["created_at"] == "2024-01-15T10:30:00"
+        assert body["status"]["progress"] == 100
+        assert body["tags"] == ["a"]
+        assert response.media_type == "application/json"
+
+
+class TestModelResponse:
+    def test_matches_validated_model_output(self):
+        """Test a constructed model dumps the same JSON a validated one would"""
+        user = UserInDB(email="test@example.com", full_name="Test User", hashed_password="hash")
+
+        response = model_response(construct_from(UserResponse, user))
+
+        assert json.loads(response.body) == UserResponse(**user.dict()).model_dump(mode="json")
+        assert "hashed_password" not in json.loads(response.body)
+        assert response.media_type == "application/json"
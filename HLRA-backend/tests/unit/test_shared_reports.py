@@ -0,0 +1,146 @@
+import bcrypt
+import pytest
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+from fastapi import HTTPException
+
+from app.api.v1.endpoints import shared_reports
+from app.api.v1.endpoints.shared_reports import ShareLink, _check_share_password
+
+
+class TestSharePassword:
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        """Start every test with no remembered passwords"""
+        shared_reports._verified_share_passwords.clear()
+        yield
+        shared_reports._verified_share_passwords.clear()
+
+    @pytest.fixture
+    def share_link(self):
+        """Share protected with the password 'secret'"""
+        password_hash = bcrypt.hashpw(b"secret", bcrypt.gensalt(rounds=4)).decode()
+        return ShareLink(report_id="r1", user_id="u1", password_hash=password_hash)
+
+    @pytest.mark.asyncio
+    async def test_correct_password_checked_once(self, share_link):
+        """Test a verified password skips bcrypt on the next access"""
+        with patch.object(shared_reports.bcrypt, "checkpw", wraps=bcrypt.checkpw) as checkpw:
+            assert await _check_share_password(share_link, "secret") is True
+            assert await _check_share_password(share_link, "secret") is True
+
+        checkpw.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_wrong_password_never_cached(self, share_link):
+        """Test failed attempts pay for bcrypt every time"""
+        with patch.object(shared_reports.bcrypt, "checkpw", wraps=bcrypt.checkpw) as checkpw:
+            assert await _check_share_password(share_link, "wrong") is False
+            assert await _check_share_password(share_link, "wrong") is False
+
+        assert checkpw.call_count == 2
+        assert len(shared_reports._verified_share_passwords) == 0
+
+
+class TestSharedReportAccess:
+    @pytest.fixture
+    def collection(self):
+        """shared_links collection with no documents unless a test sets them"""
+        collection = MagicMock()
+        collection.find_one_and_update = AsyncMock(return_value=None)
+        collection.find_one = AsyncMock(return_value=None)
+        return collection
+
+    @pytest.mark.asyncio
+    async def test_unprotected_share_served_in_one_round_trip(self, collection):
+        """Test the share lookup and access count are a single Mongo call"""
+        collection.find_one_and_update.return_value = {"id": "s1", "report_id": "r1", "user_id": "u1", "token": "t"}
+        report = MagicMock(id="r1", user_id="u1", filename="lab.pdf", upload_date=datetime(2024, 1, 1), parameters=[])
+
+        with patch.object(shared_reports.data_service, "get_report", AsyncMock(return_value=report)):
+            response = await shared_reports.get_shared_report("r1", share_token="t", collection=collection)
+
+        assert response.status_code == 200
+        collection.find_one.assert_not_called()
+        query, update = collection.find_one_and_update.call_args.args
+        assert query["password_hash"] is None
+        assert update["$inc"] == {"access_count": 1}
+
+    @pytest.mark.asyncio
+    async def test_protected_share_asks_for_password(self, collection):
+        """Test a password-protected share is not counted before the password is given"""
+        collection.find_one.return_value = {"id": "s1", "report_id": "r1", "user_id": "u1", "token": "t", "password_hash": "hash"}
+
+        with patch.object(shared_reports.data_service, "get_report", AsyncMock(return_value=None)):
+            response = await shared_reports.get_shared_report("r1", share_token="t", collection=collection)
+
+        assert response["requiresPassword"] is True
+
+    @pytest.mark.asyncio
+    async def test_expired_share_rejected(self, collection):
+        """Test an expired link still explains why it was refused"""
+        collection.find_one.return_value = {"id": "s1", "report_id": "r1", "user_id": "u1", "token": "t", "expires_at": datetime(2000, 1, 1)}
+
+        with patch.object(shared_reports.data_service, "get_report_meta", AsyncMock(return_value=None)):
+            with pytest.raises(HTTPException) as exc:
+                await shared_reports.download_shared_report("r1", share_token="t", collection=collection)
+
+        assert exc.value.status_code == 401
+        assert exc.value.detail == "Share link has expired"
+
+
+class TestShareLinkDocument:
+    def test_round_trips_through_mongo_document(self):
+        """Test a stored document, including Mongo's _id, loads back unchanged"""
+        share_link = ShareLink(report_id="r1", user_id="u1")
+        document = {"_id": "mongo-id", **share_link.dict()}
+
+        assert ShareLink.from_document(document) == share_link
+
+
+class TestRevokeShare:
+    @pytest.mark.asyncio
+    async def test_revoke_is_single_update(self):
+        """Test revoking checks ownership and deactivates in one call"""
+        collection = MagicMock()
+        collection.update_one = AsyncMock(return_value=MagicMock(matched_count=0))
+        collection.find_one = AsyncMock()
+
+        with pytest.raises(HTTPException) as exc:
+            await shared_reports.revoke_share_link("s1", current_user=MagicMock(id="u1"), collection=collection)
+
+        assert exc.value.status_code == 404
+        collection.find_one.assert_not_called()
+        collection.update_one.assert_awaited_once_with(
+            {"id": "s1", "user_id": "u1"}, {"$set": {"is_active": False}}
+        )
+
+
+class TestSharedDownload:
+    @pytest.mark.asyncio
+    async def test_file_served_with_cache_headers(self, tmp_path):
+        """Test the download reuses its stat and lets the browser cache the file"""
+        pdf = tmp_path / "lab.pdf"
+        pdf.write_bytes(b"%PDF-1.4")
+        collection = MagicMock()
+        collection.find_one_and_update = AsyncMock(return_value={"id": "s1", "report_id": "r1", "user_id": "u1", "token": "t"})
+        meta = {"id": "r1", "user_id": "u1", "profile_id": None, "filename": "lab.pdf", "file_path": str(pdf)}
+
+        with patch.object(shared_reports.data_service, "get_report_meta", AsyncMock(return_value=meta)):
+            response = await shared_reports.download_shared_report("r1", share_token="t", collection=collection)
+
+        assert response.headers["Cache-Control"] == shared_reports.SHARED_DOWNLOAD_CACHE_CONTROL
+        assert response.headers["content-length"] == "8"
+
+    @pytest.mark.asyncio
+    async def test_missing_file_is_404(self, tmp_path):
+        """Test a report whose file is gone is reported as not found"""
+        collection = MagicMock()
+        collection.find_one_and_update = AsyncMock(return_value={"id": "s1", "report_id": "r1", "user_id": "u1", "token": "t"})
+        meta = {"id": "r1", "user_id": "u1", "profile_id": None, "filename": "lab.pdf", "file_path": str(tmp_path / "gone.pdf")}
+
+        with patch.object(shared_reports.data_service, "get_report_meta", AsyncMock(return_value=meta)):
+            with pytest.raises(HTTPException) as exc:
+                await shared_reports.download_shared_report("r1", share_token="t", collection=collection)
+
+        assert exc.value.status_code == 404
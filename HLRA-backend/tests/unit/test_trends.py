@@ -0,0 +1,70 @@
+import pytest
+from datetime import datetime
+from unittest.mock import AsyncMock, patch
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+
+from app.api.v1.endpoints import trends
+from app.models.health_data import ParameterStatus, TrendData, TrendDataPoint, TrendDataResponse
+
+
+class TestAvailableParameters:
+    def test_served_from_pre_encoded_body(self):
+        """Test the parameter list is reachable and cacheable"""
+        app = FastAPI()
+        app.include_router(trends.router)
+
+        response = TestClient(app).get("/trends/parameters")
+
+        assert response.status_code == 200
+        assert response.json() == {"parameters": trends.AVAILABLE_PARAMETERS, "success": True}
+        assert response.headers["Cache-Control"] == trends.PARAMETERS_CACHE_CONTROL
+
+
+class TestTrendData:
+    def test_matches_response_model_output(self):
+        """Test the hand-dumped response equals what the response model would send"""
+        point = TrendDataPoint(date=datetime(2024, 1, 15), value=95.0, status=ParameterStatus.NORMAL)
+        trend = TrendData(parameter_name="glucose", data_points=[point], trend_direction="stable")
+        app = FastAPI()
+        app.include_router(trends.router)
+
+        with patch.object(trends.data_service, "get_trend_data", AsyncMock(return_value=trend)):
+            response = TestClient(app).get("/trends/glucose")
+
+        expected = TrendDataResponse(
+            parameter_name="glucose", date_range="3months", chart_data=[point],
+            trend_direction="stable", success=True
+        )
+        assert response.json() == expected.model_dump(mode="json", exclude_none=True)
+
+    def test_columns_layout(self):
+        """Test the columnar layout carries the same points as parallel arrays"""
+        points = [
+            TrendDataPoint(date=datetime(2024, 1, 15), value=95.0, status=ParameterStatus.NORMAL),
+            TrendDataPoint(date=datetime(2024, 2, 15), value=110.0, status=ParameterStatus.HIGH)
+        ]
+        trend = TrendData(parameter_name="glucose", data_points=points, trend_direction="declining")
+        app = FastAPI()
+        app.include_router(trends.router)
+
+        with patch.object(trends.data_service, "get_trend_data", AsyncMock(return_value=trend)):
+            response = TestClient(app).get("/trends/glucose", params={"layout": "columns"})
+
+        assert response.json() == {
+            "parameter_name": "glucose",
+            "date_range": "3months",
+            "dates": ["2024-01-15T00:00:00", "2024-02-15T00:00:00"],
+            "values": [95.0, 110.0],
+            "statuses": ["normal", "high"],
+            "trend_direction": "declining",
+            "success": True
+        }
+
+    def test_cached_points_cannot_be_modified(self):
+        """Test trend points, which are shared through the trend cache, are frozen"""
+        point = TrendDataPoint(date=datetime(2024, 1, 15), value=95.0, status=ParameterStatus.NORMAL)
+
+        with pytest.raises(ValidationError):
+            point.value = 200.0
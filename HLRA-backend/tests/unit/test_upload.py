@@ -0,0 +1,47 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.api.v1.endpoints import upload
+from app.models.health_data import FileStatus
+
+
+class TestProcessingSlots:
+    @pytest.mark.asyncio
+    async def test_processing_concurrency_is_bounded(self):
+        """Test queued uploads wait for a slot instead of all processing at once"""
+        running = 0
+        peak = 0
+
+        async def fake_process(report_id):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+        with patch.object(upload, "_processing_slots", asyncio.Semaphore(2)), \
+             patch.object(upload, "_process_uploaded_file", fake_process):
+            await asyncio.gather(*(upload.process_uploaded_file(f"r{i}") for i in range(5)))
+
+        assert peak == 2
+
+
+class TestProcessingFailure:
+    @pytest.mark.asyncio
+    async def test_failure_marks_loaded_report_without_refetch(self):
+        """Test a failed extraction marks the already loaded report failed in one lookup"""
+        report = MagicMock(processing_status=FileStatus.PROCESSING)
+        get_report = AsyncMock(return_value=report)
+        update_report = AsyncMock()
+
+        with patch.object(upload.data_service, "get_report", get_report), \
+             patch.object(upload.data_service, "update_report", update_report), \
+             patch.object(upload.processing_service, "extract", AsyncMock(side_effect=RuntimeError("bad scan"))), \
+             patch.object(upload.progress_service, "publish"):
+            await upload._process_uploaded_file("r1")
+
+        get_report.assert_awaited_once_with("r1")
+        assert report.processing_status == FileStatus.FAILED
+        assert report.error_message == "bad scan"
+        update_report.assert_awaited_once_with(report)
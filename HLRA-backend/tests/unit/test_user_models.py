@@ -0,0 +1,77 @@
+import pytest
+from unittest.mock import MagicMock
+from pydantic import ValidationError
+
+from app.database.connection import get_database
+from app.main import app
+
+from app.models.user import UserCreate, UserInDB, UserResponse, password_strength_error
+
+
+class TestPasswordStrength:
+    @pytest.mark.parametrize("password,message", [
+        ("Short1", "at least 8 characters"),
+        ("A1" + "a" * 71, "too long"),
+        ("lowercase123", "uppercase letter"),
+        ("UPPERCASE123", "lowercase letter"),
+        ("NoNumbersHere", "number"),
+    ])
+    def test_weak_passwords_rejected(self, password, message):
+        """Test each weakness is reported with its own message"""
+        assert message in password_strength_error(password)
+
+    def test_strong_password_accepted(self):
+        """Test a password meeting every rule passes"""
+        assert password_strength_error("StrongPass123") is None
+
+    def test_user_create_rejects_weak_password(self):
+        """Test UserCreate validates the password before reaching the handler"""
+        with pytest.raises(ValidationError) as exc_info:
+            UserCreate(email="test@example.com", full_name="Test User", password="weakpassword")
+
+        assert "uppercase letter" in str(exc_info.value)
+
+
+class TestUserCreate:
+    @pytest.mark.parametrize("full_name", ["", "A", "  B  "])
+    def test_user_create_rejects_short_full_name(self, full_name):
+        """Test names shorter than 2 characters after stripping are rejected"""
+        with pytest.raises(ValidationError) as exc_info:
+            UserCreate(email="test@example.com", full_name=full_name, password="StrongPass123")
+
+        assert "full name" in str(exc_info.value)
+
+
+class TestUserResponse:
+    def test_built_from_user_and_frozen(self):
+        """Test the response reads the user's attributes and can't be changed afterwards"""
+        user = UserInDB(email="test@example.com", full_name="Test User", hashed_password="hash")
+
+        response = UserResponse.model_validate(user)
+
+        assert response.email == "test@example.com"
+        with pytest.raises(ValidationError):
+            response.full_name = "Someone Else"
+
+
+class TestRegisterValidationErrors:
+    @pytest.fixture
+    def register(self, client):
+        """POST to /auth/register without a database behind it"""
+        app.dependency_overrides[get_database] = lambda: MagicMock()
+        yield lambda body: client.post("/api/v1/auth/register", json=body)
+        app.dependency_overrides.clear()
+
+    def test_weak_password_is_plain_400(self, register):
+        """Test failed account checks answer 400 with the message as detail"""
+        response = register({"email": "test@example.com", "full_name": "Test User", "password": "weakpassword"})
+
+        assert response.status_code == 400
+        assert response.json() == {"detail": password_strength_error("weakpassword")}
+
+    def test_other_errors_stay_422(self, register):
+        """Test schema errors keep FastAPI's usual response"""
+        response = register({"email": "invalid-email", "full_name": "Test User", "password": "StrongPass123"})
+
+        assert response.status_code == 422
+        assert isinstance(response.json()["detail"], list)